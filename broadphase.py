@@ -0,0 +1,149 @@
+from bisect import bisect_left, bisect_right
+from dataclasses import dataclass
+
+@dataclass
+class Broadphase:
+    # Sorted interval lists for each axis, used to find overlapping boxes without checking every pair of boxes
+    intervals: list[list[list]] # [[[low, high, key]]] per axis, sorted by low
+    starts: list[list[int]] # [[low]] per axis, kept in the same order as intervals so it can be bisected
+    bounds: dict[int, list[list[int]]] # {key: [[low x, low y, low z], [high x, high y, high z]]}
+    items: dict[int, object] # {key: item}
+    max_length: list[int] # Longest interval ever added along each axis, bounds how far back a query has to look
+
+def create_broadphase() -> Broadphase:
+    '''
+    This function creates an empty broadphase
+
+    Args:
+        None
+
+    Returns:
+        Broadphase: a broadphase with no items in it
+    '''
+    return Broadphase([[], [], []], [[], [], []], {}, {}, [0, 0, 0])
+
+def add_item(broadphase: Broadphase, item: object, low: list[int], high: list[int]):
+    '''
+    This function adds an item to the broadphase with the given axis aligned bounding box
+
+    Args:
+        broadphase (Broadphase): the broadphase the item is added to
+        item (object): the item to be added, usually a Box
+        low (list[int]): the x, y, and z minimum corner of the item's bounding box
+        high (list[int]): the x, y, and z maximum corner of the item's bounding box
+
+    Returns:
+        None
+    '''
+    key = id(item)
+    broadphase.items[key] = item
+    broadphase.bounds[key] = [list(low), list(high)]
+    for axis in range(3):
+        index = bisect_right(broadphase.starts[axis], low[axis])
+        broadphase.intervals[axis].insert(index, [low[axis], high[axis], key])
+        broadphase.starts[axis].insert(index, low[axis])
+        broadphase.max_length[axis] = max(broadphase.max_length[axis], high[axis] - low[axis])
+
+def find_interval(broadphase: Broadphase, axis: int, key: int) -> int:
+    '''
+    This function finds where an item's interval is in the sorted interval list of an axis
+
+    Args:
+        broadphase (Broadphase): the broadphase being searched
+        axis (int): the axis whose interval list is searched
+        key (int): the key of the item being searched for
+
+    Returns:
+        int: the index of the item's interval in the interval list
+    '''
+    index = bisect_left(broadphase.starts[axis], broadphase.bounds[key][0][axis])
+    while broadphase.intervals[axis][index][2] != key:
+        index += 1
+    return index
+
+def update_item(broadphase: Broadphase, item: object, low: list[int], high: list[int]):
+    '''
+    This function moves an item's bounding box. Boxes only move a few substeps each frame, so the interval is shifted
+    into place with an insertion sort instead of resorting the whole list
+
+    Args:
+        broadphase (Broadphase): the broadphase containing the item
+        item (object): the item whose bounding box has changed
+        low (list[int]): the new x, y, and z minimum corner of the item's bounding box
+        high (list[int]): the new x, y, and z maximum corner of the item's bounding box
+
+    Returns:
+        None
+    '''
+    key = id(item)
+    for axis in range(3):
+        intervals = broadphase.intervals[axis]
+        starts = broadphase.starts[axis]
+        index = find_interval(broadphase, axis, key)
+        interval = intervals[index]
+        interval[0] = low[axis]
+        interval[1] = high[axis]
+        starts[index] = low[axis]
+
+        # Swap the interval towards the front or back of the list until it is sorted again
+        while index > 0 and starts[index - 1] > starts[index]:
+            intervals[index - 1], intervals[index] = intervals[index], intervals[index - 1]
+            starts[index - 1], starts[index] = starts[index], starts[index - 1]
+            index -= 1
+        while index < len(starts) - 1 and starts[index + 1] < starts[index]:
+            intervals[index + 1], intervals[index] = intervals[index], intervals[index + 1]
+            starts[index + 1], starts[index] = starts[index], starts[index + 1]
+            index += 1
+
+        broadphase.max_length[axis] = max(broadphase.max_length[axis], high[axis] - low[axis])
+    broadphase.bounds[key] = [list(low), list(high)]
+
+def remove_item(broadphase: Broadphase, item: object):
+    '''
+    This function removes an item from the broadphase
+
+    Args:
+        broadphase (Broadphase): the broadphase containing the item
+        item (object): the item to be removed
+
+    Returns:
+        None
+    '''
+    key = id(item)
+    for axis in range(3):
+        index = find_interval(broadphase, axis, key)
+        del broadphase.intervals[axis][index]
+        del broadphase.starts[axis][index]
+    del broadphase.bounds[key]
+    del broadphase.items[key]
+
+def query_region(broadphase: Broadphase, low: list[int], high: list[int]) -> list:
+    '''
+    This function finds every item whose bounding box overlaps the given region. Boxes that only touch the region
+    along a face do not count as overlapping
+
+    Args:
+        broadphase (Broadphase): the broadphase being searched
+        low (list[int]): the x, y, and z minimum corner of the region
+        high (list[int]): the x, y, and z maximum corner of the region
+
+    Returns:
+        list: the items overlapping the region
+    '''
+    # Only intervals starting in (low - longest interval, high) can overlap the region on an axis, so search the axis
+    # where that window holds the fewest intervals
+    best_axis = 0
+    best_window = None
+    for axis in range(3):
+        first = bisect_right(broadphase.starts[axis], low[axis] - broadphase.max_length[axis])
+        last = bisect_left(broadphase.starts[axis], high[axis])
+        if best_window is None or last - first < best_window[1] - best_window[0]:
+            best_axis = axis
+            best_window = [first, last]
+
+    overlapping = []
+    for interval in broadphase.intervals[best_axis][best_window[0]:best_window[1]]:
+        box_low, box_high = broadphase.bounds[interval[2]]
+        if all(box_low[axis] < high[axis] and low[axis] < box_high[axis] for axis in range(3)):
+            overlapping.append(broadphase.items[interval[2]])
+    return overlapping
@@ -0,0 +1,183 @@
+from collections import deque
+from dataclasses import dataclass
+from voxels import VoxelGrid, get_voxel, RED, WHITE
+
+SOLID = [RED, WHITE] # Codes of boxes that never move
+
+@dataclass
+class DeadlockTable:
+    # Precomputed from the boxes of a level that never move, used to find blue boxes that can never reach a green box.
+    # Reachability is over-estimated, so a cell marked dead really is dead
+    reach: dict[tuple[int, int, int], set[tuple[int, int, int]]] # {green cell: cells a blue box can reach it from}
+    live_cells: set[tuple[int, int, int]] # Cells a blue box can reach at least one green box from
+
+def is_solid(grid: VoxelGrid, cell: list[int]) -> bool:
+    '''
+    This function checks if the box at a cell is one that never moves
+
+    Args:
+        grid (VoxelGrid): the voxel grid of the level
+        cell (list[int]): the x, y, and z cell being checked
+
+    Returns:
+        bool: True if there is a red or white box at the cell, else returns False
+    '''
+    return get_voxel(grid, cell) in SOLID
+
+def can_grow(grid: VoxelGrid, red_cell: list[int], axis: int, direction: int, headroom: int) -> bool:
+    '''
+    This function checks if a red box could ever grow along an axis when pushing towards the given direction. Only
+    boxes that never move are counted, as any blue box in the way might be pushed aside first
+
+    Args:
+        grid (VoxelGrid): the voxel grid of the level
+        red_cell (list[int]): the x, y, and z cell of the red box
+        axis (int): the axis the red box grows along, 0 for x and 2 for z
+        direction (int): the direction being pushed towards, 1 for positive and -1 for negative
+        headroom (int): how many cells above a red box must be empty for it to grow
+
+    Returns:
+        bool: True if nothing that never moves stops the red box from growing, else returns False
+    '''
+    behind = list(red_cell)
+    behind[axis] -= direction
+    if is_solid(grid, behind):
+        return False
+    for height in range(1, headroom + 1):
+        if is_solid(grid, [red_cell[0], red_cell[1] - height, red_cell[2]]):
+            return False
+    return True
+
+def find_moves(grid: VoxelGrid, cell: list[int], low: list[int], high: list[int], floor: int,
+               headroom: int) -> list[tuple[int, int, int]]:
+    '''
+    This function finds every cell a blue box at the given cell might end up in after one push. A blue box can be
+    pushed away from a red box in the same row or column if only blue boxes could be between them, and it may land
+    anywhere it could fall to, since blue boxes below it might have moved away
+
+    Args:
+        grid (VoxelGrid): the voxel grid of the level
+        cell (list[int]): the x, y, and z cell of the blue box
+        low (list[int]): the x, y, and z minimum cell of the level
+        high (list[int]): the x, y, and z maximum cell of the level
+        floor (int): the lowest y a box can rest at
+        headroom (int): how many cells above a red box must be empty for it to grow
+
+    Returns:
+        list[tuple[int, int, int]]: the x, y, and z cells the blue box might end up in
+    '''
+    moves = []
+    for axis in [0, 2]:
+        for direction in [1, -1]:
+            target = list(cell)
+            target[axis] += direction
+            # A blue box pushed past the edge of the level can never be pushed back
+            if not low[axis] <= target[axis] <= high[axis] or is_solid(grid, target):
+                continue
+
+            pushable = False
+            pusher = list(cell)
+            while low[axis] <= pusher[axis] - direction <= high[axis]:
+                pusher[axis] -= direction
+                code = get_voxel(grid, pusher)
+                if code == RED:
+                    pushable = can_grow(grid, pusher, axis, direction, headroom)
+                if code in SOLID:
+                    break
+            if not pushable:
+                continue
+
+            while True:
+                moves.append(tuple(target))
+                if target[1] >= floor or is_solid(grid, [target[0], target[1] + 1, target[2]]):
+                    break
+                target = [target[0], target[1] + 1, target[2]]
+    return moves
+
+def create_deadlock_table(grid: VoxelGrid, green_cells: list[list[int]], low: list[int], high: list[int], floor: int,
+                          headroom: int) -> DeadlockTable:
+    '''
+    This function precomputes which cells a blue box can reach each green box from, by searching backwards from every
+    green box over the moves find_moves allows
+
+    Args:
+        grid (VoxelGrid): the voxel grid of the level, only its red and white boxes are used
+        green_cells (list[list[int]]): the x, y, and z cell of every green box
+        low (list[int]): the x, y, and z minimum cell of the level
+        high (list[int]): the x, y, and z maximum cell of the level
+        floor (int): the lowest y a box can rest at
+        headroom (int): how many cells above a red box must be empty for it to grow
+
+    Returns:
+        DeadlockTable: the table of live cells for the level
+    '''
+    sources = {}
+    for x in range(low[0], high[0] + 1):
+        for y in range(low[1], high[1] + 1):
+            for z in range(low[2], high[2] + 1):
+                if not is_solid(grid, [x, y, z]):
+                    for move in find_moves(grid, [x, y, z], low, high, floor, headroom):
+                        sources.setdefault(move, []).append((x, y, z))
+
+    reach = {}
+    for green_cell in green_cells:
+        green_cell = tuple(green_cell)
+        found = {green_cell}
+        queue = deque([green_cell])
+        while queue:
+            for source in sources.get(queue.popleft(), []):
+                if source not in found:
+                    found.add(source)
+                    queue.append(source)
+        reach[green_cell] = found
+
+    live_cells = set()
+    for found in reach.values():
+        live_cells |= found
+    return DeadlockTable(reach, live_cells)
+
+def find_match(table: DeadlockTable, green_cells: list, green: int, blue_cells: list[tuple[int, int, int]],
+               matched: dict[int, int], visited: set[int]) -> bool:
+    '''
+    This function tries to give a green box its own blue box, moving other greens to different blue boxes if needed
+
+    Args:
+        table (DeadlockTable): the table of the level
+        green_cells (list): the cell of every green box
+        green (int): the index of the green box being matched
+        blue_cells (list[tuple[int, int, int]]): the cell of every blue box
+        matched (dict[int, int]): {blue box index: green box index} of the matches so far, updated in place
+        visited (set[int]): the blue boxes already tried for this search
+
+    Returns:
+        bool: True if the green box was matched, else returns False
+    '''
+    for blue, blue_cell in enumerate(blue_cells):
+        if blue_cell in table.reach[green_cells[green]] and blue not in visited:
+            visited.add(blue)
+            if blue not in matched or find_match(table, green_cells, matched[blue], blue_cells, matched, visited):
+                matched[blue] = green
+                return True
+    return False
+
+def is_deadlocked(table: DeadlockTable, blue_cells: list[list[int]]) -> bool:
+    '''
+    This function checks if a level can no longer be completed, which is when the green boxes can't each be given a
+    different blue box that can still reach them
+
+    Args:
+        table (DeadlockTable): the table of the level
+        blue_cells (list[list[int]]): the x, y, and z cell of every blue box
+
+    Returns:
+        bool: True if the level can't be completed, else returns False
+    '''
+    blue_cells = [tuple(cell) for cell in blue_cells if tuple(cell) in table.live_cells]
+    green_cells = list(table.reach)
+    if len(blue_cells) < len(green_cells):
+        return True
+    matched = {}
+    for green in range(len(green_cells)):
+        if not find_match(table, green_cells, green, blue_cells, matched, set()):
+            return True
+    return False
@@ -0,0 +1,474 @@
+import argparse
+import math as m
+import os
+import random
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from functools import cache
+from types import ModuleType
+from voxels import get_layers, get_level_size
+from startup import lazy_import
+
+vector_env = lazy_import("vector_env")
+
+CHUNK_CASES = 100 # Cases each job in the process pool runs
+MAX_ACTIVATIONS = 8 # Most red boxes activated in one case
+MAX_SIZE = 6 # Most rows and columns in a generated level
+CELL_WEIGHTS = {" ": 10, "r": 3, "w": 2, "b": 3, "g": 2} # How often each character is put in a generated cell
+NAMES = {1: "red", 2: "white", 3: "blue"} # Name of each voxel code in a description
+
+@dataclass
+class Engine:
+    # A way of playing a level that the fuzzer can compare against the game's own rules. Every engine describes its
+    # state the same way, so any two engines can be compared
+    create: object # Function given a level that returns the engine's state at the start of it
+    activate: object # Function given the state and the index of a red box, in create_level's order, that clicks it
+    describe: object # Function given the state that returns the sorted (code, x, y, z) of each red, white, and blue
+                     # box in cells, placed like create_level places them, and whether the level is won
+    close: object # Function given the state that frees anything it holds once the case is done
+
+@dataclass
+class ReferenceGame:
+    # A level played with the game's own functions, without a window
+    world: object # The World from create_level
+    won: bool # True once end_level would have ended the level, after which nothing changes
+
+@dataclass
+class VectorGame:
+    # A level played in a vector environment with one instance
+    env: object # The VectorEnv
+    offset: list[int] # [x, z] create_level moves cells by, so both engines describe boxes in the same place
+
+@dataclass
+class Divergence:
+    # The first state two engines disagree on
+    level: list
+    actions: list[int] # Index of each red box clicked, in order
+    step: int # Activations made before the engines disagreed, 0 if they disagreed as soon as the level opened
+    expected: tuple[tuple, bool] # The description from the reference engine
+    found: tuple[tuple, bool] # The description from the engine being checked
+
+@cache
+def load_rules() -> ModuleType:
+    '''
+    This function imports the game without starting it, so its functions can be used as the reference rules. The
+    raster backend is used so boxes aren't given DesignerObjects the rules don't need. The player's progress and
+    thumbnails are only opened when main.py is run, so the workers never write to them
+
+    Args:
+        None
+
+    Returns:
+        ModuleType: the main module
+    '''
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+    if "--raster" not in sys.argv:
+        sys.argv.append("--raster")
+    import main
+    return main
+
+def create_reference_game(level: list) -> ReferenceGame:
+    '''
+    This function opens a level with create_level, the same way the game does
+
+    Args:
+        level (list): the level in the levels.py format
+
+    Returns:
+        ReferenceGame: the opened level
+    '''
+    rules = load_rules()
+    world = rules.create_level(level, *get_level_size(level))
+    return ReferenceGame(world, rules.detect_win(world))
+
+def activate_reference_game(game: ReferenceGame, index: int):
+    '''
+    This function clicks a red box and runs frames until it is fully grown, checking for a win at the start of each
+    frame like end_level does
+
+    Args:
+        game (ReferenceGame): the level being played
+        index (int): the index of the red box
+
+    Returns:
+        None
+    '''
+    rules = load_rules()
+    world = game.world
+    if game.won or not rules.activate_red_box(world, world.boxes[0][index]):
+        return
+    while world.is_scaling:
+        rules.update_scaling(world)
+        if rules.detect_win(world):
+            game.won = True
+            return
+
+def describe_reference_game(game: ReferenceGame) -> tuple[tuple, bool]:
+    '''
+    This function describes a level played with the game's own functions. Red boxes are described by their cell, as a
+    grown red box is moved up by half its growth. Blue boxes partway between cells are described where they are, so
+    they never match a box resting in a cell
+
+    Args:
+        game (ReferenceGame): the level being played
+
+    Returns:
+        tuple[tuple, bool]: the sorted (code, x, y, z) of each red, white, and blue box and whether the level is won
+    '''
+    rules = load_rules()
+    boxes = [(rules.VOXEL_CODES["red"], *box.cell) for box in game.world.boxes[0]]
+    boxes += [(rules.VOXEL_CODES[box.color], *[position / rules.SUBSTEPS for position in rules.get_position(box)])
+              for type in game.world.boxes[1:3] for box in type]
+    return tuple(sorted(boxes)), game.won
+
+def close_reference_game(game: ReferenceGame):
+    '''
+    This function destroys the DesignerObjects of a level played with the game's own functions. Designer only tracks
+    objects made while the game is running, so the raster frame and buttons are tracked first or destroying them
+    fails and every case would keep its frame
+
+    Args:
+        game (ReferenceGame): the level being played
+
+    Returns:
+        None
+    '''
+    rules = load_rules()
+    world = game.world
+    objects = [part for button in world.buttons for part in [button.border, button.background, button.text]]
+    if world.frame:
+        objects.append(world.frame.canvas)
+    rules.get_director().all_sprites.update(objects)
+    rules.destroy_world(world)
+
+def create_vector_game(level: list) -> VectorGame:
+    '''
+    This function opens a level in a vector environment with one instance
+
+    Args:
+        level (list): the level in the levels.py format
+
+    Returns:
+        VectorGame: the opened level
+    '''
+    columns, rows = get_level_size(level)
+    return VectorGame(vector_env.create_vector_env([level]), [m.floor(columns / 2), m.floor(rows / 2)])
+
+def activate_vector_game(game: VectorGame, index: int):
+    '''
+    This function activates a red box in a vector environment with one instance
+
+    Args:
+        game (VectorGame): the level being played
+        index (int): the index of the red box
+
+    Returns:
+        None
+    '''
+    vector_env.step(game.env, [index])
+
+def describe_vector_game(game: VectorGame) -> tuple[tuple, bool]:
+    '''
+    This function describes a level played in a vector environment, moving its cells back to where create_level
+    places them. Blue boxes partway between cells are described where they are, the same way the reference engine
+    describes them
+
+    Args:
+        game (VectorGame): the level being played
+
+    Returns:
+        tuple[tuple, bool]: the sorted (code, x, y, z) of each red, white, and blue box and whether the level is won
+    '''
+    env = game.env
+    statics = env.statics[0]
+    boxes = [(int(statics[layer, row, column]), int(column) - env.origin[1] - game.offset[0], -int(layer),
+              int(row) - env.origin[0] - game.offset[1]) for layer, row, column in zip(*statics.nonzero())]
+    for (layer, row, column), offset in zip(env.blue_cells[0, :env.blue_counts[0]].tolist(),
+                                            env.blue_offsets[0, :env.blue_counts[0]].tolist()):
+        x = (column - env.origin[1] - game.offset[0]) * vector_env.SUBSTEPS + offset[2]
+        z = (row - env.origin[0] - game.offset[1]) * vector_env.SUBSTEPS + offset[1]
+        boxes.append((vector_env.BLUE, x / vector_env.SUBSTEPS, float(-layer), z / vector_env.SUBSTEPS))
+    return tuple(sorted(boxes)), bool(env.done[0])
+
+def close_vector_game(game: VectorGame):
+    '''
+    This function is here so vector environments can be closed like any other engine, they hold nothing but arrays
+
+    Args:
+        game (VectorGame): the level being played
+
+    Returns:
+        None
+    '''
+
+# Engines the fuzzer can check, new engines are added here
+ENGINES = {
+    "reference": Engine(create_reference_game, activate_reference_game, describe_reference_game, close_reference_game),
+    "vector": Engine(create_vector_game, activate_vector_game, describe_vector_game, close_vector_game)
+}
+
+def generate_level(rng: random.Random) -> list:
+    '''
+    This function generates a random level in the levels.py format, with at least one red box. Layers above the
+    first are emptier, as most of their boxes fall
+
+    Args:
+        rng (random.Random): the random number generator
+
+    Returns:
+        list: a 2d list of strings, or a list of them for levels with more than one layer
+    '''
+    columns = rng.randint(1, MAX_SIZE)
+    rows = rng.randint(1, MAX_SIZE)
+    layers = []
+    for y in range(rng.choice([1, 1, 1, 2])):
+        weights = dict(CELL_WEIGHTS)
+        weights[" "] *= 1 + 3 * y
+        layers.append([rng.choices(list(weights), list(weights.values()), k=columns) for _ in range(rows)])
+    layers[0][rng.randrange(rows)][rng.randrange(columns)] = "r"
+    if len(layers) == 1:
+        return layers[0]
+    return layers
+
+def count_red_boxes(level: list) -> int:
+    '''
+    This function counts the red boxes in a level
+
+    Args:
+        level (list): the level in the levels.py format
+
+    Returns:
+        int: the number of red boxes
+    '''
+    return sum(row.count("r") for layer in get_layers(level) for row in layer)
+
+def generate_case(seed: int, case: int) -> tuple[list, list[int]]:
+    '''
+    This function generates the level and clicks of a case. Each case has its own random number generator, so any
+    case can be run again from its seed and number
+
+    Args:
+        seed (int): the seed of the whole run
+        case (int): the number of the case
+
+    Returns:
+        tuple[list, list[int]]: the level and the index of each red box clicked
+    '''
+    rng = random.Random(str(seed) + ":" + str(case))
+    level = generate_level(rng)
+    reds = count_red_boxes(level)
+    return level, [rng.randrange(reds) for _ in range(rng.randint(1, MAX_ACTIVATIONS))]
+
+def find_divergence(engine: Engine, level: list, actions: list[int]) -> Divergence:
+    '''
+    This function plays a level with the reference engine and another engine side by side, comparing them after the
+    level opens and after every click
+
+    Args:
+        engine (Engine): the engine being checked
+        level (list): the level in the levels.py format
+        actions (list[int]): the index of each red box clicked
+
+    Returns:
+        Divergence: the first state the engines disagree on, None if they always agree
+    '''
+    reference = ENGINES["reference"]
+    expected_game = reference.create(level)
+    found_game = engine.create(level)
+    try:
+        for step in range(len(actions) + 1):
+            if step:
+                reference.activate(expected_game, actions[step - 1])
+                engine.activate(found_game, actions[step - 1])
+            expected = reference.describe(expected_game)
+            found = engine.describe(found_game)
+            if expected != found:
+                return Divergence(level, actions, step, expected, found)
+        return None
+    finally:
+        reference.close(expected_game)
+        engine.close(found_game)
+
+def minimize_divergence(engine: Engine, divergence: Divergence) -> Divergence:
+    '''
+    This function shrinks a case the engines disagree on by removing clicks, emptying cells, and removing layers,
+    rows, and columns for as long as the engines still disagree. Red boxes are renumbered as others are removed, so
+    each click stays on the same red box
+
+    Args:
+        engine (Engine): the engine being checked
+        divergence (Divergence): the case the engines disagree on
+
+    Returns:
+        Divergence: the smallest case found that the engines still disagree on
+    '''
+    # Red boxes are labeled with their number so they can be followed as the level shrinks
+    layers = [[list(row) for row in reversed(layer)] for layer in get_layers(divergence.level)]
+    labels = iter(range(count_red_boxes(divergence.level)))
+    layers = [[[next(labels) if character == "r" else character for character in row] for row in layer]
+              for layer in layers]
+    actions = divergence.actions[:divergence.step]
+
+    def build(layers, actions):
+        numbers = {}
+        level = []
+        for layer in layers:
+            level.append([])
+            for row in layer:
+                for character in row:
+                    if isinstance(character, int):
+                        numbers[character] = len(numbers)
+                level[-1].append(["r" if isinstance(character, int) else character for character in row])
+            level[-1].reverse()
+        return (level[0] if len(level) == 1 else level), [numbers[action] for action in actions if action in numbers]
+
+    def candidates(layers, actions):
+        for index in range(len(actions)):
+            yield layers, actions[:index] + actions[index + 1:]
+        for y, layer in enumerate(layers):
+            for i, row in enumerate(layer):
+                for j, character in enumerate(row):
+                    if character != " ":
+                        changed = [[list(row) for row in layer] for layer in layers]
+                        changed[y][i][j] = " "
+                        yield changed, actions
+        if len(layers) > 1:
+            for y in range(len(layers)):
+                yield layers[:y] + layers[y + 1:], actions
+        if len(layers[0]) > 1:
+            for i in range(len(layers[0])):
+                yield [layer[:i] + layer[i + 1:] for layer in layers], actions
+        if len(layers[0][0]) > 1:
+            for j in range(len(layers[0][0])):
+                yield [[row[:j] + row[j + 1:] for row in layer] for layer in layers], actions
+
+    smallest = divergence
+    shrinking = True
+    while shrinking:
+        shrinking = False
+        for candidate_layers, candidate_actions in candidates(layers, actions):
+            found = find_divergence(engine, *build(candidate_layers, candidate_actions))
+            if found:
+                layers = candidate_layers
+                actions = candidate_actions[:found.step]
+                smallest = found
+                shrinking = True
+                break
+    return smallest
+
+def fuzz_cases(engine_name: str, seed: int, first_case: int, count: int) -> tuple[int, Divergence]:
+    '''
+    This function runs a chunk of cases in a worker process, stopping at the first the engines disagree on
+
+    Args:
+        engine_name (str): the name of the engine being checked in ENGINES
+        seed (int): the seed of the whole run
+        first_case (int): the number of the first case in the chunk
+        count (int): the number of cases in the chunk
+
+    Returns:
+        tuple[int, Divergence]: the clicks checked and the minimized divergence with the case it came from, None if
+        the engines agreed on every case
+    '''
+    engine = ENGINES[engine_name]
+    steps = 0
+    for case in range(first_case, first_case + count):
+        level, actions = generate_case(seed, case)
+        divergence = find_divergence(engine, level, actions)
+        if divergence:
+            return steps + divergence.step, (case, divergence, minimize_divergence(engine, divergence))
+        steps += len(actions)
+    return steps, None
+
+def describe_boxes(description: tuple[tuple, bool]) -> list[str]:
+    '''
+    This function lists the boxes in a description by name, for reporting
+
+    Args:
+        description (tuple[tuple, bool]): the description from an engine
+
+    Returns:
+        list[str]: the color and cell of each box
+    '''
+    return [NAMES.get(code, str(code)) + " " + str(list(cell)) for code, *cell in description[0]]
+
+def report_divergence(engine_name: str, seed: int, case: int, original: Divergence, smallest: Divergence):
+    '''
+    This function prints the case two engines disagreed on and the smallest version of it found
+
+    Args:
+        engine_name (str): the name of the engine being checked
+        seed (int): the seed of the run
+        case (int): the number of the case
+        original (Divergence): the case as it was generated
+        smallest (Divergence): the minimized case
+
+    Returns:
+        None
+    '''
+    print("[fuzz]", engine_name, "disagreed with reference in case", case, "after", original.step, "of",
+          len(original.actions), "clicks, run it again with --seed", seed, "--case", case)
+    print("[fuzz] smallest case found:")
+    print("level =", smallest.level)
+    print("clicks =", smallest.actions)
+    expected = describe_boxes(smallest.expected)
+    found = describe_boxes(smallest.found)
+    print("[fuzz] only in reference:", [box for box in expected if box not in found])
+    print("[fuzz] only in", engine_name + ":", [box for box in found if box not in expected])
+    if smallest.expected[1] != smallest.found[1]:
+        print("[fuzz] reference won:", smallest.expected[1], engine_name, "won:", smallest.found[1])
+
+def run_fuzzer(engine_name: str, cases: int, seed: int, workers: int) -> bool:
+    '''
+    This function checks an engine against the reference on many cases across a process pool, reporting the first
+    case they disagree on. Chunks are collected in order, so a seed always reports the same case
+
+    Args:
+        engine_name (str): the name of the engine being checked in ENGINES
+        cases (int): the number of cases to run
+        seed (int): the seed of the run
+        workers (int): the number of worker processes
+
+    Returns:
+        bool: True if the engines agreed on every case, else returns False
+    '''
+    started = time.perf_counter()
+    steps = 0
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending = deque()
+        for first_case in range(0, cases, CHUNK_CASES):
+            pending.append(pool.submit(fuzz_cases, engine_name, seed, first_case, min(CHUNK_CASES, cases - first_case)))
+            # Only a few chunks are queued at once, so millions of cases don't all wait in memory. The last chunks
+            # are collected once every chunk is queued
+            while len(pending) >= 2 * workers or (pending and first_case + CHUNK_CASES >= cases):
+                chunk_steps, failure = pending.popleft().result()
+                steps += chunk_steps
+                if failure:
+                    pool.shutdown(cancel_futures=True)
+                    report_divergence(engine_name, seed, *failure)
+                    return False
+    elapsed = time.perf_counter() - started
+    print("[fuzz]", engine_name, "agreed with reference on", cases, "cases and", steps, "clicks in",
+          round(elapsed, 1), "seconds,", round(steps / elapsed), "clicks per second")
+    return True
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare a game engine against the game's own rules on random levels")
+    parser.add_argument("--engine", default="vector", choices=list(ENGINES), help="the engine being checked")
+    parser.add_argument("--cases", type=int, default=10000, help="random levels to play")
+    parser.add_argument("--seed", type=int, default=0, help="seed the levels and clicks are generated from")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="worker processes")
+    parser.add_argument("--case", type=int, help="run only this case, as reported by an earlier run")
+    arguments = parser.parse_args()
+    if arguments.case is not None:
+        steps, failure = fuzz_cases(arguments.engine, arguments.seed, arguments.case, 1)
+        if failure:
+            report_divergence(arguments.engine, arguments.seed, *failure)
+        else:
+            print("[fuzz]", arguments.engine, "agreed with reference on case", arguments.case)
+        sys.exit(1 if failure else 0)
+    sys.exit(0 if run_fuzzer(arguments.engine, arguments.cases, arguments.seed, arguments.workers) else 1)
@@ -0,0 +1,146 @@
+from __future__ import annotations
+import math as m
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass
+from startup import lazy_import
+
+np = lazy_import("numpy")
+raster = lazy_import("raster")
+
+@dataclass
+class GeometryBuffer:
+    # The projected geometry of one frame, worked out from a snapshot of the boxes so it can be built on another thread
+    boxes: list # The boxes in the snapshot, the base first
+    order: list[int] # Index of each box in the order they are drawn, furthest from the camera first
+    points: np.ndarray # (boxes, 8, 2) projected x and y of each corner
+    outlines: np.ndarray # (boxes, 6, 2) projected x and y of the corners around the outline of each box, in order
+
+@dataclass
+class GeometryWorker:
+    # Projects the boxes for the next frame on another thread while the current frame is drawn. NumPy lets go of the
+    # GIL while it works, so the two threads can run at the same time. There are two buffers, the front one being
+    # drawn from and the back one being filled, which are swapped at the start of each frame
+    executor: ThreadPoolExecutor
+    buffers: list[GeometryBuffer] # [front, back]
+    pending: Future # The job filling the back buffer, None if no snapshot has been given since the last swap
+
+def create_geometry_worker() -> GeometryWorker:
+    '''
+    This function starts a geometry worker with empty buffers
+
+    Args:
+        None
+
+    Returns:
+        GeometryWorker: the started worker
+    '''
+    buffers = [GeometryBuffer([], [], np.empty((0, 8, 2)), np.empty((0, 6, 2))) for _ in range(2)]
+    return GeometryWorker(ThreadPoolExecutor(max_workers=1, thread_name_prefix="geometry"), buffers, None)
+
+def get_render_order(centers: np.ndarray, angle: list[float]) -> list[int]:
+    '''
+    This function orders boxes from furthest to closest to the camera the same way calculate_render_order does,
+    sorting by one axis and breaking ties with the other depending on which way the world is turned. The base is
+    the first box, and is drawn first or last depending on whether the world is seen from above or below
+
+    Args:
+        centers (np.ndarray): (boxes, 3) x, y, and z center of each box, the base first
+        angle (list[float]): the current x, y, and z angle of all objects in the world
+
+    Returns:
+        list[int]: the index of each box in the order they are drawn
+    '''
+    turn = angle[1] % (m.pi * 2)
+    eighth = m.pi * 2 / 8
+    x = centers[1:, 0]
+    z = centers[1:, 2]
+    # Each pair is the axis sorted by, then the axis ties are broken with, negated to sort from largest to smallest
+    if eighth <= turn < eighth * 3:
+        keys = [x, z if turn > eighth * 2 else -z]
+    elif eighth * 3 <= turn < eighth * 5:
+        keys = [z, -x if turn > eighth * 4 else x]
+    elif eighth * 5 <= turn < eighth * 7:
+        keys = [-x, -z if turn > eighth * 6 else z]
+    else:
+        keys = [-z, x if turn < m.pi / 2 else -x]
+    # calculate_render_order puts each box in front of any boxes tied with it that were added before it
+    later_first = -np.arange(len(x))
+    order = (np.lexsort([later_first, keys[1], keys[0]]) + 1).tolist()
+
+    tilt = angle[0] % (m.pi * 2)
+    if tilt > m.pi and (turn <= m.pi / 2 or turn > m.pi * 3 / 2):
+        return order + [0]
+    if tilt < m.pi and m.pi / 2 < turn < m.pi * 3 / 2:
+        return order + [0]
+    return [0] + order
+
+def build_geometry(buffer: GeometryBuffer, boxes: list, centers: np.ndarray, sizes: np.ndarray, angle: list[float],
+                   scale: float, center: list[float]) -> GeometryBuffer:
+    '''
+    This function fills a buffer with the geometry of a snapshot of the boxes. It runs on the worker thread, so it
+    only uses the snapshot and never the boxes themselves
+
+    Args:
+        buffer (GeometryBuffer): the back buffer being filled
+        boxes (list): the boxes in the snapshot, the base first
+        centers (np.ndarray): (boxes, 3) x, y, and z center of each box
+        sizes (np.ndarray): (boxes, 3) x, y, and z size of each box
+        angle (list[float]): the x, y, and z angle of all objects in the world
+        scale (float): the scale for rendering
+        center (list[float]): the x and y center of the window
+
+    Returns:
+        GeometryBuffer: the filled buffer
+    '''
+    points, depth = raster.project_boxes(centers, sizes, angle, scale, center)
+    buffer.boxes = boxes
+    buffer.order = get_render_order(centers, angle)
+    buffer.points = points
+    # Every corner is on the outline except the nearest, shared by the 3 faces turned towards the camera, and the
+    # furthest, shared by the 3 turned away, which are both inside it. When fewer faces can be seen those corners
+    # land on the outline, so leaving them out changes nothing
+    outlines = np.take_along_axis(points, np.argsort(depth, axis=1)[:, 1:7, np.newaxis], axis=1)
+    offsets = outlines - points.mean(axis=1)[:, np.newaxis]
+    around = np.argsort(np.arctan2(offsets[:, :, 1], offsets[:, :, 0]), axis=1)
+    buffer.outlines = np.take_along_axis(outlines, around[:, :, np.newaxis], axis=1)
+    return buffer
+
+def submit_geometry(worker: GeometryWorker, boxes: list, centers: list[list[float]], sizes: list[list[float]],
+                    angle: list[float], scale: float, center: list[float]):
+    '''
+    This function gives the worker a snapshot of the boxes to build the next frame's geometry from. The snapshot is
+    copied, so the boxes can keep changing while the worker runs
+
+    Args:
+        worker (GeometryWorker): the geometry worker
+        boxes (list): the boxes, the base first
+        centers (list[list[float]]): the x, y, and z center of each box
+        sizes (list[list[float]]): the x, y, and z size of each box
+        angle (list[float]): the x, y, and z angle of all objects in the world
+        scale (float): the scale for rendering
+        center (list[float]): the x and y center of the window
+
+    Returns:
+        None
+    '''
+    if worker.pending:
+        worker.pending.result()
+    worker.pending = worker.executor.submit(build_geometry, worker.buffers[1], list(boxes), np.array(centers),
+                                            np.array(sizes), list(angle), scale, list(center))
+
+def swap_geometry(worker: GeometryWorker) -> GeometryBuffer:
+    '''
+    This function waits for the worker to finish the back buffer and swaps it to the front, at the start of a frame
+
+    Args:
+        worker (GeometryWorker): the geometry worker
+
+    Returns:
+        GeometryBuffer: the front buffer, None if no snapshot was given since the last swap
+    '''
+    if not worker.pending:
+        return None
+    worker.pending.result()
+    worker.pending = None
+    worker.buffers.reverse()
+    return worker.buffers[0]
@@ -0,0 +1,74 @@
+import math as m
+from startup import lazy_import
+
+np = lazy_import("numpy")
+
+# Numba is optional, without it the code the kernels replace is used instead
+try:
+    import numba
+except ImportError:
+    numba = None
+
+# Signs of each of a box's 8 corners from its center, in the same order as generate_points. A tuple so Numba can
+# use it as a constant
+CORNER_SIGNS = ((-1, -1, 1), (1, -1, 1), (1, 1, 1), (-1, 1, 1), (-1, -1, -1), (1, -1, -1), (1, 1, -1), (-1, 1, -1))
+
+def project_corners(center_x: float, center_y: float, center_z: float, size_x: float, size_y: float, size_z: float,
+                    angle_x: float, angle_y: float, angle_z: float, scale: float, screen_x: float,
+                    screen_y: float) -> np.ndarray:
+    '''
+    This function rotates and projects the 8 corners of a box the same way project_box does, written with only scalar
+    math so Numba can compile it
+
+    Args:
+        center_x (float): the x center of the box
+        center_y (float): the y center of the box
+        center_z (float): the z center of the box
+        size_x (float): the x size of the box
+        size_y (float): the y size of the box
+        size_z (float): the z size of the box
+        angle_x (float): the x angle of the world
+        angle_y (float): the y angle of the world
+        angle_z (float): the z angle of the world
+        scale (float): the scale for rendering
+        screen_x (float): the x center of the window
+        screen_y (float): the y center of the window
+
+    Returns:
+        np.ndarray: (8, 2) the projected x and y of each corner
+    '''
+    cos_x, sin_x = m.cos(angle_x), m.sin(angle_x)
+    cos_y, sin_y = m.cos(angle_y), m.sin(angle_y)
+    cos_z, sin_z = m.cos(angle_z), m.sin(angle_z)
+    projected = np.empty((8, 2))
+    for index in range(8):
+        x = center_x + CORNER_SIGNS[index][0] * size_x / 2
+        y = center_y + CORNER_SIGNS[index][1] * size_y / 2
+        z = center_z + CORNER_SIGNS[index][2] * size_z / 2
+        # Rotate about x, then y, then z, like multiplying by each rotation matrix in turn
+        y, z = cos_x * y - sin_x * z, sin_x * y + cos_x * z
+        x, z = cos_y * x + sin_y * z, -sin_y * x + cos_y * z
+        x, y = cos_z * x - sin_z * y, sin_z * x + cos_z * y
+        projected[index, 0] = x * scale + screen_x
+        projected[index, 1] = y * scale + screen_y
+    return projected
+
+def compile_kernel(kernel, check):
+    '''
+    This function compiles a kernel with Numba and checks that it gives the same results as the code it replaces.
+    Compiled kernels are cached on disk, so only the first run pays for compiling
+
+    Args:
+        kernel: the kernel written for Numba, like project_corners
+        check: a function given the compiled kernel that returns True if its results match
+
+    Returns:
+        the compiled kernel, None if Numba isn't installed or the results didn't match
+    '''
+    if numba is None:
+        return None
+    compiled = numba.njit(cache=True)(kernel)
+    if not check(compiled):
+        print("[kernels]", kernel.__name__, "gave different results when compiled, using Python instead")
+        return None
+    return compiled
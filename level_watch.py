@@ -0,0 +1,84 @@
+import os
+import time
+from dataclasses import dataclass
+from types import ModuleType
+from progress import get_level_key
+
+CHECK_INTERVAL = 0.5 # Seconds between checks of the level file
+
+@dataclass
+class LevelWatcher:
+    # Watches the file levels are defined in so edits show up without restarting the game
+    module: ModuleType # The module with the levels list, its globals are replaced when the file changes
+    modified: int # Modification time of the file in nanoseconds when it was last loaded
+    keys: list[str] # The hash of each level when the file was last loaded
+    next_check: float # perf_counter when the file is next checked
+
+def create_level_watcher(module: ModuleType) -> LevelWatcher:
+    '''
+    This function starts watching the file of a module of levels
+
+    Args:
+        module (ModuleType): the module with the levels list, like levels
+
+    Returns:
+        LevelWatcher: the created watcher
+    '''
+    return LevelWatcher(module, os.stat(module.__file__).st_mtime_ns, [get_level_key(level) for level in module.levels],
+                        time.perf_counter() + CHECK_INTERVAL)
+
+def load_level_file(path: str) -> dict:
+    '''
+    This function runs a level file in a new namespace, so a file that fails to load leaves the levels already loaded
+    untouched
+
+    Args:
+        path (str): the path of the level file
+
+    Returns:
+        dict: the globals of the file after running it
+    '''
+    with open(path) as file:
+        code = compile(file.read(), path, "exec")
+    namespace = {"__name__": "levels", "__file__": path}
+    exec(code, namespace)
+    return namespace
+
+def check_levels(watcher: LevelWatcher) -> list[int]:
+    '''
+    This function reloads the level file if it has been saved since it was last loaded, and finds the levels whose
+    contents changed. Levels are compared by hash, so only changed levels have to be set up again
+
+    Args:
+        watcher (LevelWatcher): the level watcher
+
+    Returns:
+        list[int]: the index of every level that changed, was added, or was removed
+    '''
+    now = time.perf_counter()
+    if now < watcher.next_check:
+        return []
+    watcher.next_check = now + CHECK_INTERVAL
+
+    path = watcher.module.__file__
+    modified = os.stat(path).st_mtime_ns
+    if modified == watcher.modified:
+        return []
+    watcher.modified = modified
+    try:
+        namespace = load_level_file(path)
+        keys = [get_level_key(level) for level in namespace["levels"]]
+    except Exception as error:
+        # Files are often saved half edited, the next save is tried again
+        print("[levels] could not reload", path + ":", repr(error))
+        return []
+
+    for name, value in namespace.items():
+        if not name.startswith("__"):
+            setattr(watcher.module, name, value)
+    changed = [index for index in range(max(len(keys), len(watcher.keys)))
+               if index >= len(keys) or index >= len(watcher.keys) or keys[index] != watcher.keys[index]]
+    watcher.keys = keys
+    if changed:
+        print("[levels] reloaded levels", [index + 1 for index in changed])
+    return changed
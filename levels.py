@@ -1,3 +1,4 @@
+# Each level is a 2d grid of rows, or a list of 2d grids, one for each layer from the bottom up
 levels = [
     [ #1
         [" ", " ", " ", " ", " ", " ", " ", " ", " "],
@@ -112,5 +113,5 @@ levels = [
 ]
 
 
-def change_level(level_number: int) -> [[str]]:
+def change_level(level_number: int) -> list:
     return levels[level_number]
\ No newline at end of file
@@ -0,0 +1,217 @@
+import atexit
+import gc
+import sys
+import tracemalloc
+import weakref
+import designer
+from collections import Counter
+from dataclasses import dataclass
+from functools import wraps
+
+CREATORS = ["text", "rectangle", "circle", "line", "shape", "image", "ellipse", "arc", "emoji"] # Wrapped functions
+TOP_ALLOCATIONS = 5 # Lines shown for each scene's memory growth
+
+@dataclass
+class ObjectTracker:
+    # Debug information about every DesignerObject created, used to find objects that outlive their scene. Scenes are
+    # labelled with their name and a count, so each time a scene is entered can be told apart
+    objects: dict[int, tuple[weakref.ref, str, str]] # {id: (object, scene label, creating function)}, not destroyed
+    labels: weakref.WeakKeyDictionary # {Scene: label} given the first time an object is created in a scene
+    next_name: str # Name of the scene being changed or pushed to
+    scene_count: int
+    ended: list[str] # Labels of scenes that were replaced or popped, checked for leaks at the next scene change
+    snapshots: dict[str, tracemalloc.Snapshot] # {label: snapshot} taken when each scene was first seen
+
+def create_object_tracker(first_scene: str) -> ObjectTracker:
+    '''
+    This function creates an object tracker and starts tracing memory allocations. Live objects are reported when
+    the game closes
+
+    Args:
+        first_scene (str): the name of the scene the game starts in
+
+    Returns:
+        ObjectTracker: the created tracker
+    '''
+    tracemalloc.start()
+    tracker = ObjectTracker({}, weakref.WeakKeyDictionary(), first_scene, 0, [], {})
+    atexit.register(report_live_objects, tracker)
+    return tracker
+
+def get_scene_label(tracker: ObjectTracker) -> str:
+    '''
+    This function finds the label of the scene currently running, labelling it if it is new
+
+    Args:
+        tracker (ObjectTracker): the object tracker
+
+    Returns:
+        str: the label of the current scene
+    '''
+    director = designer.GLOBAL_DIRECTOR
+    if director is None or not director._scenes:
+        return tracker.next_name + "#0"
+    scene = director._scenes[-1]
+    if scene not in tracker.labels:
+        tracker.scene_count += 1
+        label = tracker.next_name + "#" + str(tracker.scene_count)
+        tracker.labels[scene] = label
+        tracker.snapshots[label] = tracemalloc.take_snapshot()
+    return tracker.labels[scene]
+
+def wrap_creator(tracker: ObjectTracker, function):
+    '''
+    This function wraps a Designer function that creates objects so every object it creates is tracked along with
+    its scene and the function that created it
+
+    Args:
+        tracker (ObjectTracker): the object tracker
+        function: the Designer function, like text or circle
+
+    Returns:
+        the wrapped function
+    '''
+    @wraps(function)
+    def create(*args, **kwargs):
+        created = function(*args, **kwargs)
+        tracker.objects[id(created)] = (weakref.ref(created), get_scene_label(tracker),
+                                        sys._getframe(1).f_code.co_name)
+        return created
+    return create
+
+def wrap_destroy(tracker: ObjectTracker, function):
+    '''
+    This function wraps Designer's destroy so destroyed objects stop being tracked
+
+    Args:
+        tracker (ObjectTracker): the object tracker
+        function: Designer's destroy function
+
+    Returns:
+        the wrapped function
+    '''
+    @wraps(function)
+    def destroy(*objects):
+        for destroyed in objects:
+            tracker.objects.pop(id(destroyed), None)
+        return function(*objects)
+    return destroy
+
+def wrap_scene_change(tracker: ObjectTracker, function, ends_scene: bool):
+    '''
+    This function wraps change_scene, push_scene, or pop_scene. Scenes that ended at an earlier change are checked
+    for leaks, since Designer only drops a scene's objects after the change finishes
+
+    Args:
+        tracker (ObjectTracker): the object tracker
+        function: the Designer function changing scenes
+        ends_scene (bool): True if the current scene is removed, as with change_scene and pop_scene
+
+    Returns:
+        the wrapped function
+    '''
+    @wraps(function)
+    def change(*args, **kwargs):
+        report_leaks(tracker)
+        label = get_scene_label(tracker)
+        report_memory(tracker, label)
+        if ends_scene:
+            tracker.ended.append(label)
+        if args:
+            tracker.next_name = args[0]
+        return function(*args, **kwargs)
+    return change
+
+def track_namespace(tracker: ObjectTracker, namespace: dict):
+    '''
+    This function replaces the Designer functions in a module's namespace with tracked versions. It only affects
+    names looked up after it is called, so it must run before the game starts
+
+    Args:
+        tracker (ObjectTracker): the object tracker
+        namespace (dict): the globals of a module that imported functions from designer
+
+    Returns:
+        None
+    '''
+    for name in CREATORS:
+        if name in namespace:
+            namespace[name] = wrap_creator(tracker, namespace[name])
+    if "destroy" in namespace:
+        namespace["destroy"] = wrap_destroy(tracker, namespace["destroy"])
+    for name, ends_scene in [("change_scene", True), ("pop_scene", True), ("push_scene", False)]:
+        if name in namespace:
+            namespace[name] = wrap_scene_change(tracker, namespace[name], ends_scene)
+
+def count_live_objects(tracker: ObjectTracker) -> Counter:
+    '''
+    This function counts the tracked objects still in memory, dropping any that have been garbage collected
+
+    Args:
+        tracker (ObjectTracker): the object tracker
+
+    Returns:
+        Counter: {(scene label, creating function): number of live objects}
+    '''
+    gc.collect()
+    for key in [key for key, (reference, _, _) in tracker.objects.items() if reference() is None]:
+        del tracker.objects[key]
+    return Counter((scene, creator) for _, scene, creator in tracker.objects.values())
+
+def report_leaks(tracker: ObjectTracker):
+    '''
+    This function prints the objects of ended scenes that are still in memory, grouped by the function that created
+    them
+
+    Args:
+        tracker (ObjectTracker): the object tracker
+
+    Returns:
+        None
+    '''
+    if not tracker.ended:
+        return
+    live = count_live_objects(tracker)
+    kept = set(tracker.labels.values())
+    for label in tracker.ended:
+        # Scenes kept for reuse still own their objects
+        if label in kept:
+            print("[objects]", label, "was kept for reuse")
+            continue
+        leaked = {creator: count for (scene, creator), count in live.items() if scene == label}
+        if leaked:
+            print("[objects]", label, "ended with", sum(leaked.values()), "objects still alive:", leaked)
+        else:
+            print("[objects]", label, "ended with no objects still alive")
+    tracker.ended.clear()
+
+def report_memory(tracker: ObjectTracker, label: str):
+    '''
+    This function prints where memory grew the most since a scene was first seen
+
+    Args:
+        tracker (ObjectTracker): the object tracker
+        label (str): the label of the scene
+
+    Returns:
+        None
+    '''
+    if label not in tracker.snapshots:
+        return
+    growth = tracemalloc.take_snapshot().compare_to(tracker.snapshots.pop(label), 'lineno')
+    print("[memory]", label, "grew by", sum(stat.size_diff for stat in growth), "bytes")
+    for stat in growth[:TOP_ALLOCATIONS]:
+        print("[memory]    ", stat)
+
+def report_live_objects(tracker: ObjectTracker):
+    '''
+    This function prints every tracked object still in memory, grouped by scene and creating function
+
+    Args:
+        tracker (ObjectTracker): the object tracker
+
+    Returns:
+        None
+    '''
+    for (scene, creator), count in sorted(count_live_objects(tracker).items()):
+        print("[objects]", scene, creator, count)
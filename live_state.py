@@ -0,0 +1,259 @@
+import argparse
+import time
+from dataclasses import dataclass
+from multiprocessing import resource_tracker, shared_memory
+import numpy as np
+
+STATE_NAME = "growth_matrix_state" # Name of the shared memory block the game publishes its state in
+MAX_BOXES = 8192 # Most boxes published, boxes past this are left out and counted in the header
+PHASES = ["pan", "render", "scaling", "buttons", "draw"] # Parts of a frame timed, draw being Designer drawing the last
+COLORS = ["red", "white", "blue", "purple", "green"] # Colors by the code they are published as
+READ_ATTEMPTS = 100 # Times a reader tries to read a frame before giving up, if the game keeps writing over it
+# Everything but the boxes, the sequence first. It is odd while the game is writing a frame and even once the frame
+# is written, so readers can tell if a frame changed while they read it without either side locking
+HEADER = np.dtype([("sequence", "u8"), ("frame", "u8"), ("count", "i4"), ("total", "i4"), ("is_scaling", "i4"),
+                   ("scaled", "i4"), ("previous", "i4"), ("substeps", "i4"), ("angle", "f8", 3),
+                   ("timings", "f8", len(PHASES))], align=True)
+
+@dataclass
+class StateBlock:
+    # A shared memory block the world's state is published in, mapped as arrays so nothing is pickled
+    memory: shared_memory.SharedMemory
+    header: np.ndarray # One HEADER record
+    positions: np.ndarray # (MAX_BOXES, 3) x, y, and z center of each box in substeps
+    sizes: np.ndarray # (MAX_BOXES, 3) x, y, and z size of each box in substeps
+    colors: np.ndarray # (MAX_BOXES) index of each box's color in COLORS
+
+@dataclass
+class LiveState:
+    # A copy of one frame of the world's state, read from a state block
+    frame: int # Frames published since the game started
+    total: int # Boxes in the world, more than are in positions if there were more than MAX_BOXES
+    is_scaling: bool
+    scaled: int # Index of the scaled up red box, -1 if there isn't one
+    previous: int # Index of the previously scaled up red box, -1 if there isn't one
+    angle: list[float] # [x, y, z]
+    timings: dict[str, float] # {phase: seconds}
+    positions: np.ndarray # (boxes, 3) x, y, and z center of each box in cells
+    sizes: np.ndarray # (boxes, 3) x, y, and z size of each box in cells
+    colors: list[str]
+
+def map_state_block(memory: shared_memory.SharedMemory, writeable: bool) -> StateBlock:
+    '''
+    This function lays the header and box arrays over a shared memory block
+
+    Args:
+        memory (shared_memory.SharedMemory): the shared memory block
+        writeable (bool): False to map it for reading only, like an inspector does
+
+    Returns:
+        StateBlock: the mapped block
+    '''
+    arrays = []
+    offset = 0
+    layout = [(HEADER, (1,)), (np.int32, (MAX_BOXES, 3)), (np.int32, (MAX_BOXES, 3)), (np.uint8, (MAX_BOXES,))]
+    for dtype, shape in layout:
+        array = np.ndarray(shape, dtype, memory.buf, offset)
+        array.flags.writeable = writeable
+        arrays.append(array)
+        offset += array.nbytes
+    return StateBlock(memory, *arrays)
+
+def get_block_size() -> int:
+    '''
+    This function calculates the size of a state block in bytes
+
+    Args:
+        None
+
+    Returns:
+        int: the size of the header and box arrays
+    '''
+    return HEADER.itemsize + MAX_BOXES * (3 * 4 + 3 * 4 + 1)
+
+def create_state_block(name: str, substeps: int) -> StateBlock:
+    '''
+    This function creates the shared memory block the game publishes its state in. A block left behind by a game that
+    crashed is replaced
+
+    Args:
+        name (str): the name of the block
+        substeps (int): substeps per cell, so readers can convert positions and sizes to cells
+
+    Returns:
+        StateBlock: the created block
+    '''
+    try:
+        memory = shared_memory.SharedMemory(name, create=True, size=get_block_size())
+    except FileExistsError:
+        old = shared_memory.SharedMemory(name)
+        old.close()
+        old.unlink()
+        memory = shared_memory.SharedMemory(name, create=True, size=get_block_size())
+    block = map_state_block(memory, True)
+    block.header[0]["substeps"] = substeps
+    block.header[0]["scaled"] = -1
+    block.header[0]["previous"] = -1
+    return block
+
+def publish_state(block: StateBlock, positions: list[list[int]], sizes: list[list[int]], colors: list[str],
+                  angle: list[float], is_scaling: bool, scaled: int, previous: int, timings: list[float]):
+    '''
+    This function writes one frame of the world's state into the state block
+
+    Args:
+        block (StateBlock): the state block
+        positions (list[list[int]]): the x, y, and z center of each box in substeps
+        sizes (list[list[int]]): the x, y, and z size of each box in substeps
+        colors (list[str]): the color of each box, one of COLORS
+        angle (list[float]): the x, y, and z angle of the world
+        is_scaling (bool): True if a red box is growing
+        scaled (int): the index of the scaled up red box, -1 if there isn't one
+        previous (int): the index of the previously scaled up red box, -1 if there isn't one
+        timings (list[float]): the seconds spent on each of PHASES
+
+    Returns:
+        None
+    '''
+    header = block.header[0]
+    count = min(len(positions), MAX_BOXES)
+    header["sequence"] += 1
+    header["frame"] += 1
+    header["count"] = count
+    header["total"] = len(positions)
+    header["is_scaling"] = is_scaling
+    header["scaled"] = scaled
+    header["previous"] = previous
+    header["angle"] = angle
+    header["timings"] = timings
+    if count:
+        block.positions[:count] = positions[:count]
+        block.sizes[:count] = sizes[:count]
+        block.colors[:count] = [COLORS.index(color) for color in colors[:count]]
+    header["sequence"] += 1
+
+def close_state_block(block: StateBlock):
+    '''
+    This function removes the state block when the game closes
+
+    Args:
+        block (StateBlock): the state block
+
+    Returns:
+        None
+    '''
+    memory = block.memory
+    # The arrays point into the block, so they are let go of first or it can't be closed
+    block.header = block.positions = block.sizes = block.colors = None
+    memory.close()
+    memory.unlink()
+
+def attach_state_block(name: str) -> StateBlock:
+    '''
+    This function opens the state block of a running game for reading only
+
+    Args:
+        name (str): the name of the block
+
+    Returns:
+        StateBlock: the block, mapped so it can't be written to
+    '''
+    memory = shared_memory.SharedMemory(name)
+    # Python removes every block it opens when the process ends, even ones it didn't create, which would pull the block
+    # out from under the game
+    resource_tracker.unregister(memory._name, "shared_memory")
+    return map_state_block(memory, False)
+
+def read_state(block: StateBlock) -> LiveState:
+    '''
+    This function copies the latest frame out of a state block, reading it again if the game wrote over it meanwhile
+
+    Args:
+        block (StateBlock): the state block
+
+    Returns:
+        LiveState: the copied frame, None if the game kept writing over it
+    '''
+    for _ in range(READ_ATTEMPTS):
+        sequence = int(block.header[0]["sequence"])
+        if sequence % 2:
+            continue
+        header = block.header[0].copy()
+        count = int(header["count"])
+        positions = block.positions[:count].copy()
+        sizes = block.sizes[:count].copy()
+        colors = block.colors[:count].copy()
+        if int(block.header[0]["sequence"]) != sequence:
+            continue
+        substeps = int(header["substeps"]) or 1
+        return LiveState(int(header["frame"]), int(header["total"]), bool(header["is_scaling"]),
+                         int(header["scaled"]), int(header["previous"]), header["angle"].tolist(),
+                         dict(zip(PHASES, header["timings"].tolist())), positions / substeps, sizes / substeps,
+                         [COLORS[code] for code in colors])
+    return None
+
+def print_state(state: LiveState, frames_per_second: float, boxes: bool):
+    '''
+    This function prints a frame of the world's state
+
+    Args:
+        state (LiveState): the frame
+        frames_per_second (float): frames the game published per second since the last frame printed
+        boxes (bool): True to list every box too
+
+    Returns:
+        None
+    '''
+    timings = ", ".join(phase + " " + str(round(seconds * 1000, 2)) + "ms" for phase, seconds in state.timings.items())
+    print("[inspect] frame", state.frame, "at", round(frames_per_second, 1), "fps,", state.total, "boxes, angle",
+          [round(angle, 2) for angle in state.angle], "scaling" if state.is_scaling else "resting", "scaled up",
+          state.scaled, "previously", state.previous)
+    print("[inspect]", timings)
+    if boxes:
+        for index, color in enumerate(state.colors):
+            print("   ", index, color, "at", state.positions[index].tolist(), "size", state.sizes[index].tolist())
+
+def run_inspector(name: str, interval: float, boxes: bool, once: bool):
+    '''
+    This function attaches to a running game's state block and prints its state until stopped
+
+    Args:
+        name (str): the name of the block
+        interval (float): seconds between prints
+        boxes (bool): True to list every box too
+        once (bool): True to print one frame and stop
+
+    Returns:
+        None
+    '''
+    block = attach_state_block(name)
+    last = None
+    try:
+        while True:
+            state = read_state(block)
+            if state:
+                frames_per_second = 0.0
+                if last:
+                    frames_per_second = (state.frame - last[0]) / (time.perf_counter() - last[1])
+                print_state(state, frames_per_second, boxes)
+                last = [state.frame, time.perf_counter()]
+            if once:
+                return
+            time.sleep(interval)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        block.header = block.positions = block.sizes = block.colors = None
+        block.memory.close()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Watch the state of a game run with --export-state")
+    parser.add_argument("--name", default=STATE_NAME, help="name of the shared memory block")
+    parser.add_argument("--interval", type=float, default=1.0, help="seconds between prints")
+    parser.add_argument("--boxes", action="store_true", help="list every box")
+    parser.add_argument("--once", action="store_true", help="print one frame and stop")
+    arguments = parser.parse_args()
+    try:
+        run_inspector(arguments.name, arguments.interval, arguments.boxes, arguments.once)
+    except FileNotFoundError:
+        print("[inspect] no game is publishing", arguments.name + ", start it with --export-state")
@@ -1,22 +1,59 @@
+from __future__ import annotations
+import sys
+from startup import start_import_timer, report_import_times, import_deferring, lazy_import
+
+# Checked before anything else is imported so every import is timed
+IMPORT_TIMES = "--import-times" in sys.argv # Report how long each module took to import and the first frame took
+if IMPORT_TIMES:
+    import_timer = start_import_timer()
+
+# pygame imports numpy and pkg_resources when it is imported, but the menus don't need them, so they are imported
+# the first time they are used instead
+import_deferring(["numpy", "pkg_resources"], "designer")
 from designer import *
-import numpy as np
+import atexit
 import math as m
+import os
+import time
 from dataclasses import dataclass
-from levels import change_level
+from functools import cache
+from broadphase import Broadphase, create_broadphase, add_item, update_item, query_region
+from voxels import (VoxelGrid, get_voxel, set_voxel, occupied_voxels, drop_cell, parse_level, get_layers, get_level_size,
+                    EMPTY, RED, WHITE, BLUE)
+from deadlock import DeadlockTable, create_deadlock_table, is_deadlocked
+from static_mesh import StaticMesh, StaticParts, compile_static_mesh, BOX_FACES, BOX_LINES
+from thumbnails import create_thumbnail_cache, request_thumbnail, check_thumbnail_failed, create_thumbnail_image
+from lifecycle import create_object_tracker, track_namespace
+from scene_cache import create_scene_cache
+from progress import (load_progress_store, close_progress_store, get_level_key, get_level_stats, record_attempt,
+                      record_completion)
+from level_watch import create_level_watcher, check_levels
+from geometry import create_geometry_worker, submit_geometry, swap_geometry
+from outcomes import (ActivationOutcome, create_outcome_cache, find_outcome, store_outcome, report_outcome_cache,
+                      OUTCOME_CACHE_SIZE)
+from quality import (create_quality_controller, update_quality, get_box_detail, get_silhouette, FULL, OUTLINED,
+                     SILHOUETTES)
+np = lazy_import("numpy")
+raster = lazy_import("raster")
+kernels = lazy_import("kernels")
+levels = lazy_import("levels")
+live_state = lazy_import("live_state")
+state_stream = lazy_import("state_stream")
 
 @dataclass
 class Box:
     # Represents a box in 3d space, comprised of both data and DesignerObjects
     color: str
-    size: list[float] # [x,y,z]
-    center: list[float] # [x,y,z]
+    size: list[int] # [x,y,z] in substeps
+    cell: list[int] # [x,y,z] logical grid cell
+    offset: list[int] # [x,y,z] animation offset from the cell in substeps
     points: list[list[float]] # [[x,y,z]]
     projected_points: list[list[float]] # [[x,y]]
     vertices: list[DesignerObject]
     lines: list[DesignerObject]
     faces: list[DesignerObject]
     is_moving: bool
-    movement: list[float] # [x,y,z]
+    movement: list[int] # [x,y,z] in substeps per frame
 
 @dataclass
 class Button:
@@ -31,6 +68,9 @@ class World:
     # Contains all information about the 3d world at a given time
     base: Box
     boxes: list[list[Box]] # [[Red], [White], [Blue], [Green]]
+    cell_index: dict[tuple[int, int, int], Box] # Resting red, white, and blue boxes by cell
+    voxels: VoxelGrid # Codes of the resting red, white, and blue boxes by cell
+    broadphase: Broadphase # Bounding boxes of all red, white, and blue boxes
     box_render_order: list[Box]
     angle: list[float] # [x, y, z]
     pan_pos: list[int]
@@ -39,7 +79,19 @@ class World:
     scaled_up_red_box: Box
     previously_scaled_up_red_box: Box
     is_scaling: bool
+    scale_directions: list[bool] # [x,y,z] directions the scaled up red box is growing in
+    deadlocks: DeadlockTable # Cells blue boxes can still reach the green boxes from
+    static_mesh: StaticMesh # The white boxes merged and trimmed to what can be seen, compiled once as they never move
+    is_stuck: bool
+    level_key: str # Hash of the level, used to save progress on it
+    moves: int # Red boxes grown since the level was opened
+    start_time: float # perf_counter when the level was opened
+    frame: raster.RasterFrame # Image all boxes are drawn into when using the raster backend, else None
     buttons: list[Button]
+    outcome: ActivationOutcome # Outcome of the red box growing, replayed if it was cached, else recorded as it grows
+    outcome_key: tuple # Key the outcome of the red box growing is cached under
+    is_replaying: bool # True if the outcome was cached and is being replayed
+    scaling_frame: int # Frames the red box has been growing for
 
 @dataclass
 class MainMenu:
@@ -67,26 +119,52 @@ class LevelMenu:
     title: DesignerObject
     title_background: DesignerObject
     title_border: DesignerObject
-    level_buttons: list[Button]
+    level_buttons: list[Button] # One button for each slot on a page, reused for the levels of every page
+    thumbnails: list[DesignerObject] # Preview above each slot's button, None until it has been drawn
+    thumbnail_levels: list[str] # Key of the level each preview shows, so previews of changed levels are redrawn
+    page: int # The page of levels shown
+    page_text: DesignerObject
+    hovered: int # The slot of the level button under the mouse last frame, None if there wasn't one
+    previous_button: Button
+    next_button: Button
     back_button: Button
 
 # Constants
-TOTAL_LEVELS = 10
 CENTER = [get_width()/2, get_height()/2]
 SCALE = 50.0 # Scale for rendering
-SCALE_MAX = 3.0 # Max size of red boxes
-SCALE_SPEED = 0.2 # Scale speed of red boxes
-
-PROJECTION_MATRIX = np.matrix([
-    [1, 0, 0],
-    [0, 1, 0]
-])
+SUBSTEPS = 10 # Animation substeps per grid cell, sizes and offsets are stored in substeps so they stay exact
+SCALE_MAX = 3 * SUBSTEPS # Max size of red boxes in substeps
+SCALE_SPEED = 2 # Scale speed of red boxes in substeps per frame
+FLOOR = 0 # Lowest layer boxes can rest on, the base is the layer below it
+VOXEL_CODES = {"red": RED, "white": WHITE, "blue": BLUE, "purple": BLUE} # Voxel code of each box color
+RASTER_RENDERING = "--raster" in sys.argv # Draw all boxes into one image instead of DesignerObjects for each box
+OBJECT_TRACKING = "--track-objects" in sys.argv # Report DesignerObjects that outlive their scene and memory growth
+MENU_SCENES = ['main_menu', 'instructions_menu', 'level_menu'] # Scenes built once and reused when changed back to
+LEVEL_WATCHING = "--watch-levels" in sys.argv # Reload levels.py when it is saved, rebuilding the open level if it changed
+GEOMETRY_WORKER = "--geometry-worker" in sys.argv # Project boxes for the next frame on another thread while drawing
+STATE_EXPORT = "--export-state" in sys.argv # Publish the world's state each frame for live_state.py to inspect
+# Path of the file or Unix socket each frame's changes are streamed to for state_stream.py to play, else None
+STATE_STREAM = sys.argv[sys.argv.index("--stream-state") + 1] if "--stream-state" in sys.argv else None
+OUTCOME_STATS = "--outcome-stats" in sys.argv # Report how often activation outcomes were found in the cache on exit
+TARGET_FPS = 30 # Frame rate the detail boxes are drawn with is lowered to keep, Designer's frame rate
+LEVEL_COLUMNS = 8 # Level buttons in each row of a level menu page
+LEVEL_ROWS = 3 # Rows of level buttons on a level menu page
+LEVEL_CELL = [90, 110] # Width and height of the space each level's button and preview take up on the level menu
+LEVEL_GRID_TOP = 170 # Top of the grid of level buttons on the level menu
 
 # Global variables persist between world resets when loading levels
 level_number = 0
-completed_levels = []
-for i in range(0, TOTAL_LEVELS):
-    completed_levels.append(False)
+level_keys = {} # {level number: key} of the levels hashed so far
+# The thumbnail cache and progress store are only opened when the game is run, so importing the game's rules, like
+# fuzz.py does, never writes to the player's saved progress
+thumbnail_cache = None
+progress_store = None
+quality_controller = create_quality_controller(TARGET_FPS) # Kept between levels as it depends on the computer
+state_block = None # Shared memory the world's state is published in, created the first time a level is played
+stream = None # Stream the changes to the world are written to, opened the first time a level is played
+outcome_cache = create_outcome_cache(OUTCOME_CACHE_SIZE) # Kept between levels so resetting one replays its outcomes
+if GEOMETRY_WORKER:
+    geometry_worker = create_geometry_worker()
 
 def create_button(message: str, x: int, y: int, color: str) -> Button:
     '''
@@ -101,13 +179,76 @@ def create_button(message: str, x: int, y: int, color: str) -> Button:
     Returns:
         Button: a button instance based on the arguments
     '''
+    # The rectangles are created before the text so they are drawn under it, then sized to fit it
+    border = rectangle("white", 1, 1, x, y)
+    background = rectangle(color, 1, 1, x, y)
+    button_text = text("black", message, 20, x, y)
+    button = Button(background, border, button_text, color)
+    fit_button(button)
+    return button
+
+def fit_button(button: Button):
+    '''
+    This function sizes the border and background of a button to fit its text
+
+    Args:
+        button (Button): the button to be sized
+
+    Returns:
+        None
+    '''
     x_padding = 4
     y_padding = 2
-    button_text = text("black", message, 20, x, y)
-    border = rectangle("white", button_text.width + 2 * x_padding, button_text.height + 2 * y_padding, x, y)
-    background = rectangle(color, button_text.width + x_padding, button_text.height + y_padding, x, y)
-    button_text = text("black", message, 20, x, y)
-    return Button(background, border, button_text, color)
+    button.border.size = [button.text.width + 2 * x_padding, button.text.height + 2 * y_padding]
+    button.background.size = [button.text.width + x_padding, button.text.height + y_padding]
+
+def set_button_text(button: Button, message: str):
+    '''
+    This function changes the text on a button and resizes it to fit
+
+    Args:
+        button (Button): the button to be changed
+        message (str): the new text on the button
+
+    Returns:
+        None
+    '''
+    button.text.text = message
+    fit_button(button)
+
+def create_title(message: str) -> tuple[DesignerObject, DesignerObject, DesignerObject]:
+    '''
+    This function creates the bordered title at the top of a menu
+
+    Args:
+        message (str): the text of the title
+
+    Returns:
+        tuple[DesignerObject, DesignerObject, DesignerObject]: the border, background, and text of the title
+    '''
+    # The rectangles are created before the text so they are drawn under it, then sized to fit it
+    title_border = rectangle("white", 1, 1, CENTER[0], CENTER[1] / 3)
+    title_background = rectangle("lightslategray", 1, 1, CENTER[0], CENTER[1] / 3)
+    title = text("black", message, 50, CENTER[0], CENTER[1] / 3)
+    fit_title(title_border, title_background, title)
+    return title_border, title_background, title
+
+def fit_title(title_border: DesignerObject, title_background: DesignerObject, title: DesignerObject):
+    '''
+    This function sizes the border and background of a title to fit its text
+
+    Args:
+        title_border (DesignerObject): the border of the title
+        title_background (DesignerObject): the background of the title
+        title (DesignerObject): the text of the title
+
+    Returns:
+        None
+    '''
+    x_padding = 10
+    y_padding = 10
+    title_border.size = [title.width + 2 * x_padding, title.height + 2 * y_padding]
+    title_background.size = [title.width + x_padding, title.height + y_padding]
 
 def button_hover(button: Button) -> bool:
     '''
@@ -151,6 +292,23 @@ def check_game_button_press(world: World):
                     # Reset Button
                     change_scene('game')
 
+@cache
+def get_projection_matrix() -> np.matrix:
+    '''
+    This function creates the matrix converting 3d coordinates to 2d ones. It is only created once it is first used,
+    so NumPy isn't imported until a level is opened
+
+    Args:
+        None
+
+    Returns:
+        np.matrix: the 2x3 projection matrix
+    '''
+    return np.matrix([
+        [1, 0, 0],
+        [0, 1, 0]
+    ])
+
 def generate_points(size: list[float], position: list[float]) -> list[[]]:
     '''
     This function generates a set of 3d coordinates representing the 8 vertices of a box
@@ -196,7 +354,114 @@ def scale_points(box: Box, scale: list[float]):
     box.size[0] += scale[0]
     box.size[1] += scale[1]
     box.size[2] += scale[2]
-    box.center[1] -= scale[1]/2
+    box.offset[1] -= scale[1] // 2
+
+def get_position(box: Box) -> list[int]:
+    '''
+    This function calculates the exact position of a box's center in substeps from its cell and animation offset
+
+    Args:
+        box (Box): the box whose position is calculated
+
+    Returns:
+        list[int]: the x, y, and z position of the box in substeps
+    '''
+    return [box.cell[0] * SUBSTEPS + box.offset[0], box.cell[1] * SUBSTEPS + box.offset[1],
+            box.cell[2] * SUBSTEPS + box.offset[2]]
+
+def get_center(box: Box) -> list[float]:
+    '''
+    This function calculates the center of a box in world units, used only for rendering
+
+    Args:
+        box (Box): the box whose center is calculated
+
+    Returns:
+        list[float]: the x, y, and z center of the box
+    '''
+    return [coordinate / SUBSTEPS for coordinate in get_position(box)]
+
+def get_rounded_cell(box: Box) -> list[int]:
+    '''
+    This function calculates the cell closest to a box that may be partway through moving
+
+    Args:
+        box (Box): the box whose closest cell is calculated
+
+    Returns:
+        list[int]: the x, y, and z cell the box is closest to
+    '''
+    return [round(coordinate / SUBSTEPS) for coordinate in get_position(box)]
+
+def index_box(world: World, box: Box):
+    '''
+    This function records a resting box in the world's cell index and voxel grid so it can be looked up by cell
+
+    Args:
+        world (World): the current world data
+        box (Box): the box to be indexed
+
+    Returns:
+        None
+    '''
+    world.cell_index[tuple(box.cell)] = box
+    set_voxel(world.voxels, box.cell, VOXEL_CODES[box.color])
+
+def unindex_box(world: World, box: Box):
+    '''
+    This function removes a box from the world's cell index and voxel grid when it starts moving
+
+    Args:
+        world (World): the current world data
+        box (Box): the box to be removed from the index
+
+    Returns:
+        None
+    '''
+    if world.cell_index.get(tuple(box.cell)) is box:
+        del world.cell_index[tuple(box.cell)]
+        set_voxel(world.voxels, box.cell, EMPTY)
+
+def get_bounds(box: Box) -> list[list[int]]:
+    '''
+    This function calculates the axis aligned bounding box of a box in substeps
+
+    Args:
+        box (Box): the box whose bounding box is calculated
+
+    Returns:
+        list[list[int]]: the x, y, and z minimum corner and the x, y, and z maximum corner of the box
+    '''
+    position = get_position(box)
+    return [[position[axis] - box.size[axis] // 2 for axis in range(3)],
+            [position[axis] + box.size[axis] // 2 for axis in range(3)]]
+
+def get_cell_bounds(cell: list[int]) -> list[list[int]]:
+    '''
+    This function calculates the axis aligned bounding box of a single grid cell in substeps
+
+    Args:
+        cell (list[int]): the x, y, and z cell whose bounding box is calculated
+
+    Returns:
+        list[list[int]]: the x, y, and z minimum corner and the x, y, and z maximum corner of the cell
+    '''
+    return [[coordinate * SUBSTEPS - SUBSTEPS // 2 for coordinate in cell],
+            [coordinate * SUBSTEPS + SUBSTEPS // 2 for coordinate in cell]]
+
+def track_box(world: World, box: Box):
+    '''
+    This function updates a box's bounding box in the world's broadphase after it has moved or been scaled
+
+    Args:
+        world (World): the current world data
+        box (Box): the box that moved or was scaled
+
+    Returns:
+        None
+    '''
+    low, high = get_bounds(box)
+    update_item(world.broadphase, box, low, high)
 
 def create_line(i: int, j: int, points: list[[]]) -> DesignerObject:
     '''
@@ -233,13 +498,27 @@ def create_face(color: str, i: int, j: int, k: int, l: int, points: list[[]]) ->
     return shape(color, [points[i][0], points[i][1], points[j][0], points[j][1], points[k][0], points[k][1],
                          points[l][0], points[l][1]], absolute=True, anchor='topleft')
 
-def create_box(size: list[float], position: list[float], type: str) -> Box:
+def create_silhouette(color: str, outline: list[[]]) -> DesignerObject:
+    '''
+    This function draws a single flat shape in the viewport covering a whole box, used instead of its 6 faces as
+    they are all the same color
+
+    Args:
+        color (str): the color of the box
+        outline (list[[]]): the list of 2d coordinates around the outline of a projected cube, in order
+
+    Returns:
+        DesignerObject: The shape object covering the projected cube
+    '''
+    return shape(color, [coordinate for point in outline for coordinate in point], absolute=True, anchor='topleft')
+
+def create_box(size: list[int], cell: list[int], type: str) -> Box:
     '''
     This function generates a box object of the given size, position, and type
 
     Args:
-        size (list[float]): a list containing the x, y, and z sizes of the box
-        position (list[float]): a list containing the x, y, and z positions of the box
+        size (list[int]): a list containing the x, y, and z sizes of the box in cells
+        cell (list[int]): a list containing the x, y, and z cell of the box
         type (str): can be either "base", "white", "red", "blue", or "green", which correspond to the color and
         behavior of the box
 
@@ -256,12 +535,17 @@ def create_box(size: list[float], position: list[float], type: str) -> Box:
     if type == "base":
         type = "white"
 
-    points = generate_points(size, position)
+    points = generate_points(size, cell)
+
+    # The raster backend draws boxes straight from their data, so they have no DesignerObjects
+    if RASTER_RENDERING:
+        return Box(type, [size[0] * SUBSTEPS, size[1] * SUBSTEPS, size[2] * SUBSTEPS], list(cell), [0, 0, 0], points,
+                   projected_points, vertices, lines, faces, False, [0, 0, 0])
 
     for point in points:
         # @ is the matrix multiplication operator
         # Use transpose to change point from 1x3 to 3x1 matrix to make multiplication with 2d matrix compatible
-        projected2d = PROJECTION_MATRIX @ point.transpose()
+        projected2d = get_projection_matrix() @ point.transpose()
 
         # Set x and y to projected position
         x = projected2d[0, 0] * SCALE + CENTER[0]
@@ -284,8 +568,8 @@ def create_box(size: list[float], position: list[float], type: str) -> Box:
     for p in range(4):
         faces.append(create_face(type, p, (p + 1) % 4, (p + 1) % 4 + 4, p + 4, projected_points))
 
-    return Box(type, size, position, points, projected_points, vertices, lines, faces, False,
-               [0.0, 0.0, 0.0])
+    return Box(type, [size[0] * SUBSTEPS, size[1] * SUBSTEPS, size[2] * SUBSTEPS], list(cell), [0, 0, 0], points,
+               projected_points, vertices, lines, faces, False, [0, 0, 0])
 
 def destroy_box(box: Box):
     '''
@@ -305,17 +589,17 @@ def destroy_box(box: Box):
     for face in box.faces:
         destroy(face)
 
-def draw_box(angle: list[float], box: Box):
+def project_box(angle: list[float], box: Box) -> list[list[float]]:
     '''
-        This function updated the given box based on new size, position, and world rotation.
+    This function rotates and projects the 8 vertices of a box, used when the compiled kernel isn't available
 
-        Args:
-            angle (list[float]): the current x, y, and z angle of all objects in the world
-            box (Box): the box to be updated
+    Args:
+        angle (list[float]): the current x, y, and z angle of all objects in the world
+        box (Box): the box being projected
 
-        Returns:
-            None
-        '''
+    Returns:
+        list[list[float]]: the projected x and y of each vertex
+    '''
     rotation_x_matrix = np.matrix([
         [1, 0, 0],
         [0, m.cos(angle[0]), -m.sin(angle[0])],
@@ -333,11 +617,11 @@ def draw_box(angle: list[float], box: Box):
         [m.sin(angle[2]), m.cos(angle[2]), 0],
         [0, 0, 1]
     ])
+    projection_matrix = get_projection_matrix()
 
-    destroy_box(box)
-
+    projected_points = []
     box.points.clear()
-    box.points = generate_points(box.size, box.center)
+    box.points = generate_points([size / SUBSTEPS for size in box.size], get_center(box))
 
     # Calculating rotation and projection
     for index, point in enumerate(box.points):
@@ -349,41 +633,190 @@ def draw_box(angle: list[float], box: Box):
         rotated2d = rotation_y_matrix @ rotated2d
         rotated2d = rotation_z_matrix @ rotated2d
         # For each 3d coordinate, multiply by projection_matrix to convert to 2d coordinate
-        projected2d = PROJECTION_MATRIX @ rotated2d
+        projected2d = projection_matrix @ rotated2d
 
         # Set projected x and y values for each coordinate
         x = projected2d[0, 0] * SCALE + CENTER[0]
         y = projected2d[1, 0] * SCALE + CENTER[1]
 
         # Add x and y values to list of projected points
-        box.projected_points[index] = [x, y]
+        projected_points.append([x, y])
+    return projected_points
+
+@cache
+def get_projection_kernel():
+    '''
+    This function compiles the projection kernel the first time a box is drawn, so Numba is only imported once a
+    level is opened
+
+    Args:
+        None
+
+    Returns:
+        the compiled kernel, None if Numba isn't installed or it didn't match project_box
+    '''
+    return kernels.compile_kernel(kernels.project_corners, check_projection_kernel)
+
+def check_projection_kernel(kernel) -> bool:
+    '''
+    This function checks that a compiled projection kernel gives the same results as project_box for boxes of every
+    size and offset seen in the game, from several angles
+
+    Args:
+        kernel: the compiled kernel
+
+    Returns:
+        bool: True if every vertex is projected to the same place, else returns False
+    '''
+    for size in [[SUBSTEPS, SUBSTEPS, SUBSTEPS], [SCALE_MAX, SCALE_MAX, SUBSTEPS], [9 * SUBSTEPS, SUBSTEPS, 9 * SUBSTEPS]]:
+        for offset in [[0, 0, 0], [SCALE_SPEED, 0, -SCALE_SPEED]]:
+            for angle in [[0.3, 0.3, 0.0], [-1.2, 2.5, 0.0], [0.7, -0.4, 0.2]]:
+                box = Box("red", size, [3, -1, -2], offset, [], [], [], [], [], False, [0, 0, 0])
+                expected = project_box(angle, box)
+                projected = kernel(*get_center(box), *[length / SUBSTEPS for length in size], *angle, SCALE,
+                                   CENTER[0], CENTER[1])
+                if not np.allclose(projected, expected, rtol=0, atol=1e-6):
+                    return False
+    return True
+
+def draw_box(angle: list[float], box: Box, level: int, parts: StaticParts):
+    '''
+        This function updated the given box based on new size, position, and world rotation. Vertices are projected
+        by the compiled kernel when Numba is installed
+
+        Args:
+            angle (list[float]): the current x, y, and z angle of all objects in the world
+            box (Box): the box to be updated
+            level (int): the detail level from the quality controller
+            parts (StaticParts): the parts of a white box that can be seen, None to draw every part
+
+        Returns:
+            None
+        '''
+    destroy_box(box)
 
-        # Move corresponding vertices to newly calculated positions
-        box.vertices[index].x = x
-        box.vertices[index].y = y
+    kernel = get_projection_kernel()
+    if kernel:
+        box.projected_points = kernel(*get_center(box), *[size / SUBSTEPS for size in box.size], *angle, SCALE,
+                                      CENTER[0], CENTER[1]).tolist()
+    else:
+        box.projected_points = project_box(angle, box)
+    create_box_objects(box, level, None, parts)
+
+def create_box_objects(box: Box, level: int, outline: list[list[float]], parts: StaticParts):
+    '''
+    This function creates the DesignerObjects of a box from its projected points, after the old ones are destroyed.
+    Less detail than the given level is drawn for boxes too small for it to be seen
 
+    Args:
+        box (Box): the box being drawn
+        level (int): the detail level from the quality controller
+        outline (list[list[float]]): the outline of the box if it is already known, drawn as one shape instead of
+            its 6 faces, else None
+        parts (StaticParts): the parts of a white box that can be seen, None to draw every part
 
+    Returns:
+        None
+    '''
     # Reloading box geometry
-    # Generates 6 new faces
-    box.faces[0] = create_face(box.color, 0, 1, 2, 3, box.projected_points)
-    box.faces[1] = create_face(box.color, 4, 5, 6, 7, box.projected_points)
-    for p in range(4):
-        box.faces[p + 2] = create_face(box.color, p, (p + 1) % 4, (p + 1) % 4 + 4, p + 4, box.projected_points)\
+    box.faces.clear()
+    box.lines.clear()
+    box.vertices.clear()
+    detail = get_box_detail(level, box.projected_points)
+    faces, lines, corners = BOX_FACES, BOX_LINES, range(8)
+    if parts:
+        faces, lines, corners = parts.faces, parts.lines, parts.vertices
+    if outline:
+        box.faces.append(create_silhouette(box.color, outline))
+    elif detail == SILHOUETTES:
+        box.faces.append(create_silhouette(box.color, get_silhouette(box.projected_points)))
+    else:
+        # Generates up to 6 new faces
+        for i, j, k, l in faces:
+            box.faces.append(create_face(box.color, i, j, k, l, box.projected_points))
+    if detail == SILHOUETTES:
+        return
+
+    # Generates up to 12 new lines
+    if detail <= OUTLINED:
+        for i, j in lines:
+            box.lines.append(create_line(i, j, box.projected_points))
+
+    # Generates up to 8 new vertices
+    if detail == FULL:
+        for corner in corners:
+            box.vertices.append(circle("black", 5, box.projected_points[corner][0], box.projected_points[corner][1]))
+
+def draw_world(world: World):
+    '''
+    This function draws every box into the world's raster frame in one batch, instead of updating the DesignerObjects
+    of each box with draw_box
 
-    # Generates 12 new lines
-    for p in range(4):
-        box.lines[p] = create_line(p, (p + 1) % 4, box.projected_points)
-        box.lines[p + 4] = create_line(p + 4, (p + 1) % 4 + 4, box.projected_points)
-        box.lines[p + 8] = create_line(p, p + 4, box.projected_points)
+    Args:
+        world (World): the current world data
+
+    Returns:
+        None
+    '''
+    # White boxes are drawn as the merged blocks of the static mesh, each block picked as the white box in its
+    # smallest cell
+    boxes = [world.base] + [box for type in world.boxes if type is not world.boxes[1] for box in type]
+    blocks = world.static_mesh.blocks
+    centers = np.array([get_center(box) for box in boxes] +
+                       [[(block.low[axis] + block.high[axis]) / 2 for axis in range(3)] for block in blocks])
+    sizes = np.array([[size / SUBSTEPS for size in box.size] for box in boxes] +
+                     [[block.high[axis] - block.low[axis] + 1 for axis in range(3)] for block in blocks])
+    hidden = np.array([[False] * len(BOX_FACES)] * len(boxes) + [block.hidden for block in blocks])
+    boxes += [world.cell_index[tuple(block.low)] for block in blocks]
+    raster.draw_boxes(world.frame, boxes, centers, sizes, [box.color for box in boxes], world.angle, SCALE, CENTER,
+                      hidden)
+
+def draw_geometry(world: World, level: int):
+    '''
+    This function draws the boxes from the geometry the worker built from the end of the last frame, then gives it a
+    snapshot of the world to build the next frame's geometry from while this frame is drawn. Panning shows up one
+    frame later than with draw_box
 
-    # Generates 8 new vertices
-    for index, projected_point in enumerate(box.projected_points):
-        box.vertices[index] = circle("black", 5, projected_point[0], projected_point[1])
+    Args:
+        world (World): the current world data
+        level (int): the detail level from the quality controller
 
-def main(world: World):
+    Returns:
+        None
     '''
-    This function serves as the main game loops and is run every frame on the game scene. It performs most game
-    operations: rendering, panning, scaling and pushing boxes, and updating button hovering.
+    geometry = swap_geometry(geometry_worker)
+    if not geometry or geometry.boxes[0] is not world.base:
+        # The first frame of a level has nothing built for it yet, so it is built now
+        submit_world_geometry(world)
+        geometry = swap_geometry(geometry_worker)
+
+    world.box_render_order = [geometry.boxes[index] for index in geometry.order]
+    points = geometry.points.tolist()
+    outlines = geometry.outlines.tolist()
+    for index in geometry.order:
+        box = geometry.boxes[index]
+        destroy_box(box)
+        box.projected_points = points[index]
+        create_box_objects(box, level, outlines[index], find_static_parts(world, box))
+
+def find_static_parts(world: World, box: Box) -> StaticParts:
+    '''
+    This function finds the parts of a box that can be seen according to the static mesh
+
+    Args:
+        world (World): the current world data
+        box (Box): the box being drawn
+
+    Returns:
+        StaticParts: the parts of the box if it is a white box, None if it isn't or is the base
+    '''
+    if box.color != "white" or box is world.base:
+        return None
+    return world.static_mesh.parts.get(tuple(box.cell))
+
+def submit_world_geometry(world: World):
+    '''
+    This function gives the geometry worker a snapshot of the world once it has been updated for the frame
 
     Args:
         world (World): the current world data
@@ -391,33 +824,106 @@ def main(world: World):
     Returns:
         None
     '''
+    boxes = [world.base] + [box for type in world.boxes for box in type]
+    submit_geometry(geometry_worker, boxes, [get_center(box) for box in boxes],
+                    [[size / SUBSTEPS for size in box.size] for box in boxes], world.angle, SCALE, CENTER)
 
-    calculate_render_order(world)
+def main(world: World):
+    '''
+    This function serves as the main game loops and is run every frame on the game scene. It performs most game
+    operations: rendering, panning, scaling and pushing boxes, and updating button hovering.
 
+    Args:
+        world (World): the current world data
 
+    Returns:
+        None
+    '''
+    started = time.perf_counter()
+    marks = [started] # perf_counter after each part of the frame
 
     # Rotating boxes with mouse pan
     if world.is_panning:
         pan_world(world)
+    marks.append(time.perf_counter())
 
     # render all boxes
-    for box in world.box_render_order:
-        draw_box(world.angle, box)
+    if world.frame:
+        draw_world(world)
+    elif GEOMETRY_WORKER:
+        draw_geometry(world, quality_controller.level)
+    else:
+        calculate_render_order(world)
+        for box in world.box_render_order:
+            draw_box(world.angle, box, quality_controller.level, find_static_parts(world, box))
+    marks.append(time.perf_counter())
 
     if world.is_scaling:
-        directions = [True, True, True]
-        directions[0] = (check_box_collision(world, world.scaled_up_red_box, 0, 1) and
-                         check_box_collision(world, world.scaled_up_red_box, 0, -1))
-        directions[2] = (check_box_collision(world, world.scaled_up_red_box, 2, 1) and
-                         check_box_collision(world, world.scaled_up_red_box, 2, -1))
+        update_scaling(world)
+    marks.append(time.perf_counter())
 
-        move_blue_box(world, world.scaled_up_red_box)
+    for button in world.buttons:
+        button_hover(button)
+    marks.append(time.perf_counter())
 
-        scale_red_box(world, directions)
+    if GEOMETRY_WORKER and not world.frame:
+        submit_world_geometry(world)
 
+    # The raster frame costs the same to draw whatever the detail, so only DesignerObjects change it. Drawing the last
+    # frame is counted along with this update, as that is where the DesignerObjects of each box are drawn
+    draw_cost = get_director().current_scene.clock.cost_of_frame
+    if not world.frame:
+        update_quality(quality_controller, time.perf_counter() - started + draw_cost)
 
-    for button in world.buttons:
-        button_hover(button)
+    if STATE_EXPORT:
+        export_state(world, [marks[i + 1] - marks[i] for i in range(len(marks) - 1)] + [draw_cost])
+
+    if STATE_STREAM:
+        stream_state(world)
+
+def export_state(world: World, timings: list[float]):
+    '''
+    This function publishes the world's state for an inspector to read, the base first and then the boxes in the order
+    they are stored in world.boxes, so a box's index is the same every frame
+
+    Args:
+        world (World): the current world data
+        timings (list[float]): the seconds spent on each part of the frame, in the order of live_state.PHASES
+
+    Returns:
+        None
+    '''
+    global state_block
+    if state_block is None:
+        state_block = live_state.create_state_block(live_state.STATE_NAME, SUBSTEPS)
+        atexit.register(live_state.close_state_block, state_block)
+    boxes = [world.base] + [box for type in world.boxes for box in type]
+    indexes = {id(box): index for index, box in enumerate(boxes)}
+    live_state.publish_state(state_block, [get_position(box) for box in boxes], [box.size for box in boxes],
+                             [box.color for box in boxes], world.angle, world.is_scaling,
+                             indexes.get(id(world.scaled_up_red_box), -1),
+                             indexes.get(id(world.previously_scaled_up_red_box), -1), timings)
+
+def stream_state(world: World):
+    '''
+    This function streams the changes to the world this frame, the base first and then the boxes in the order they are
+    stored in world.boxes, so a box's index is the same every frame
+
+    Args:
+        world (World): the current world data
+
+    Returns:
+        None
+    '''
+    global stream
+    if stream is None:
+        stream = state_stream.create_state_stream(STATE_STREAM, SUBSTEPS, SCALE, [get_width(), get_height()],
+                                                  TARGET_FPS)
+        atexit.register(state_stream.close_state_stream, stream)
+    boxes = [world.base] + [box for type in world.boxes for box in type]
+    # The base is replaced whenever the world is, so it tells the stream when a level was opened, reset, or reloaded
+    state_stream.stream_frame(stream, world.base, [get_position(box) + box.size + [box.color] for box in boxes],
+                              world.angle)
 
 def calculate_render_order(world: World):
     '''
@@ -441,65 +947,70 @@ def calculate_render_order(world: World):
             # therefore preventing layering issues upon rendering
 
             i = 0
+            position = get_position(box)
 
             # When y rotation is between 45 degrees and 135 degrees, render from smallest x to largest x
             if (m.pi * 2 / 8) <= world.angle[1] % (m.pi * 2) < (m.pi * 2 / 8) * 3:
                 for render_box in world.box_render_order:
-                    if box.center[0] > render_box.center[0]:
+                    render_position = get_position(render_box)
+                    if position[0] > render_position[0]:
                         i += 1
                     # If 2 boxes have the same x, check if rotation is greater than or less than 90 degrees and render
                     # based on z value
-                    elif box.center[0] == render_box.center[0]:
+                    elif position[0] == render_position[0]:
                         if world.angle[1] % (m.pi * 2) > (m.pi * 2 / 8) * 2:
-                            if box.center[2] > render_box.center[2]:
+                            if position[2] > render_position[2]:
                                 i += 1
                         else:
-                            if box.center[2] < render_box.center[2]:
+                            if position[2] < render_position[2]:
                                 i += 1
 
             # When y rotation is between 135 degrees and 225 degrees, render from smallest z to largest z
             if (m.pi * 2 / 8) * 3 <= world.angle[1] % (m.pi * 2) < (m.pi * 2 / 8) * 5:
                 for render_box in world.box_render_order:
-                    if box.center[2] > render_box.center[2]:
+                    render_position = get_position(render_box)
+                    if position[2] > render_position[2]:
                         i += 1
                     # If 2 boxes have the same z, check if rotation is greater than or less than 180 degrees and render
                     # based on x value
-                    elif box.center[2] == render_box.center[2]:
+                    elif position[2] == render_position[2]:
                         if world.angle[1] % (m.pi * 2) > (m.pi * 2 / 8) * 4:
-                            if box.center[0] < render_box.center[0]:
+                            if position[0] < render_position[0]:
                                 i += 1
                         else:
-                            if box.center[0] > render_box.center[0]:
+                            if position[0] > render_position[0]:
                                 i += 1
 
             # When y rotation is between 225 degrees and 315 degrees, render from largest x to smallest x
             if (m.pi * 2 / 8) * 5 <= world.angle[1] % (m.pi * 2) < (m.pi * 2 / 8) * 7:
                 for render_box in world.box_render_order:
-                    if box.center[0] < render_box.center[0]:
+                    render_position = get_position(render_box)
+                    if position[0] < render_position[0]:
                         i += 1
                     # If 2 boxes have the same x, check if rotation is greater than or less than 270 degrees and render
                     # based on z value
-                    elif box.center[0] == render_box.center[0]:
+                    elif position[0] == render_position[0]:
                         if world.angle[1] % (m.pi * 2) > (m.pi * 2 / 8) * 6:
-                            if box.center[2] < render_box.center[2]:
+                            if position[2] < render_position[2]:
                                 i += 1
                         else:
-                            if box.center[2] > render_box.center[2]:
+                            if position[2] > render_position[2]:
                                 i += 1
 
             # When y rotation is greater than 315 degrees or fewer than 45 degrees, render from largest z to smallest z
             if (m.pi * 2 / 8) * 7 <= world.angle[1] % (m.pi * 2) or world.angle[1] % (m.pi * 2) < (m.pi * 2 / 8):
                 for render_box in world.box_render_order:
-                    if box.center[2] < render_box.center[2]:
+                    render_position = get_position(render_box)
+                    if position[2] < render_position[2]:
                         i += 1
                     # If 2 boxes have the same z, check if rotation is less than 45 degrees or greater than 315 degrees
                     # and render based on x value
-                    elif box.center[2] == render_box.center[2]:
+                    elif position[2] == render_position[2]:
                         if world.angle[1] % (m.pi * 2) < (m.pi / 2):
-                            if box.center[0] > render_box.center[0]:
+                            if position[0] > render_position[0]:
                                 i += 1
                         else:
-                            if box.center[0] < render_box.center[0]:
+                            if position[0] < render_position[0]:
                                 i += 1
 
             world.box_render_order.insert(i, box)
@@ -513,6 +1024,22 @@ def calculate_render_order(world: World):
     else:
         world.box_render_order.insert(0, world.base)
 
+def has_headroom(world: World, red_box: Box) -> bool:
+    '''
+    This function checks if there is room above a red box for it to grow upward into
+
+    Args:
+        world (World): the current world data
+        red_box (Box): the red box being checked
+
+    Returns:
+        bool: True if the cells the red box grows into are empty, else returns False
+    '''
+    for height in range(1, SCALE_MAX // SUBSTEPS):
+        if get_voxel(world.voxels, [red_box.cell[0], red_box.cell[1] - height, red_box.cell[2]]) != EMPTY:
+            return False
+    return True
+
 def red_box_interaction(world: World):
     '''
     This function is run when clicking and determines if the player has clicked on a red box and if it can be scaled
@@ -526,6 +1053,11 @@ def red_box_interaction(world: World):
     '''
     # Creates a list containing all boxes colliding with the mouse upon clicking
     boxes_clicked = []
+    if world.frame:
+        # The raster frame already knows which box was drawn nearest under the mouse
+        picked = raster.pick_box(world.frame, get_mouse_x(), get_mouse_y())
+        if picked:
+            boxes_clicked.append(picked)
     for type in world.boxes:
         for box in type:
             for face in box.faces:
@@ -543,19 +1075,145 @@ def red_box_interaction(world: World):
 
         # Checks if the closest clicked box is red
         if closest_clicked.color == "red" and not world.is_scaling:
-            world.is_clicking_interactable = True
-            if closest_clicked.size[1] == 1.0 and closest_clicked != world.scaled_up_red_box:
-                world.previously_scaled_up_red_box = world.scaled_up_red_box
-                world.scaled_up_red_box = closest_clicked
-                world.is_scaling = True
-            else:
-                world.is_clicking_interactable = False
+            world.is_clicking_interactable = activate_red_box(world, closest_clicked)
 
     else:
         world.is_clicking_interactable = False
 
     boxes_clicked.clear()
 
+def activate_red_box(world: World, red_box: Box) -> bool:
+    '''
+    This function starts scaling up a red box the player clicked on, if it isn't already scaled up and has room to
+    grow, and starts scaling down the previously scaled up red box
+
+    Args:
+        world (World): the current world data
+        red_box (Box): the red box clicked on
+
+    Returns:
+        bool: True if the red box started scaling up, else returns False
+    '''
+    if red_box.size[1] != SUBSTEPS or red_box == world.scaled_up_red_box or not has_headroom(world, red_box):
+        return False
+    world.previously_scaled_up_red_box = world.scaled_up_red_box
+    if world.previously_scaled_up_red_box:
+        # A shrinking box is tracked at the size it is shrinking to, so other boxes can grow into the
+        # space it is giving up
+        low, high = get_cell_bounds(world.previously_scaled_up_red_box.cell)
+        update_item(world.broadphase, world.previously_scaled_up_red_box, low, high)
+    world.scaled_up_red_box = red_box
+    world.is_scaling = True
+    world.moves += 1
+    world.outcome_key = get_outcome_key(world, red_box)
+    world.outcome = find_outcome(outcome_cache, world.outcome_key)
+    world.is_replaying = world.outcome is not None
+    if not world.is_replaying:
+        world.outcome = ActivationOutcome(None, [])
+    world.scaling_frame = 0
+    return True
+
+def get_outcome_key(world: World, red_box: Box) -> tuple:
+    '''
+    This function finds the key the outcome of activating a red box is cached under. Every box is resting when a red
+    box is activated, and red and white boxes never move, so the blue boxes' cells are the whole state the outcome
+    depends on. The previously scaled up red box was just put back in its cell, so it doesn't change the outcome
+
+    Args:
+        world (World): the current world data
+        red_box (Box): the red box being activated
+
+    Returns:
+        tuple: the level's hash, the index of the red box, and the cell of each blue box
+    '''
+    return world.level_key, world.boxes[0].index(red_box), tuple(tuple(box.cell) for box in world.boxes[2])
+
+def update_scaling(world: World):
+    '''
+    This function advances the scaled up red box by one frame of growth, pushing the blue boxes in front of it, and
+    checks if the level got stuck once it is fully grown. If the outcome of activating the red box was cached the
+    blue boxes are moved to where they were recorded instead of being pushed, otherwise where they are pushed to is
+    recorded
+
+    Args:
+        world (World): the current world data
+
+    Returns:
+        None
+    '''
+    if world.is_replaying:
+        world.scale_directions = world.outcome.directions
+        replay_outcome_frame(world)
+    else:
+        if world.scaled_up_red_box.size[1] == SUBSTEPS:
+            # The directions are decided once when the red box starts growing, as its bounding box grows past its
+            # cell after the first frame
+            world.scale_directions = [True, True, True]
+            world.scale_directions[0] = (check_box_collision(world, world.scaled_up_red_box, 0, 1) and
+                                         check_box_collision(world, world.scaled_up_red_box, 0, -1))
+            world.scale_directions[2] = (check_box_collision(world, world.scaled_up_red_box, 2, 1) and
+                                         check_box_collision(world, world.scaled_up_red_box, 2, -1))
+        move_blue_box(world, world.scaled_up_red_box)
+        record_outcome_frame(world)
+
+    scale_red_box(world, world.scale_directions)
+    world.scaling_frame += 1
+
+    # Blue boxes stop moving when the red box finishes growing, so that is the only time the level can get stuck
+    if not world.is_scaling:
+        if not world.is_replaying:
+            world.outcome.directions = world.scale_directions
+            store_outcome(outcome_cache, world.outcome_key, world.outcome)
+        check_stuck(world)
+
+def record_outcome_frame(world: World):
+    '''
+    This function records where the blue boxes that have been pushed are after a frame of the red box growing, and if
+    they are moving. A box started by a blue box moving beside it moves without leaving its cell, so once a box is
+    recorded it is recorded every frame after
+
+    Args:
+        world (World): the current world data
+
+    Returns:
+        None
+    '''
+    start = world.outcome_key[2]
+    recorded = {entry[0] for entry in world.outcome.frames[-1]} if world.outcome.frames else set()
+    world.outcome.frames.append([(index, list(box.cell), list(box.offset), box.is_moving)
+                                 for index, box in enumerate(world.boxes[2])
+                                 if index in recorded or box.is_moving or any(box.offset) or
+                                 tuple(box.cell) != start[index]])
+
+def replay_outcome_frame(world: World):
+    '''
+    This function moves the blue boxes to where they were recorded after a frame of the red box growing, unindexing
+    the ones between cells and indexing the ones that stopped the same way move_blue_box does
+
+    Args:
+        world (World): the current world data
+
+    Returns:
+        None
+    '''
+    # move_blue_box turns every blue box back from purple each frame, detect_win turns them purple again
+    for blue_box in world.boxes[2]:
+        blue_box.color = "blue"
+    for index, cell, offset, is_moving in world.outcome.frames[world.scaling_frame]:
+        blue_box = world.boxes[2][index]
+        # Only boxes that changed this frame are indexed, so the box indexed in a cell two boxes ended up in is the
+        # one move_blue_box indexed last
+        if blue_box.cell == cell and blue_box.offset == offset and blue_box.is_moving == is_moving:
+            continue
+        blue_box.is_moving = is_moving
+        if any(offset) or not is_moving:
+            unindex_box(world, blue_box)
+        blue_box.cell = list(cell)
+        blue_box.offset = list(offset)
+        if not is_moving:
+            index_box(world, blue_box)
+        track_box(world, blue_box)
+
 def scale_red_box(world: World, directions: list[bool]):
     '''
     This function scales up a red box when it is clicked and scales down the previously scaled up red box.
@@ -579,15 +1237,16 @@ def scale_red_box(world: World, directions: list[bool]):
         if world.scaled_up_red_box.size[1] < SCALE_MAX:
 
             scale_points(world.scaled_up_red_box, scale_speed)
+            track_box(world, world.scaled_up_red_box)
 
             # Checks if there is a red box currently scaled up and scales it down
             if world.previously_scaled_up_red_box:
                 scale_down_speed = [0,0,0]
-                if world.previously_scaled_up_red_box.size[0] > 1.0:
+                if world.previously_scaled_up_red_box.size[0] > SUBSTEPS:
                     scale_down_speed[0] = -SCALE_SPEED
-                if world.previously_scaled_up_red_box.size[1] > 1.0:
+                if world.previously_scaled_up_red_box.size[1] > SUBSTEPS:
                     scale_down_speed[1] = -SCALE_SPEED
-                if world.previously_scaled_up_red_box.size[2] > 1.0:
+                if world.previously_scaled_up_red_box.size[2] > SUBSTEPS:
                     scale_down_speed[2] = -SCALE_SPEED
                 scale_points(world.previously_scaled_up_red_box, scale_down_speed)
         else:
@@ -605,50 +1264,63 @@ def move_blue_box(world: World, pushing_box: Box):
     Returns:
         None
     '''
+    in_front = {}
+    if pushing_box.color == "red":
+        # Use the broadphase to find the blue boxes directly in front of each side the red box is growing from
+        for axis in [2, 0]:
+            if pushing_box.size[axis] > SUBSTEPS:
+                for direction in [1, -1]:
+                    low, high = get_cell_bounds(pushing_box.cell)
+                    low[axis] += direction * SUBSTEPS
+                    high[axis] += direction * SUBSTEPS
+                    for box in query_region(world.broadphase, low, high):
+                        if box.color != "white" and box.color != "red":
+                            in_front[id(box)] = [axis, direction * SCALE_SPEED // 2]
+
     for blue_box in world.boxes[2]: # 2 is blue boxes
         if not blue_box.is_moving:
             blue_box.color = "blue"
             if pushing_box.color == "red":
-
-                if pushing_box.center[0] == blue_box.center[0] and pushing_box.size[2] > 1.0:
-                    if pushing_box.center[2] == blue_box.center[2] - 1:
-                        blue_box.is_moving = True
-                        blue_box.movement[2] = SCALE_SPEED/2
-                    elif pushing_box.center[2] == blue_box.center[2] + 1:
-                        blue_box.is_moving = True
-                        blue_box.movement[2] = -SCALE_SPEED/2
-
-                elif pushing_box.center[2] == blue_box.center[2] and pushing_box.size[0] > 1.0:
-                    if pushing_box.center[0] == blue_box.center[0] - 1:
-                        blue_box.is_moving = True
-                        blue_box.movement[0] = SCALE_SPEED/2
-                    elif pushing_box.center[0] == blue_box.center[0] + 1:
-                        blue_box.is_moving = True
-                        blue_box.movement[0] = -SCALE_SPEED/2
+                if id(blue_box) in in_front:
+                    axis, speed = in_front[id(blue_box)]
+                    blue_box.is_moving = True
+                    blue_box.movement[axis] = speed
 
             elif pushing_box.color == "blue":
-                if round(pushing_box.center[0]) == blue_box.center[0]:
-                    if (round(pushing_box.center[2]) == blue_box.center[2] - 1 or
-                            round(pushing_box.center[2]) == blue_box.center[2] + 1):
-                        blue_box.is_moving = True
-                        blue_box.movement[2] = pushing_box.movement[2]
-                if round(pushing_box.center[2]) == blue_box.center[2]:
-                    if (round(pushing_box.center[0]) == blue_box.center[0] - 1 or
-                            round(pushing_box.center[0]) == blue_box.center[0] + 1):
-                        blue_box.is_moving = True
-                        blue_box.movement[0] = pushing_box.movement[0]
+                pushing_cell = get_rounded_cell(pushing_box)
+                # Only boxes on the same layer are pushed
+                if pushing_cell[1] == blue_box.cell[1]:
+                    if pushing_cell[0] == blue_box.cell[0]:
+                        if (pushing_cell[2] == blue_box.cell[2] - 1 or
+                                pushing_cell[2] == blue_box.cell[2] + 1):
+                            blue_box.is_moving = True
+                            blue_box.movement[2] = pushing_box.movement[2]
+                    if pushing_cell[2] == blue_box.cell[2]:
+                        if (pushing_cell[0] == blue_box.cell[0] - 1 or
+                                pushing_cell[0] == blue_box.cell[0] + 1):
+                            blue_box.is_moving = True
+                            blue_box.movement[0] = pushing_box.movement[0]
 
             if blue_box.is_moving:
                 move_blue_box(world, blue_box)
 
         else:
-            blue_box.center[0] += blue_box.movement[0]
-            blue_box.center[2] += blue_box.movement[2]
+            blue_box.offset[0] += blue_box.movement[0]
+            blue_box.offset[2] += blue_box.movement[2]
+            if blue_box.offset[0] or blue_box.offset[2]:
+                # A box between cells can't be found by cell
+                unindex_box(world, blue_box)
             if pushing_box.size[1] >= SCALE_MAX or (pushing_box.color == "blue" and pushing_box.is_moving == False):
                 blue_box.is_moving = False
                 blue_box.movement = [0, 0, 0]
-                blue_box.center[0] = round(blue_box.center[0])
-                blue_box.center[2] = round(blue_box.center[2])
+                # The box is unindexed before its cell changes, as a box started by a blue box moving beside it has
+                # no movement and is still indexed in the cell it is leaving
+                unindex_box(world, blue_box)
+                # The box falls if it was pushed off of whatever it was resting on
+                blue_box.cell = drop_cell(world.voxels, get_rounded_cell(blue_box), FLOOR)
+                blue_box.offset = [0, 0, 0]
+                index_box(world, blue_box)
+            track_box(world, blue_box)
 
 def check_box_collision(world: World, checked_box: Box, axis: int, direction: int) -> bool:
     '''
@@ -666,24 +1338,25 @@ def check_box_collision(world: World, checked_box: Box, axis: int, direction: in
     Returns:
         bool: True if there are no collisions, False if there is one
     '''
-    # Run through all boxes in the world and filter out any that aren't white or blue
-    other_axis = 0
-    if axis == 0:
-        other_axis = 2
-
-    for index, type in enumerate(world.boxes):
-        if index == 1 or index == 2 or index == 0: # 1 is white, 2 is blue, 0 is red
-            for box in type:
-                if (checked_box.center[axis] == box.center[axis] + direction and
-                        checked_box.center[other_axis] == box.center[other_axis]):
-                    #Check if a blue, red,  or white box is directly next to the box we are checking along the given
-                    #axis and direction, which is either 1 or -1
-                    if box.color == "white" or box.color == "red":
-                        # If the neighboring box is white or red, return false
-                        return False
-                    else:
-                        # If the neighboring box is blue, check if it has a white box in the next space over
-                        return check_box_collision(world, box, axis, direction)
+    # Find every box in the cell deep region directly next to the box we are checking along the given axis and
+    # direction, which is either 1 or -1
+    low, high = get_bounds(checked_box)
+    if direction == 1:
+        high[axis] = low[axis]
+        low[axis] -= SUBSTEPS
+    else:
+        low[axis] = high[axis]
+        high[axis] += SUBSTEPS
+    neighbors = query_region(world.broadphase, low, high)
+
+    for box in neighbors:
+        if box.color == "white" or box.color == "red":
+            # If a neighboring box is white or red, return false
+            return False
+    for box in neighbors:
+        # If a neighboring box is blue, check if it has a white box in the next space over
+        if not check_box_collision(world, box, axis, direction):
+            return False
     return True
 
 def pan_start(world: World, x: float, y: float):
@@ -746,16 +1419,32 @@ def detect_win(world: World) -> bool:
     '''
     green_boxes_filled = []
     for green_box in world.boxes[3]: # 3 is green boxes
-        for blue_box in world.boxes[2]: # 2 is blue boxes
-            if blue_box.center == green_box.center:
-                green_boxes_filled.append(True)
-                blue_box.color = "purple"
+        blue_box = world.cell_index.get(tuple(green_box.cell))
+        if blue_box is not None and (blue_box.color == "blue" or blue_box.color == "purple"):
+            green_boxes_filled.append(True)
+            blue_box.color = "purple"
 
     return len(green_boxes_filled) == len(world.boxes[3])
 
+def check_stuck(world: World):
+    '''
+    This function checks if the level can no longer be completed and adds a button offering to reset it if so
+
+    Args:
+        world (World): the current world data
+
+    Returns:
+        None
+    '''
+    if not world.is_stuck and is_deadlocked(world.deadlocks, [box.cell for box in world.boxes[2]]):
+        world.is_stuck = True
+        # Buttons right of the center of the screen reset the level
+        world.buttons.append(create_button("Stuck, reset?", CENTER[0], get_height()-20, "gray"))
+
 def end_level(world: World):
     '''
-    This function ends the level and changes the scene to level_menu if detect_win returns True
+    This function ends the level and changes the scene to level_menu if detect_win returns True, saving the moves
+    and time it took
 
     Args:
         world (World): the current world data
@@ -764,17 +1453,18 @@ def end_level(world: World):
         None
     '''
     if detect_win(world):
-        global completed_levels
-        completed_levels[level_number] = True
+        record_completion(progress_store, world.level_key, world.moves, time.perf_counter() - world.start_time)
         change_scene('level_menu')
 
-def create_level(level: list[list[str]], base_x, base_z) -> World:
+def create_level(level: list, base_x, base_z) -> World:
     '''
-    This function converts a 2d list of strings representing boxes in a level into level data and returns a World based
-    on that.
+    This function converts a level into level data and returns a World based on that. A level is either a 2d list of
+    strings or a list of them, one for each layer from the bottom up. The boxes are placed in a voxel grid first so
+    floating blue boxes can fall onto whatever is below them, and the cells blue boxes can reach the green boxes from
+    are precomputed from it. The white boxes are compiled into a static mesh once they are created.
 
     Args:
-        level (list[list[str]]): the 2d list of strings to be converted to a World
+        level (list): the 2d list of strings, or the list of layers, to be converted to a World
         base_x (int): the x width of the base of the level
         base_z (int): the z width of the base of the level
 
@@ -786,31 +1476,48 @@ def create_level(level: list[list[str]], base_x, base_z) -> World:
     # w = white
     # b = blue
     # g = green
+    # The raster frame is created first so the buttons are drawn on top of it
+    frame = None
+    if RASTER_RENDERING:
+        frame = raster.create_raster_frame(get_width(), get_height())
     base = create_box([base_x, 1, base_z], [0,1,0], "base")
+    voxels, green_cells = parse_level(level, [-m.floor(base_x/2), -m.floor(base_z/2)], FLOOR)
+    columns, rows = get_level_size(level)
+    low = [-m.floor(base_x/2), -(len(get_layers(level)) - 1), -m.floor(base_z/2)]
+    high = [low[0] + columns - 1, FLOOR, low[2] + rows - 1]
+    deadlocks = create_deadlock_table(voxels, green_cells, low, high, FLOOR, SCALE_MAX // SUBSTEPS - 1)
+
     red = []
     white = []
     blue = []
     green = []
-    for i, row in enumerate(reversed(level)):
-        for j, character in enumerate(row):
-            if character == "r":
-                red.append(create_box([1,1,1], [j-m.floor(base_x/2), 0, i-m.floor(base_z/2)],
-                                      "red"))
-            elif character == "w":
-                white.append(create_box([1, 1, 1], [j-m.floor(base_x/2), 0, i-m.floor(base_z/2)],
-                                        "white"))
-            elif character == "b":
-                blue.append(create_box([1, 1, 1], [j-m.floor(base_x/2), 0, i-m.floor(base_z/2)],
-                                       "blue"))
-            elif character == "g":
-                green.append(create_box([1, 1, 1], [j-m.floor(base_x/2), 0, i-m.floor(base_z/2)],
-                                        "green"))
-    return World(base, [red, white, blue, green], [], [0.3, 0.3, 0.0], [0, 0], False, False, None, None, False, [
+    cell_index = {}
+    broadphase = create_broadphase()
+    # Sorted by layer, then row, then column so boxes are always created in the same order
+    for cell, code in sorted(occupied_voxels(voxels), key=lambda voxel: [-voxel[0][1], voxel[0][2], voxel[0][0]]):
+        if code == RED:
+            red.append(create_box([1, 1, 1], cell, "red"))
+            cell_index[tuple(cell)] = red[-1]
+            add_item(broadphase, red[-1], *get_bounds(red[-1]))
+        elif code == WHITE:
+            white.append(create_box([1, 1, 1], cell, "white"))
+            cell_index[tuple(cell)] = white[-1]
+            add_item(broadphase, white[-1], *get_bounds(white[-1]))
+        elif code == BLUE:
+            blue.append(create_box([1, 1, 1], cell, "blue"))
+            cell_index[tuple(cell)] = blue[-1]
+            add_item(broadphase, blue[-1], *get_bounds(blue[-1]))
+    for cell in green_cells:
+        green.append(create_box([1, 1, 1], cell, "green"))
+    static_mesh = compile_static_mesh([box.cell for box in white], FLOOR, [base_x, base_z])
+    return World(base, [red, white, blue, green], cell_index, voxels, broadphase, [], [0.3, 0.3, 0.0], [0, 0], False,
+                 False, None, None, False, [True, True, True], deadlocks, static_mesh, False, get_level_key(level), 0,
+                 time.perf_counter(), frame, [
         create_button("Reset Level", get_width()-50, get_height()-20, "gray"),
         create_button("Level Select", 50, get_height()-20, "gray")
-    ])
+    ], None, None, False, 0)
 
-def create_world() -> World:
+def load_world() -> World:
     '''
     This function creates the world by passing the current level number into the create_level function
 
@@ -822,7 +1529,21 @@ def create_world() -> World:
     '''
     set_window_color("black")
 
-    return create_level(change_level(level_number), 9, 9)
+    return create_level(levels.change_level(level_number), 9, 9)
+
+def create_world() -> World:
+    '''
+    This function creates the world when the player opens or resets a level, counting it as an attempt at the level
+
+    Args:
+        None
+
+    Returns:
+        World: the created world
+    '''
+    world = load_world()
+    record_attempt(progress_store, world.level_key)
+    return world
 
 def create_main_menu() -> MainMenu:
     '''
@@ -836,15 +1557,7 @@ def create_main_menu() -> MainMenu:
     '''
     set_window_color("black")
 
-    x_padding = 10
-    y_padding = 10
-
-    title = text("black", "Growth Matrix", 50, CENTER[0], CENTER[1]/3)
-    title_border = rectangle("white", title.width + 2*x_padding, title.height + 2*y_padding, CENTER[0],
-                             CENTER[1]/3)
-    title_background = rectangle("lightslategray", title.width + x_padding, title.height + y_padding, CENTER[0],
-                                 CENTER[1]/3)
-    title = text("black", "Growth Matrix", 50, CENTER[0], CENTER[1] / 3)
+    title_border, title_background, title = create_title("Growth Matrix")
     play_button = create_button("     Play     ", CENTER[0], CENTER[1] * 1.1, "gray")
     instructions_button = create_button("Instructions", CENTER[0], CENTER[1] *1.1 + 40, "gray")
 
@@ -890,8 +1603,6 @@ def create_instructions_menu() -> InstructionsMenu:
     '''
     width = 600
     height = 250
-    x_padding = 10
-    y_padding = 10
     border = rectangle("white", width + 5, height + 5, CENTER[0], CENTER[1])
     background = rectangle("dimgray", width, height, CENTER[0], CENTER[1])
     instructions = [
@@ -912,13 +1623,8 @@ def create_instructions_menu() -> InstructionsMenu:
     ]
 
     close_button = create_button("Close", CENTER[0], CENTER[1]+height/2-25, "gray")
-    title = text("black", "Growth Matrix", 50, CENTER[0], CENTER[1] / 3)
-    title_border = rectangle("white", title.width + 2 * x_padding, title.height + 2 * y_padding, CENTER[0],
-                             CENTER[1] / 3)
-    title_background = rectangle("lightslategray", title.width + x_padding, title.height + y_padding, CENTER[0],
-                                 CENTER[1] / 3)
-    title = text("black", "Growth Matrix", 50, CENTER[0], CENTER[1] / 3)
-    return InstructionsMenu(background, border, instructions, close_button, title, title_border, title_background)
+    title_border, title_background, title = create_title("Growth Matrix")
+    return InstructionsMenu(background, border, instructions, close_button, title, title_background, title_border)
 
 def instructions_menu_hover(menu: InstructionsMenu):
     '''
@@ -947,8 +1653,8 @@ def instructions_menu_click(menu: InstructionsMenu):
 
 def create_level_menu() -> LevelMenu:
     '''
-    This function creates the level menu based on the number of levels there are and changes the color of the buttons
-    to green if a level has been completed. It also displays a victory message if all levels have been completed.
+    This function creates the level menu showing the page of levels the last played level is on. Buttons are only
+    created for one page, and the levels they show change with the page
 
     Args:
         None
@@ -956,40 +1662,218 @@ def create_level_menu() -> LevelMenu:
     Returns:
         LevelMenu: the created menu
     '''
-    x_padding = 10
-    y_padding = 10
-
     level_buttons = []
-    all_completed = True
-    for i in range(0, TOTAL_LEVELS):
-        if completed_levels[i]:
-            color = "green"
-        else:
-            color = "gray"
-            all_completed = False
-        level_buttons.append(create_button("  " + str(i+1) + "  ", i * 50 + 100, CENTER[1], color))
+    for slot in range(0, LEVEL_COLUMNS * LEVEL_ROWS):
+        level_buttons.append(create_button("  " + str(slot+1) + "  ", *get_level_slot_position(slot), "gray"))
 
-    if not all_completed:
-        message = " Levels "
-    else:
-        message = "    Congratulations! :)    "
+    previous_button = create_button("  <  ", CENTER[0] - 80, get_height()-60, "gray")
+    page_text = text("white", "", 20, CENTER[0], get_height()-60)
+    next_button = create_button("  >  ", CENTER[0] + 80, get_height()-60, "gray")
+    back_button = create_button("   back   ", 50, get_height()-20, "gray")
 
-    title = text("black", message, 40, CENTER[0], CENTER[1] / 2)
+    title_border, title_background, title = create_title(get_level_menu_message())
 
-    back_button = create_button("   back   ", 50, get_height()-20, "gray")
+    menu = LevelMenu(title, title_background, title_border, level_buttons, [None] * len(level_buttons),
+                     [None] * len(level_buttons), None, page_text, None, previous_button, next_button, back_button)
+    show_level_page(menu, level_number // len(level_buttons))
+    return menu
 
-    title_border = rectangle("white", title.width + 2 * x_padding, title.height + 2 * y_padding, CENTER[0],
-                             CENTER[1] / 3)
-    title_background = rectangle("lightslategray", title.width + x_padding, title.height + y_padding, CENTER[0],
-                                 CENTER[1] / 3)
+def count_levels() -> int:
+    '''
+    This function counts the levels in levels.py
 
-    title = text("black", message, 50, CENTER[0], CENTER[1] / 3)
+    Args:
+        None
+
+    Returns:
+        int: the number of levels
+    '''
+    return len(levels.levels)
+
+def get_level_slot_position(slot: int) -> list[float]:
+    '''
+    This function finds where the button of a slot on a level menu page goes, slots fill each row left to right
 
-    return LevelMenu(title, title_border, title_background, level_buttons, back_button)
+    Args:
+        slot (int): the index of the slot on the page
+
+    Returns:
+        list[float]: the x and y position of the slot's button
+    '''
+    row, column = divmod(slot, LEVEL_COLUMNS)
+    left = CENTER[0] - LEVEL_COLUMNS * LEVEL_CELL[0] / 2
+    return [left + (column + 0.5) * LEVEL_CELL[0], LEVEL_GRID_TOP + (row + 0.75) * LEVEL_CELL[1]]
+
+def find_level_slot(menu: LevelMenu, x: float, y: float) -> int:
+    '''
+    This function finds the level button under a position by working out which cell of the grid it is in, so only
+    that button has to be checked no matter how many levels there are
+
+    Args:
+        menu (LevelMenu): the level menu
+        x (float): the x position, usually the mouse
+        y (float): the y position, usually the mouse
+
+    Returns:
+        int: the slot of the button under the position, None if there isn't one
+    '''
+    left = CENTER[0] - LEVEL_COLUMNS * LEVEL_CELL[0] / 2
+    column = m.floor((x - left) / LEVEL_CELL[0])
+    row = m.floor((y - LEVEL_GRID_TOP) / LEVEL_CELL[1])
+    if not (0 <= column < LEVEL_COLUMNS and 0 <= row < LEVEL_ROWS):
+        return None
+    slot = row * LEVEL_COLUMNS + column
+    if menu.page * len(menu.level_buttons) + slot >= count_levels():
+        return None
+    # Buttons are narrower than their cells, so the position may be beside the button
+    border = menu.level_buttons[slot].border
+    if abs(x - border.x) > border.width / 2 or abs(y - border.y) > border.height / 2:
+        return None
+    return slot
+
+def show_level_page(menu: LevelMenu, page: int):
+    '''
+    This function shows a page of levels on the level menu, relabeling and recoloring the buttons of each slot and
+    hiding the slots past the last level. Previews of the page's levels are shown by load_thumbnails
+
+    Args:
+        menu (LevelMenu): the level menu
+        page (int): the page to show, kept between the first and last page
+
+    Returns:
+        None
+    '''
+    page_size = len(menu.level_buttons)
+    total = count_levels()
+    page = max(0, min(page, (total - 1) // page_size))
+    if page != menu.page:
+        for slot, thumbnail in enumerate(menu.thumbnails):
+            if thumbnail:
+                destroy(thumbnail)
+            menu.thumbnails[slot] = None
+            menu.thumbnail_levels[slot] = None
+    menu.page = page
+
+    for slot, button in enumerate(menu.level_buttons):
+        level = page * page_size + slot
+        shown = level < total
+        button.border.visible = button.background.visible = button.text.visible = shown
+        if not shown:
+            continue
+        message = "  " + str(level+1) + "  "
+        if button.text.text != message:
+            set_button_text(button, message)
+        button.color = get_level_color(level)
+        button_hover(button)
+
+    pages = (total - 1) // page_size + 1
+    menu.page_text.text = "Page " + str(page + 1) + " of " + str(pages)
+    load_thumbnails(menu)
+
+def find_level_key(level: int) -> str:
+    '''
+    This function finds the key a level's progress is saved by. Each level is only hashed the first time it is needed
+
+    Args:
+        level (int): the index of the level
+
+    Returns:
+        str: the key of the level
+    '''
+    if level not in level_keys:
+        level_keys[level] = get_level_key(levels.change_level(level))
+    return level_keys[level]
+
+def is_level_completed(level: int) -> bool:
+    '''
+    This function checks the saved progress to see if a level has been completed
+
+    Args:
+        level (int): the index of the level
+
+    Returns:
+        bool: True if the level has been completed, else returns False
+    '''
+    return get_level_stats(progress_store, find_level_key(level)).completed
+
+def get_level_color(level: int) -> str:
+    '''
+    This function finds the color of a level's button, green if the level has been completed
+
+    Args:
+        level (int): the index of the level
+
+    Returns:
+        str: the color of the button
+    '''
+    if is_level_completed(level):
+        return "green"
+    return "gray"
+
+def get_level_menu_message() -> str:
+    '''
+    This function finds the title of the level menu, a victory message if all levels have been completed
+
+    Args:
+        None
+
+    Returns:
+        str: the title of the level menu
+    '''
+    if all(is_level_completed(level) for level in range(0, count_levels())):
+        return "    Congratulations! :)    "
+    return " Levels "
+
+def refresh_level_menu(menu: LevelMenu):
+    '''
+    This function updates the parts of the level menu that change while it isn't shown, the colors of the buttons
+    of newly completed levels and the title. The menu is kept between scene changes, so only these parts are redrawn
+
+    Args:
+        menu (LevelMenu): the level menu
+
+    Returns:
+        None
+    '''
+    show_level_page(menu, menu.page)
+
+    message = get_level_menu_message()
+    if menu.title.text != message:
+        menu.title.text = message
+        fit_title(menu.title_border, menu.title_background, menu.title)
+
+def load_thumbnails(menu: LevelMenu):
+    '''
+    This function shows the preview of each level on the page above its button once it is ready. Previews are cached
+    on disk and any that are missing are drawn in the background, so the menu opens without waiting for them
+
+    Args:
+        menu (LevelMenu): the level menu
+
+    Returns:
+        None
+    '''
+    first_level = menu.page * len(menu.level_buttons)
+    for slot in range(0, min(len(menu.level_buttons), count_levels() - first_level)):
+        level = first_level + slot
+        if menu.thumbnail_levels[slot] != find_level_key(level):
+            path = request_thumbnail(thumbnail_cache, levels.change_level(level))
+            failed = not path and check_thumbnail_failed(thumbnail_cache, levels.change_level(level))
+            if path or failed:
+                # The old preview of a changed level stays until the new one is ready, a level whose preview
+                # couldn't be drawn is left with just its button
+                if menu.thumbnails[slot]:
+                    destroy(menu.thumbnails[slot])
+                    menu.thumbnails[slot] = None
+                if path:
+                    x, y = get_level_slot_position(slot)
+                    menu.thumbnails[slot] = create_thumbnail_image(path, x, y - 45)
+                menu.thumbnail_levels[slot] = find_level_key(level)
 
 def level_menu_button_hover(menu: LevelMenu):
     '''
-    This function updates the color of the buttons on the level menu if the player hovers over them
+    This function updates the color of the buttons on the level menu if the player hovers over them. Only the
+    button under the mouse and the one that was under it last frame are updated
 
     Args:
         menu (LevelMenu): the instructions menu
@@ -997,13 +1881,20 @@ def level_menu_button_hover(menu: LevelMenu):
     Returns:
         None
     '''
-    for button in menu.level_buttons:
-        button_hover(button)
+    slot = find_level_slot(menu, get_mouse_x(), get_mouse_y())
+    if menu.hovered is not None and menu.hovered != slot:
+        button_hover(menu.level_buttons[menu.hovered])
+    if slot is not None:
+        button_hover(menu.level_buttons[slot])
+    menu.hovered = slot
+    button_hover(menu.previous_button)
+    button_hover(menu.next_button)
     button_hover(menu.back_button)
+    load_thumbnails(menu)
 
 def level_menu_click(menu: LevelMenu):
     '''
-    This function registers clicks on the level menu buttons and changes to the corresponding menu or level
+    This function registers clicks on the level menu buttons and changes to the corresponding menu, page, or level
 
     Args:
         menu (LevelMenu): the instructions menu
@@ -1013,12 +1904,105 @@ def level_menu_click(menu: LevelMenu):
     '''
     if button_hover(menu.back_button):
         change_scene('main_menu')
+    elif button_hover(menu.previous_button):
+        show_level_page(menu, menu.page - 1)
+    elif button_hover(menu.next_button):
+        show_level_page(menu, menu.page + 1)
 
-    for i, button in enumerate(menu.level_buttons):
-        if button_hover(button):
-            global level_number
-            level_number = i
-            change_scene('game')
+    slot = find_level_slot(menu, get_mouse_x(), get_mouse_y())
+    if slot is not None:
+        global level_number
+        level_number = menu.page * len(menu.level_buttons) + slot
+        change_scene('game')
+
+
+def check_level_file() -> list[int]:
+    '''
+    This function reloads levels.py if it has been saved and forgets the keys of the levels that changed
+
+    Args:
+        None
+
+    Returns:
+        list[int]: the index of every level that changed
+    '''
+    changed = check_levels(level_watcher)
+    for level in changed:
+        level_keys.pop(level, None)
+    return changed
+
+def destroy_world(world: World):
+    '''
+    This function destroys every DesignerObject of a world
+
+    Args:
+        world (World): the world being destroyed
+
+    Returns:
+        None
+    '''
+    destroy_box(world.base)
+    for type in world.boxes:
+        for box in type:
+            destroy_box(box)
+    for button in world.buttons:
+        destroy(button.border, button.background, button.text)
+    if world.frame:
+        destroy(world.frame.canvas)
+
+def reload_game_level(world: World):
+    '''
+    This function rebuilds the open level in place if it changed in levels.py, keeping the angle it is viewed from. The
+    new level is built before the old one is destroyed, so a level that can't be built leaves the old one playable, or
+    returns to the level menu if it was removed
+
+    Args:
+        world (World): the current world data
+
+    Returns:
+        None
+    '''
+    if level_number in check_level_file():
+        try:
+            # Reloading a level isn't another attempt at it
+            loaded = load_world()
+        except Exception as error:
+            print("[levels] could not rebuild level " + str(level_number + 1) + ":", repr(error))
+            if level_number >= len(levels.levels):
+                change_scene('level_menu')
+            return
+        angle = world.angle
+        destroy_world(world)
+        # Designer keeps using the same world, so the new world's data is copied into it
+        vars(world).update(vars(loaded))
+        world.angle = angle
+
+def reload_menu_levels(menu: LevelMenu):
+    '''
+    This function updates the level menu if levels.py changed, previews of changed levels are redrawn by
+    load_thumbnails
+
+    Args:
+        menu (LevelMenu): the level menu
+
+    Returns:
+        None
+    '''
+    if check_level_file():
+        refresh_level_menu(menu)
+
+def report_startup(menu: MainMenu):
+    '''
+    This function prints the import time report the first time the main menu is updated, once it can be used
+
+    Args:
+        menu (MainMenu): the main menu
+
+    Returns:
+        None
+    '''
+    if not import_timer.reported:
+        report_import_times(import_timer)
 
 
 # Main menu events
@@ -1035,6 +2019,7 @@ when('clicking: instructions_menu', instructions_menu_click)
 when('starting: level_menu', create_level_menu)
 when('updating: level_menu', level_menu_button_hover)
 when('clicking: level_menu', level_menu_click)
+when('entering: level_menu', refresh_level_menu)
 
 
 # Game events
@@ -1048,4 +2033,27 @@ when('input.mouse.up: game', pan_end)
 when('updating: game', end_level)
 when('updating: game', main)
 
-start(scene='main_menu')
\ No newline at end of file
+create_scene_cache(MENU_SCENES, 'main_menu')
+
+if IMPORT_TIMES:
+    when('updating: main_menu', report_startup)
+
+if OUTCOME_STATS:
+    atexit.register(report_outcome_cache, outcome_cache)
+
+if LEVEL_WATCHING:
+    level_watcher = create_level_watcher(levels)
+    when('updating: level_menu', reload_menu_levels)
+    when('updating: game', reload_game_level)
+
+if OBJECT_TRACKING:
+    object_tracker = create_object_tracker('main_menu')
+    for namespace in [globals(), vars(sys.modules['raster']), vars(sys.modules['thumbnails'])]:
+        track_namespace(object_tracker, namespace)
+
+# Only started when run, so the game's rules can be imported without opening it, like fuzz.py does
+if __name__ == "__main__":
+    thumbnail_cache = create_thumbnail_cache(os.path.join(os.path.dirname(os.path.abspath(__file__)), "thumbnails"))
+    progress_store = load_progress_store(os.path.join(os.path.dirname(os.path.abspath(__file__)), "progress.jsonl"))
+    atexit.register(close_progress_store, progress_store)
+    start(scene='main_menu')
\ No newline at end of file
@@ -0,0 +1,84 @@
+from collections import OrderedDict
+from dataclasses import dataclass
+
+OUTCOME_CACHE_SIZE = 4096 # Most activation outcomes kept at once
+
+@dataclass
+class ActivationOutcome:
+    # What happens when a red box is activated from a settled state. It is the same every time, so it is recorded the
+    # first time and replayed after instead of pushing the blue boxes again
+    directions: list[bool] # [x,y,z] directions the red box grows in
+    frames: list[list[tuple[int, list[int], list[int], bool]]] # The (index, cell, offset, is moving) of each blue
+                                                               # box that has been pushed after each frame, by index
+                                                               # in the blue boxes. The last frame is where they settle
+
+@dataclass
+class OutcomeCache:
+    # The most recently used activation outcomes, shared by every level as each key includes the level's hash
+    outcomes: OrderedDict # {key: ActivationOutcome}, least recently used first
+    size: int # Most outcomes kept, the least recently used is dropped past this
+    hits: int # Activations whose outcome was found
+    misses: int # Activations whose outcome had to be worked out
+
+def create_outcome_cache(size: int) -> OutcomeCache:
+    '''
+    This function creates an empty outcome cache
+
+    Args:
+        size (int): the most outcomes kept at once
+
+    Returns:
+        OutcomeCache: the created cache
+    '''
+    return OutcomeCache(OrderedDict(), size, 0, 0)
+
+def find_outcome(cache: OutcomeCache, key: tuple) -> ActivationOutcome:
+    '''
+    This function looks up the outcome of an activation, counting it as a hit or a miss
+
+    Args:
+        cache (OutcomeCache): the outcome cache
+        key (tuple): the level's hash, the index of the red box, and the cell of each blue box
+
+    Returns:
+        ActivationOutcome: the recorded outcome, None if it hasn't been recorded
+    '''
+    outcome = cache.outcomes.get(key)
+    if outcome is None:
+        cache.misses += 1
+        return None
+    cache.hits += 1
+    cache.outcomes.move_to_end(key)
+    return outcome
+
+def store_outcome(cache: OutcomeCache, key: tuple, outcome: ActivationOutcome):
+    '''
+    This function records the outcome of an activation, dropping the least recently used outcome if the cache is full
+
+    Args:
+        cache (OutcomeCache): the outcome cache
+        key (tuple): the level's hash, the index of the red box, and the cell of each blue box
+        outcome (ActivationOutcome): the outcome once the red box finished growing
+
+    Returns:
+        None
+    '''
+    cache.outcomes[key] = outcome
+    cache.outcomes.move_to_end(key)
+    if len(cache.outcomes) > cache.size:
+        cache.outcomes.popitem(last=False)
+
+def report_outcome_cache(cache: OutcomeCache):
+    '''
+    This function prints how often outcomes were found in the cache
+
+    Args:
+        cache (OutcomeCache): the outcome cache
+
+    Returns:
+        None
+    '''
+    lookups = cache.hits + cache.misses
+    rate = round(cache.hits / lookups * 100) if lookups else 0
+    print("[outcomes]", cache.hits, "hits,", cache.misses, "misses,", str(rate) + "% found,", len(cache.outcomes),
+          "outcomes kept")
@@ -0,0 +1,214 @@
+import hashlib
+import json
+import os
+import threading
+from dataclasses import dataclass, replace
+from queue import Queue
+
+COMPACT_LINES = 200 # The log is rewritten once it has this many lines and at least twice as many as levels played
+
+@dataclass
+class LevelStats:
+    # The player's progress on one level
+    completed: bool
+    best_moves: int # Fewest red boxes grown to complete the level, None until it is completed
+    best_time: float # Fewest seconds taken to complete the level, None until it is completed
+    attempts: int # Times the level was opened or reset
+
+@dataclass
+class ProgressStore:
+    # Progress on every level played, saved in an append-only log of JSON lines by the hash of each level, so
+    # changing or reordering levels never mixes up their progress. A line only adds to the progress before it, and
+    # all writes happen on a background thread so the game never waits for the disk
+    path: str
+    stats: dict[str, LevelStats] # {level key: stats} including records still waiting to be written
+    written: dict[str, LevelStats] # {level key: stats} of only the records in the log, used to compact it
+    lines: int # Lines in the log
+    records: Queue # Records waiting to be written, None stops the writer
+    writer: threading.Thread
+
+def get_level_key(level: list) -> str:
+    '''
+    This function hashes a level's contents so its progress is found even if it moves in the level list
+
+    Args:
+        level (list): the level from levels.py
+
+    Returns:
+        str: the hex digest identifying the level
+    '''
+    return hashlib.sha256(json.dumps(level).encode()).hexdigest()
+
+def apply_record(stats: dict[str, LevelStats], record: dict):
+    '''
+    This function adds one record from the log to the stats of its level. Records from compacting the log have
+    every field, records written during play only have the fields that changed
+
+    Args:
+        stats (dict[str, LevelStats]): {level key: stats}, updated in place
+        record (dict): the record, with the level key and any of completed, moves, time, and attempts
+
+    Returns:
+        None
+    '''
+    level = stats.setdefault(record["level"], LevelStats(False, None, None, 0))
+    level.attempts += record.get("attempts", 0)
+    if record.get("completed"):
+        level.completed = True
+    if record.get("moves") is not None and (level.best_moves is None or record["moves"] < level.best_moves):
+        level.best_moves = record["moves"]
+    if record.get("time") is not None and (level.best_time is None or record["time"] < level.best_time):
+        level.best_time = record["time"]
+
+def load_progress_store(path: str) -> ProgressStore:
+    '''
+    This function reads the progress log and starts the thread writing to it. Only levels that have been played
+    are in the log. A line cut off by a crash is dropped, as it was never finished being written
+
+    Args:
+        path (str): the path of the log, created when the first record is written
+
+    Returns:
+        ProgressStore: the loaded store
+    '''
+    stats = {}
+    lines = 0
+    if os.path.exists(path):
+        with open(path, "rb+") as log:
+            contents = log.read()
+            # The cut off line is removed so the next record starts on a line of its own
+            end = contents.rfind(b"\n") + 1
+            if end < len(contents):
+                log.truncate(end)
+        for line in contents[:end].splitlines():
+            try:
+                apply_record(stats, json.loads(line))
+                lines += 1
+            except (ValueError, KeyError):
+                pass
+    written = {key: replace(level) for key, level in stats.items()}
+    store = ProgressStore(path, stats, written, lines, Queue(), None)
+    store.writer = threading.Thread(target=write_records, args=(store,), daemon=True)
+    store.writer.start()
+    return store
+
+def write_records(store: ProgressStore):
+    '''
+    This function runs on the writer thread, appending records to the log as they arrive. Records that arrive
+    together are written together and synced to the disk once
+
+    Args:
+        store (ProgressStore): the progress store
+
+    Returns:
+        None
+    '''
+    running = True
+    while running:
+        records = [store.records.get()]
+        while not store.records.empty():
+            records.append(store.records.get())
+        if None in records:
+            running = False
+            records = [record for record in records if record is not None]
+        if not records:
+            continue
+
+        with open(store.path, "a") as log:
+            for record in records:
+                log.write(json.dumps(record) + "\n")
+                apply_record(store.written, record)
+            log.flush()
+            os.fsync(log.fileno())
+        store.lines += len(records)
+        if store.lines >= COMPACT_LINES and store.lines >= 2 * len(store.written):
+            compact_log(store)
+
+def compact_log(store: ProgressStore):
+    '''
+    This function rewrites the log with one line for each level played. The new log is written to a temporary file
+    first, so a crash leaves either the old log or the new one
+
+    Args:
+        store (ProgressStore): the progress store
+
+    Returns:
+        None
+    '''
+    temporary_path = store.path + ".tmp"
+    with open(temporary_path, "w") as log:
+        for key, level in store.written.items():
+            log.write(json.dumps({"level": key, "completed": level.completed, "moves": level.best_moves,
+                                  "time": level.best_time, "attempts": level.attempts}) + "\n")
+        log.flush()
+        os.fsync(log.fileno())
+    os.replace(temporary_path, store.path)
+    store.lines = len(store.written)
+
+def add_record(store: ProgressStore, record: dict):
+    '''
+    This function updates the stats right away and queues the record to be written to the log
+
+    Args:
+        store (ProgressStore): the progress store
+        record (dict): the record, with the level key and any of completed, moves, time, and attempts
+
+    Returns:
+        None
+    '''
+    apply_record(store.stats, record)
+    store.records.put(record)
+
+def record_attempt(store: ProgressStore, key: str):
+    '''
+    This function records that a level was opened or reset
+
+    Args:
+        store (ProgressStore): the progress store
+        key (str): the key of the level
+
+    Returns:
+        None
+    '''
+    add_record(store, {"level": key, "attempts": 1})
+
+def record_completion(store: ProgressStore, key: str, moves: int, seconds: float):
+    '''
+    This function records that a level was completed, keeping the fewest moves and seconds it has taken
+
+    Args:
+        store (ProgressStore): the progress store
+        key (str): the key of the level
+        moves (int): the red boxes grown to complete the level
+        seconds (float): the time taken to complete the level
+
+    Returns:
+        None
+    '''
+    add_record(store, {"level": key, "completed": True, "moves": moves, "time": round(seconds, 2)})
+
+def get_level_stats(store: ProgressStore, key: str) -> LevelStats:
+    '''
+    This function finds the progress on a level
+
+    Args:
+        store (ProgressStore): the progress store
+        key (str): the key of the level
+
+    Returns:
+        LevelStats: the stats of the level, empty if it has never been played
+    '''
+    return store.stats.get(key, LevelStats(False, None, None, 0))
+
+def close_progress_store(store: ProgressStore):
+    '''
+    This function waits for every queued record to be written and stops the writer thread
+
+    Args:
+        store (ProgressStore): the progress store
+
+    Returns:
+        None
+    '''
+    store.records.put(None)
+    store.writer.join()
@@ -0,0 +1,120 @@
+from dataclasses import dataclass
+
+# Detail levels, each drawing less than the one before
+FULL = 0 # Faces, outlines, and a dot on each corner
+OUTLINED = 1 # Faces and outlines
+FACES = 2 # Faces only
+SILHOUETTES = 3 # One flat shape covering each box
+
+SAMPLE_FRAMES = 15 # Frames averaged before the detail level can change
+LOWER_LOAD = 0.9 # Detail is lowered when frames use more than this share of the frame budget
+RAISE_LOAD = 0.5 # Detail is raised when frames use less than this share of the frame budget
+HOLD_FRAMES = 60 # Frames detail is kept after being lowered before it can be raised again
+MAX_HOLD_FRAMES = 960 # Longest detail is kept after being lowered, as the hold doubles each time raising fails
+DOT_SIZE = 20 # Boxes narrower than this many pixels aren't given corner dots
+OUTLINE_SIZE = 8 # Boxes narrower than this many pixels aren't given outlines
+
+@dataclass
+class QualityController:
+    # Chooses how much detail boxes are drawn with, lowering it when frames take too long and raising it again once
+    # there is time to spare. Raising detail and having to lower it again right away makes the next wait longer, so
+    # the detail doesn't flicker between two levels
+    level: int # The current detail level
+    budget: float # Seconds each frame can take at the target frame rate
+    costs: list[float] # Seconds taken by each frame since the detail level was last checked
+    hold: int # Frames left before detail can be raised
+    hold_frames: int # Frames detail is kept the next time it is lowered
+    raised: bool # True if detail was raised at the last check, so lowering it right after means raising failed
+
+def create_quality_controller(target_fps: int) -> QualityController:
+    '''
+    This function creates a quality controller starting at full detail
+
+    Args:
+        target_fps (int): the frame rate the controller tries to keep
+
+    Returns:
+        QualityController: the created controller
+    '''
+    return QualityController(FULL, 1 / target_fps, [], 0, HOLD_FRAMES, False)
+
+def update_quality(controller: QualityController, cost: float) -> int:
+    '''
+    This function records how long a frame took and changes the detail level once enough frames are recorded
+
+    Args:
+        controller (QualityController): the quality controller
+        cost (float): the seconds spent updating and drawing the frame, not counting time spent waiting for the next
+
+    Returns:
+        int: the detail level to draw the next frame with
+    '''
+    controller.costs.append(cost)
+    controller.hold = max(controller.hold - 1, 0)
+    if len(controller.costs) < SAMPLE_FRAMES:
+        return controller.level
+
+    load = sum(controller.costs) / len(controller.costs) / controller.budget
+    controller.costs.clear()
+    if load > LOWER_LOAD and controller.level < SILHOUETTES:
+        if controller.raised:
+            controller.hold_frames = min(controller.hold_frames * 2, MAX_HOLD_FRAMES)
+        controller.level += 1
+        controller.hold = controller.hold_frames
+        controller.raised = False
+    elif load < RAISE_LOAD and controller.level > FULL and controller.hold == 0:
+        controller.level -= 1
+        controller.raised = True
+    elif controller.raised:
+        # Raising detail worked, so the next time it is lowered starts with the shortest hold again
+        controller.hold_frames = HOLD_FRAMES
+        controller.raised = False
+    return controller.level
+
+def get_box_detail(level: int, points: list[list[float]]) -> int:
+    '''
+    This function finds the detail level to draw a box with, which is lower than the controller's for boxes too small
+    on screen for their outlines or corner dots to be seen
+
+    Args:
+        level (int): the detail level from the quality controller
+        points (list[list[float]]): the projected x and y of each corner of the box
+
+    Returns:
+        int: the detail level to draw the box with
+    '''
+    xs = [point[0] for point in points]
+    ys = [point[1] for point in points]
+    size = min(max(xs) - min(xs), max(ys) - min(ys))
+    if size < OUTLINE_SIZE:
+        return max(level, FACES)
+    if size < DOT_SIZE:
+        return max(level, OUTLINED)
+    return level
+
+def get_silhouette(points: list[list[float]]) -> list[list[float]]:
+    '''
+    This function finds the outline of a projected box, the convex hull of its corners, so it can be drawn as one
+    shape instead of 6 faces
+
+    Args:
+        points (list[list[float]]): the projected x and y of each corner of the box
+
+    Returns:
+        list[list[float]]: the corners on the outline in order around it
+    '''
+    points = sorted(map(tuple, points))
+
+    def cross(origin, a, b):
+        return (a[0] - origin[0]) * (b[1] - origin[1]) - (a[1] - origin[1]) * (b[0] - origin[0])
+
+    # Andrew's monotone chain, building the lower and upper halves of the hull
+    hull = []
+    for half in [points, points[::-1]]:
+        start = len(hull)
+        for point in half:
+            while len(hull) >= start + 2 and cross(hull[-2], hull[-1], point) <= 0:
+                hull.pop()
+            hull.append(point)
+        hull.pop()
+    return [list(point) for point in hull]
@@ -0,0 +1,272 @@
+import numpy as np
+import math as m
+import pygame
+import pygame.surfarray # Not loaded with pygame when NumPy is imported after it
+from dataclasses import dataclass
+from designer import DesignerObject, image
+from designer.core.internal_image import InternalImage
+
+# Signs of each of a box's 8 corners from its center, in the same order as generate_points
+CORNERS = np.array([
+    [-1, -1, 1], [1, -1, 1], [1, 1, 1], [-1, 1, 1],
+    [-1, -1, -1], [1, -1, -1], [1, 1, -1], [-1, 1, -1]
+], dtype=float) / 2
+
+# Corners of each of a box's 6 faces, in the same order draw_box creates them
+FACES = np.array([[0, 1, 2, 3], [4, 5, 6, 7], [0, 1, 5, 4], [1, 2, 6, 5], [2, 3, 7, 6], [3, 0, 4, 7]])
+FACE_CORNERS = np.zeros((6, 8), dtype=bool) # True where a corner is part of a face
+FACE_CORNERS[np.arange(6)[:, np.newaxis], FACES] = True
+
+LINE_WIDTH = 1 # Width of the outline of each face in pixels
+VERTEX_RADIUS = 5 # Radius of the dot on each corner in pixels
+VERTEX_DEPTH = 0.2 # How far behind the nearest face a corner can be and still have its dot drawn
+
+@dataclass
+class RasterFrame:
+    # A single image every box is drawn into each frame, used instead of the DesignerObjects of each box. Buffers are
+    # indexed [x, y] like pygame.surfarray
+    canvas: DesignerObject # The image showing the frame, None for frames drawn offscreen
+    surface: pygame.Surface # The surface the boxes are drawn into
+    depth: np.ndarray # (width, height) depth of the nearest face drawn at each pixel
+    ids: np.ndarray # (width, height) index of the nearest face drawn at each pixel, -1 where there is none
+    outlines: np.ndarray # (width, height) True where a pixel is drawn black for an outline or corner
+    window: tuple[slice, slice] # The x and y range of pixels drawn into last frame
+    owners: list # The box each face drawn last frame belongs to
+    colors: dict[str, int] # {color name: color mapped to the surface} so names are only looked up once
+
+def create_raster_frame(width: int, height: int) -> RasterFrame:
+    '''
+    This function creates a transparent frame covering the window for boxes to be drawn into
+
+    Args:
+        width (int): the width of the frame in pixels
+        height (int): the height of the frame in pixels
+
+    Returns:
+        RasterFrame: the created frame
+    '''
+    canvas = image([[(0, 0, 0, 0)]], width / 2, height / 2)
+    canvas._internal_image = InternalImage(size=(width, height))
+    canvas._redraw_internal_image()
+    frame = create_offscreen_frame(canvas._internal_image._surf)
+    frame.canvas = canvas
+    return frame
+
+def create_offscreen_frame(surface: pygame.Surface) -> RasterFrame:
+    '''
+    This function creates a frame that draws into a surface that isn't shown, which works without a window
+
+    Args:
+        surface (pygame.Surface): a 32 bit surface with transparency to draw into
+
+    Returns:
+        RasterFrame: the created frame
+    '''
+    width, height = surface.get_size()
+    return RasterFrame(None, surface, np.full((width, height), np.inf), np.full((width, height), -1, dtype=np.int32),
+                       np.zeros((width, height), dtype=bool), (slice(0, 0), slice(0, 0)), [], {})
+
+def get_rotation_matrix(angle: list[float]) -> np.ndarray:
+    '''
+    This function combines the x, y, and z rotations draw_box applies into one matrix
+
+    Args:
+        angle (list[float]): the current x, y, and z angle of all objects in the world
+
+    Returns:
+        np.ndarray: the 3x3 matrix rotating about x, then y, then z
+    '''
+    rotation_x = np.array([
+        [1, 0, 0],
+        [0, m.cos(angle[0]), -m.sin(angle[0])],
+        [0, m.sin(angle[0]), m.cos(angle[0])]
+    ])
+    rotation_y = np.array([
+        [m.cos(angle[1]), 0, m.sin(angle[1])],
+        [0, 1, 0],
+        [-m.sin(angle[1]), 0, m.cos(angle[1])]
+    ])
+    rotation_z = np.array([
+        [m.cos(angle[2]), -m.sin(angle[2]), 0],
+        [m.sin(angle[2]), m.cos(angle[2]), 0],
+        [0, 0, 1]
+    ])
+    return rotation_z @ rotation_y @ rotation_x
+
+def project_boxes(centers: np.ndarray, sizes: np.ndarray, angle: list[float], scale: float,
+                  center: list[float]) -> tuple[np.ndarray, np.ndarray]:
+    '''
+    This function rotates and projects the corners of every box at once
+
+    Args:
+        centers (np.ndarray): (boxes, 3) x, y, and z center of each box
+        sizes (np.ndarray): (boxes, 3) x, y, and z size of each box
+        angle (list[float]): the current x, y, and z angle of all objects in the world
+        scale (float): the scale for rendering
+        center (list[float]): the x and y center of the window
+
+    Returns:
+        tuple[np.ndarray, np.ndarray]: (boxes, 8, 2) projected x and y of each corner and (boxes, 8) depth of each
+        corner, larger being further from the camera
+    '''
+    points = centers[:, np.newaxis, :] + CORNERS[np.newaxis, :, :] * sizes[:, np.newaxis, :]
+    rotated = points @ get_rotation_matrix(angle).T
+    return rotated[:, :, :2] * scale + np.array(center[:2]), rotated[:, :, 2]
+
+def get_window(frame: RasterFrame, points: np.ndarray, padding: int) -> tuple[slice, slice]:
+    '''
+    This function finds the pixels of the frame covered by a group of points
+
+    Args:
+        frame (RasterFrame): the frame being drawn into
+        points (np.ndarray): (points, 2) x and y of each point
+        padding (int): pixels added around the points
+
+    Returns:
+        tuple[slice, slice]: the x and y range of pixels, empty if the points are off the frame
+    '''
+    low = np.maximum(np.floor(points.min(axis=0)).astype(int) - padding, 0)
+    high = np.minimum(np.ceil(points.max(axis=0)).astype(int) + padding + 1, frame.depth.shape)
+    return slice(low[0], max(low[0], high[0])), slice(low[1], max(low[1], high[1]))
+
+def fill_face(frame: RasterFrame, polygon: np.ndarray, depths: np.ndarray, face_id: int):
+    '''
+    This function draws one face into the frame's buffers, keeping only the pixels nearer than anything drawn there
+    before. The projection is orthographic, so depth changes linearly across the face
+
+    Args:
+        frame (RasterFrame): the frame being drawn into
+        polygon (np.ndarray): (4, 2) projected x and y of the face's corners
+        depths (np.ndarray): (4,) depth of the face's corners
+        face_id (int): the index of the face
+
+    Returns:
+        None
+    '''
+    # Faces seen edge on have no area and no depth plane
+    corners = np.column_stack([polygon[:3], np.ones(3)])
+    if abs(np.linalg.det(corners)) < 1e-6:
+        return
+    slope_x, slope_y, offset = np.linalg.solve(corners, depths[:3])
+
+    window_x, window_y = get_window(frame, polygon, 0)
+    xs = np.arange(window_x.start, window_x.stop, dtype=np.float32)[:, np.newaxis]
+    ys = np.arange(window_y.start, window_y.stop, dtype=np.float32)[np.newaxis, :]
+    if xs.size == 0 or ys.size == 0:
+        return
+
+    # A pixel is inside the face when it is on the inner side of all 4 edges, its distance to the nearest edge decides
+    # if it is part of the outline
+    polygon = polygon.astype(np.float32)
+    edges = np.roll(polygon, -1, axis=0) - polygon
+    winding = np.sign(edges[0][0] * edges[1][1] - edges[0][1] * edges[1][0])
+    distances = np.stack([
+        winding * (edge[0] * (ys - corner[1]) - edge[1] * (xs - corner[0])) / np.hypot(edge[0], edge[1])
+        for edge, corner in zip(edges, polygon)
+    ]).min(axis=0)
+    depth = slope_x * xs + slope_y * ys + offset
+    nearer = (distances >= 0) & (depth < frame.depth[window_x, window_y])
+
+    frame.depth[window_x, window_y][nearer] = depth[nearer]
+    frame.ids[window_x, window_y][nearer] = face_id
+    frame.outlines[window_x, window_y][nearer] = distances[nearer] < LINE_WIDTH
+
+def dot_corner(frame: RasterFrame, point: np.ndarray, depth: float):
+    '''
+    This function draws the dot on a corner of a box, unless a face nearer than the corner covers it
+
+    Args:
+        frame (RasterFrame): the frame being drawn into
+        point (np.ndarray): (2,) projected x and y of the corner
+        depth (float): depth of the corner
+
+    Returns:
+        None
+    '''
+    window_x, window_y = get_window(frame, point[np.newaxis], VERTEX_RADIUS)
+    xs = np.arange(window_x.start, window_x.stop)[:, np.newaxis]
+    ys = np.arange(window_y.start, window_y.stop)[np.newaxis, :]
+    dot = ((xs - point[0]) ** 2 + (ys - point[1]) ** 2 <= VERTEX_RADIUS ** 2)
+    frame.outlines[window_x, window_y] |= dot & (depth <= frame.depth[window_x, window_y] + VERTEX_DEPTH)
+
+def draw_boxes(frame: RasterFrame, boxes: list, centers: np.ndarray, sizes: np.ndarray, colors: list[str],
+               angle: list[float], scale: float, center: list[float], hidden: np.ndarray = None):
+    '''
+    This function draws every box into the frame with a depth buffer, so boxes of any size layer correctly without
+    calculate_render_order. Faces turned away from the camera are skipped, as are faces that can never be seen
+
+    Args:
+        frame (RasterFrame): the frame being drawn into
+        boxes (list): the boxes being drawn, remembered so clicks can be traced back to them
+        centers (np.ndarray): (boxes, 3) x, y, and z center of each box
+        sizes (np.ndarray): (boxes, 3) x, y, and z size of each box
+        colors (list[str]): the color of each box
+        angle (list[float]): the current x, y, and z angle of all objects in the world
+        scale (float): the scale for rendering
+        center (list[float]): the x and y center of the window
+        hidden (np.ndarray): (boxes, 6) True for each face covered by another box, None if none are
+
+    Returns:
+        None
+    '''
+    projected, depth = project_boxes(centers, sizes, angle, scale, center)
+
+    # A face is visible when its center is nearer to the camera than its box's center
+    visible = depth[:, FACES].mean(axis=2) < depth.mean(axis=1)[:, np.newaxis]
+    if hidden is not None:
+        visible &= ~hidden
+    box_indexes, face_indexes = np.nonzero(visible)
+
+    # Only the pixels the boxes cover this frame or covered last frame need to be cleared and copied to the surface
+    window = get_window(frame, projected.reshape(-1, 2), VERTEX_RADIUS + 1)
+    for window_x, window_y in [frame.window, window]:
+        frame.depth[window_x, window_y] = np.inf
+        frame.ids[window_x, window_y] = -1
+        frame.outlines[window_x, window_y] = False
+
+    for face_id, (box_index, face_index) in enumerate(zip(box_indexes.tolist(), face_indexes.tolist())):
+        fill_face(frame, projected[box_index, FACES[face_index]], depth[box_index, FACES[face_index]], face_id)
+    for box_index, corner in zip(*np.nonzero(visible @ FACE_CORNERS)):
+        dot_corner(frame, projected[box_index, corner], depth[box_index, corner])
+
+    # Colors are mapped to the surface's pixel format so each pixel is copied as one number, the last color is
+    # transparent for pixels with no face
+    for color in colors:
+        if color not in frame.colors:
+            frame.colors[color] = frame.surface.map_rgb(pygame.Color(color))
+    pixels = pygame.surfarray.pixels2d(frame.surface)
+    palette = np.array([frame.colors[colors[box_index]] for box_index in box_indexes.tolist()] +
+                       [frame.surface.map_rgb(pygame.Color(0, 0, 0, 0))]).astype(pixels.dtype)
+    black = np.array(frame.surface.map_rgb(pygame.Color("black"))).astype(pixels.dtype)
+
+    window_x, window_y = frame.window
+    pixels[window_x, window_y] = palette[-1]
+    window_x, window_y = window
+    pixels[window_x, window_y] = np.where(frame.outlines[window_x, window_y], black,
+                                          palette[frame.ids[window_x, window_y]])
+    del pixels
+    if frame.canvas:
+        frame.canvas._redraw_internal_image()
+
+    frame.window = window
+
+    frame.owners = [boxes[box_index] for box_index in box_indexes.tolist()]
+
+def pick_box(frame: RasterFrame, x: float, y: float) -> object:
+    '''
+    This function finds the box whose face was drawn nearest to the camera at a point on the screen
+
+    Args:
+        frame (RasterFrame): the frame drawn last
+        x (float): the x position on the screen
+        y (float): the y position on the screen
+
+    Returns:
+        object: the box under the point, None if there is no box there
+    '''
+    if not (0 <= x < frame.ids.shape[0] and 0 <= y < frame.ids.shape[1]):
+        return None
+    face_id = frame.ids[int(x), int(y)]
+    if face_id < 0:
+        return None
+    return frame.owners[face_id]
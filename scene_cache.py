@@ -0,0 +1,116 @@
+import designer
+import pygame
+from dataclasses import dataclass
+from functools import lru_cache
+from weakref import WeakKeyDictionary
+from designer.colors import _process_color
+from designer.core.event import Event, handle
+from designer.core.internal_image import InternalImage
+from designer.core.scene import Scene
+from designer.objects.text import Text
+
+TEXT_CACHE_SIZE = 256 # Most rendered text surfaces kept at once
+
+@dataclass
+class SceneCache:
+    # Scenes kept after they are left so changing back to them reuses their objects instead of building them again.
+    # Designer always creates a new Scene when changing scenes, so the director's scene change is replaced
+    kept: list[str] # Names of the scenes to keep
+    scenes: dict[str, Scene] # {name: scene} of the kept scenes not currently running
+    names: WeakKeyDictionary # {Scene: name} of every scene on the director's stack
+
+def create_scene_cache(kept: list[str], first_scene: str) -> SceneCache:
+    '''
+    This function creates a scene cache and makes the director use it for every scene change. It must be called
+    before the game starts
+
+    Args:
+        kept (list[str]): the names of the scenes to keep, scenes whose contents depend on more than the global
+            variables, like the game, shouldn't be kept
+        first_scene (str): the name of the scene the game starts in
+
+    Returns:
+        SceneCache: the created cache
+    '''
+    director = designer.GLOBAL_DIRECTOR
+    cache = SceneCache(kept, {}, WeakKeyDictionary())
+    cache.names[director.current_scene] = first_scene
+    change = director._do_scene_change
+
+    def do_scene_change(change_type, scene_name, kwargs):
+        change_cached_scene(cache, change, change_type, scene_name, kwargs)
+    director._do_scene_change = do_scene_change
+    Text._redraw_internal_image = redraw_cached_text
+    return cache
+
+def change_cached_scene(cache: SceneCache, change, change_type: str, scene_name: str, kwargs: dict):
+    '''
+    This function changes scenes the way Designer does, except that kept scenes are stored when they are left and
+    put back on the stack instead of being created again. Restored scenes don't get a starting event, only an
+    entering event, so anything that changed while they were away should be updated in an entering handler
+
+    Args:
+        cache (SceneCache): the scene cache
+        change: Designer's own scene change, used for scenes that aren't kept
+        change_type (str): 'replace', 'push', or 'pop'
+        scene_name (str): the name of the scene being changed to, None when popping
+        kwargs (dict): the keyword arguments given to the scene change
+
+    Returns:
+        None
+    '''
+    director = designer.GLOBAL_DIRECTOR
+    old_scene = director.current_scene
+    old_name = cache.names.get(old_scene)
+    if change_type in ('replace', 'pop') and old_name in cache.kept:
+        cache.scenes[old_name] = old_scene
+
+    if change_type == 'pop' or scene_name not in cache.scenes:
+        change(change_type, scene_name, kwargs)
+        if change_type != 'pop':
+            cache.names[director.current_scene] = scene_name
+        return
+
+    old_scene._handle_event('director.scene.exit', Event(world=old_scene._game_state, scene=old_scene, **kwargs))
+    if change_type == 'replace':
+        director._scenes.pop()
+    director._switch_scene()
+    del old_scene
+
+    scene = cache.scenes.pop(scene_name)
+    director._scenes.append(scene)
+    director.scene_name = scene_name
+    handle('director.scene.enter', Event(world=scene._game_state, scene=scene, **kwargs))
+    # Empty all events, like Designer does, so the click that changed scenes isn't handled again
+    pygame.event.get()
+    director._scene_changed = True
+
+@lru_cache(maxsize=TEXT_CACHE_SIZE)
+def render_text(font: pygame.font.Font, message: str, color: tuple[int, ...]) -> pygame.Surface:
+    '''
+    This function renders text once for each font, message, and color, as the same labels are drawn in every scene
+
+    Args:
+        font (pygame.font.Font): the font, Designer keeps one for each font name and size
+        message (str): the text being rendered
+        color (tuple[int, ...]): the color of the text
+
+    Returns:
+        pygame.Surface: the rendered text, which must not be drawn on
+    '''
+    return font.render(message, True, color)
+
+def redraw_cached_text(self: Text):
+    '''
+    This function replaces Text's redraw so text is copied from render_text instead of being rendered again
+
+    Args:
+        self (Text): the text being redrawn
+
+    Returns:
+        None
+    '''
+    text_surface = render_text(self._font, str(self.text), tuple(_process_color(self.color)))
+    target = InternalImage(size=text_surface.get_size())
+    target._surf.blit(text_surface, (0, 0))
+    self._default_redraw_transforms(target)
@@ -0,0 +1,118 @@
+import builtins
+import importlib.util
+import sys
+import time
+from dataclasses import dataclass
+from types import ModuleType
+
+TOP_IMPORTS = 15 # Modules shown in the import time report
+
+@dataclass
+class ImportTimer:
+    # Time spent importing each module, like python -X importtime but started from inside the game
+    start: float # perf_counter when the timer was started
+    times: dict[str, list[float]] # {module: [seconds in the module itself, seconds including what it imported]}
+    stack: list[list] # [[module, perf_counter when its import started, seconds spent importing other modules]]
+    reported: bool
+
+def start_import_timer() -> ImportTimer:
+    '''
+    This function starts timing every module imported for the first time from now on
+
+    Args:
+        None
+
+    Returns:
+        ImportTimer: the started timer
+    '''
+    timer = ImportTimer(time.perf_counter(), {}, [], False)
+    builtins.__import__ = wrap_import(timer, builtins.__import__)
+    return timer
+
+def wrap_import(timer: ImportTimer, function):
+    '''
+    This function wraps __import__ so the first import of each module is timed. Time spent importing other modules
+    from inside a module counts towards its total but not its own time
+
+    Args:
+        timer (ImportTimer): the import timer
+        function: the __import__ being wrapped
+
+    Returns:
+        the wrapped function
+    '''
+    def timed_import(name, globals=None, locals=None, fromlist=(), level=0):
+        if level > 0:
+            name = importlib.util.resolve_name("." * level + name, (globals or {}).get("__package__"))
+        if name in sys.modules:
+            return function(name, globals, locals, fromlist, 0)
+
+        timer.stack.append([name, time.perf_counter(), 0.0])
+        try:
+            return function(name, globals, locals, fromlist, 0)
+        finally:
+            _, started, children = timer.stack.pop()
+            elapsed = time.perf_counter() - started
+            timer.times[name] = [elapsed - children, elapsed]
+            if timer.stack:
+                timer.stack[-1][2] += elapsed
+    return timed_import
+
+def report_import_times(timer: ImportTimer):
+    '''
+    This function prints how long the game took to start and the modules that took the longest to import
+
+    Args:
+        timer (ImportTimer): the import timer
+
+    Returns:
+        None
+    '''
+    timer.reported = True
+    total = sum(own for own, _ in timer.times.values())
+    print("[imports]", len(timer.times), "modules imported in", round(total * 1000, 1), "ms, first frame after",
+          round((time.perf_counter() - timer.start) * 1000, 1), "ms")
+    print("[imports]      self | cumulative | module")
+    for name, (own, cumulative) in sorted(timer.times.items(), key=lambda item: -item[1][1])[:TOP_IMPORTS]:
+        print("[imports] {:9.1f} | {:10.1f} | {}".format(own * 1000, cumulative * 1000, name))
+
+def import_deferring(deferred: list[str], name: str) -> ModuleType:
+    '''
+    This function imports a module while making the imports of other modules fail, for modules that import
+    optional dependencies they don't need yet. The deferred modules can be imported normally afterwards
+
+    Args:
+        deferred (list[str]): the names of the modules whose import is deferred
+        name (str): the name of the module being imported
+
+    Returns:
+        ModuleType: the imported module
+    '''
+    blocked = [module for module in deferred if module not in sys.modules]
+    for module in blocked:
+        sys.modules[module] = None
+    try:
+        return __import__(name)
+    finally:
+        for module in blocked:
+            if sys.modules.get(module, 0) is None:
+                del sys.modules[module]
+
+def lazy_import(name: str) -> ModuleType:
+    '''
+    This function creates a module that is only imported the first time one of its attributes is used
+
+    Args:
+        name (str): the name of the module
+
+    Returns:
+        ModuleType: the module, imported when first used
+    '''
+    if name in sys.modules:
+        return sys.modules[name]
+    spec = importlib.util.find_spec(name)
+    spec.loader = importlib.util.LazyLoader(spec.loader)
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    spec.loader.exec_module(module)
+    return module
@@ -0,0 +1,412 @@
+from __future__ import annotations
+import argparse
+import bisect
+import json
+import os
+import socket
+import stat
+import threading
+from dataclasses import dataclass
+from queue import Queue
+from startup import lazy_import
+
+# Only the viewer draws, so the game doesn't need these to stream
+pygame = lazy_import("pygame")
+np = lazy_import("numpy")
+raster = lazy_import("raster")
+
+STREAM_VERSION = 1 # Changing the records a stream is made of must change this so old streams aren't misread
+KEYFRAME_FRAMES = 150 # Frames between keyframes, which hold every box so a viewer can start reading from them
+BACKGROUND = "white" # Color behind the boxes in the viewer, Designer's window color
+PAUSED = "paused" # Shown in the viewer's title while playback is paused
+
+@dataclass
+class StateStream:
+    # A stream of the world's state written as JSON lines. The first line describes the stream, after that each line
+    # is a frame holding only the boxes and angle that changed since the frame before, or a keyframe holding every
+    # box. Frames where nothing changed aren't written. All writes happen on a background thread so the game never
+    # waits for the file or the viewer
+    sink: object # The file or socket written to
+    boxes: list[list] # [x, y, z, x size, y size, z size, color] of each box last frame, centers and sizes in substeps
+    angle: list[float] # [x, y, z] angle last frame
+    scene: object # Object the boxes belong to, a keyframe is written when it changes
+    frame: int # Frames streamed so far
+    keyframe: int # The frame the last keyframe was written on
+    records: Queue # Records waiting to be written, None stops the writer
+    writer: threading.Thread
+    is_open: bool # False once the viewer reading the stream has gone away
+
+@dataclass
+class Playback:
+    # A stream being played back, rebuilt from the keyframe before any frame so it can be seeked to
+    header: dict # The first line of the stream
+    records: list[dict] # Every frame after the header, in order
+    frames: list[int] # The frame number of each record, to find records by frame
+    keyframes: list[int] # The index in records of each keyframe
+    position: int # The index in records of the last frame applied, -1 before the first
+    boxes: list[list] # [x, y, z, x size, y size, z size, color] of each box after the last frame applied
+    angle: list[float] # [x, y, z]
+
+def open_sink(path: str) -> object:
+    '''
+    This function opens what a stream is written to. A path that is a Unix socket, like one a viewer run with
+    --listen made, is connected to, any other path is written over as a file
+
+    Args:
+        path (str): the path of the file or socket
+
+    Returns:
+        object: the file or connected socket
+    '''
+    if os.path.exists(path) and stat.S_ISSOCK(os.stat(path).st_mode):
+        connection = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        connection.connect(path)
+        return connection.makefile("w")
+    return open(path, "w")
+
+def create_state_stream(path: str, substeps: int, scale: float, size: list[int],
+                        frames_per_second: int) -> StateStream:
+    '''
+    This function opens a stream and starts the thread writing to it, writing the line describing it first
+
+    Args:
+        path (str): the path of the file or socket
+        substeps (int): substeps per cell, so viewers can convert centers and sizes to cells
+        scale (float): the scale the game renders with
+        size (list[int]): the width and height of the game's window
+        frames_per_second (int): the frame rate the game runs at, frames are played back at this rate
+
+    Returns:
+        StateStream: the opened stream
+    '''
+    stream = StateStream(open_sink(path), [], [], None, 0, 0, Queue(), None, True)
+    stream.records.put({"version": STREAM_VERSION, "substeps": substeps, "scale": scale, "size": size,
+                        "fps": frames_per_second})
+    stream.writer = threading.Thread(target=write_stream, args=(stream,), daemon=True)
+    stream.writer.start()
+    return stream
+
+def write_stream(stream: StateStream):
+    '''
+    This function runs on the writer thread, writing records as they arrive. Records that arrive together are written
+    together. If the viewer reading a socket goes away the stream is closed and the rest of the records are dropped
+
+    Args:
+        stream (StateStream): the state stream
+
+    Returns:
+        None
+    '''
+    running = True
+    while running:
+        records = [stream.records.get()]
+        while not stream.records.empty():
+            records.append(stream.records.get())
+        if None in records:
+            running = False
+            records = [record for record in records if record is not None]
+        if not records or not stream.is_open:
+            continue
+
+        try:
+            stream.sink.write("".join(json.dumps(record, separators=(",", ":")) + "\n" for record in records))
+            stream.sink.flush()
+        except OSError:
+            stream.is_open = False
+
+def stream_frame(stream: StateStream, scene: object, boxes: list[list], angle: list[float]):
+    '''
+    This function queues the changes to the world since the last frame. A keyframe is queued instead when the scene
+    changes, like when a level is opened or reset, when the number of boxes changes, and every KEYFRAME_FRAMES frames
+
+    Args:
+        stream (StateStream): the state stream
+        scene (object): object the boxes belong to, a different one means the boxes are of a new world
+        boxes (list[list]): [x, y, z, x size, y size, z size, color] of each box, centers and sizes in substeps
+        angle (list[float]): the x, y, and z angle of the world
+
+    Returns:
+        None
+    '''
+    if not stream.is_open:
+        return
+    stream.frame += 1
+    # Changes are recorded by box index, so they can't describe boxes being added or removed
+    if (scene is not stream.scene or len(boxes) != len(stream.boxes) or
+            stream.frame - stream.keyframe >= KEYFRAME_FRAMES):
+        stream.records.put({"frame": stream.frame, "keyframe": True, "angle": list(angle), "boxes": boxes})
+        stream.scene = scene
+        stream.keyframe = stream.frame
+    else:
+        record = {"frame": stream.frame}
+        if angle != stream.angle:
+            record["angle"] = list(angle)
+        changed = [[index] + box for index, box in enumerate(boxes) if box != stream.boxes[index]]
+        if changed:
+            record["boxes"] = changed
+        if len(record) > 1:
+            stream.records.put(record)
+    stream.boxes = boxes
+    stream.angle = list(angle)
+
+def close_state_stream(stream: StateStream):
+    '''
+    This function waits for every queued record to be written, stops the writer thread, and closes the stream
+
+    Args:
+        stream (StateStream): the state stream
+
+    Returns:
+        None
+    '''
+    stream.records.put(None)
+    stream.writer.join()
+    try:
+        stream.sink.close()
+    except OSError:
+        pass
+
+def apply_record(boxes: list[list], angle: list[float], record: dict):
+    '''
+    This function applies one frame of a stream to the boxes and angle before it
+
+    Args:
+        boxes (list[list]): [x, y, z, x size, y size, z size, color] of each box, updated in place
+        angle (list[float]): [x, y, z] angle, updated in place
+        record (dict): the frame
+
+    Returns:
+        None
+    '''
+    if record.get("keyframe"):
+        boxes[:] = [list(box) for box in record["boxes"]]
+    else:
+        for box in record.get("boxes", []):
+            boxes[box[0]] = box[1:]
+    if "angle" in record:
+        angle[:] = record["angle"]
+
+def read_records(lines) -> tuple[dict, list[dict]]:
+    '''
+    This function reads the lines of a stream. A line cut off because the game was closed while writing it is dropped
+
+    Args:
+        lines: the lines of the stream, a file or anything else giving lines
+
+    Returns:
+        tuple[dict, list[dict]]: the header and each frame after it
+    '''
+    records = []
+    for line in lines:
+        try:
+            records.append(json.loads(line))
+        except ValueError:
+            pass
+    if not records or records[0].get("version") != STREAM_VERSION:
+        raise ValueError("not a version " + str(STREAM_VERSION) + " state stream")
+    return records[0], records[1:]
+
+def create_playback(header: dict, records: list[dict]) -> Playback:
+    '''
+    This function prepares a stream to be played back, indexing its keyframes
+
+    Args:
+        header (dict): the first line of the stream
+        records (list[dict]): each frame after the header
+
+    Returns:
+        Playback: the playback, before the first frame
+    '''
+    keyframes = [index for index, record in enumerate(records) if record.get("keyframe")]
+    return Playback(header, records, [record["frame"] for record in records], keyframes, -1, [], [0.0, 0.0, 0.0])
+
+def seek_playback(playback: Playback, frame: int):
+    '''
+    This function moves a playback to the last frame written at or before the given frame, rebuilding it from the
+    keyframe before that frame
+
+    Args:
+        playback (Playback): the playback
+        frame (int): the frame moved to
+
+    Returns:
+        None
+    '''
+    position = bisect.bisect_right(playback.frames, frame) - 1
+    keyframe = bisect.bisect_right(playback.keyframes, position) - 1
+    if keyframe < 0:
+        playback.position = -1
+        playback.boxes = []
+        return
+    start = playback.keyframes[keyframe]
+    # Playing forward from the frame already applied is quicker than going back to the keyframe
+    if start <= playback.position <= position:
+        start = playback.position + 1
+    for record in playback.records[start:position + 1]:
+        apply_record(playback.boxes, playback.angle, record)
+    playback.position = position
+
+def draw_state(frame: raster.RasterFrame, header: dict, boxes: list[list], angle: list[float]):
+    '''
+    This function draws the boxes of a frame the way the raster backend draws the game
+
+    Args:
+        frame (raster.RasterFrame): the frame drawn into
+        header (dict): the first line of the stream
+        boxes (list[list]): [x, y, z, x size, y size, z size, color] of each box
+        angle (list[float]): [x, y, z] angle
+
+    Returns:
+        None
+    '''
+    if not boxes:
+        return
+    cells = np.array([box[:6] for box in boxes], dtype=float) / header["substeps"]
+    size = header["size"]
+    raster.draw_boxes(frame, [None] * len(boxes), cells[:, :3], cells[:, 3:], [box[6] for box in boxes], angle,
+                      header["scale"], [size[0] / 2, size[1] / 2])
+
+def create_viewer(header: dict) -> tuple[pygame.Surface, raster.RasterFrame]:
+    '''
+    This function opens a window the size of the game's to show a stream in
+
+    Args:
+        header (dict): the first line of the stream
+
+    Returns:
+        tuple[pygame.Surface, raster.RasterFrame]: the window and the frame boxes are drawn into
+    '''
+    pygame.init()
+    window = pygame.display.set_mode(header["size"])
+    frame = raster.create_offscreen_frame(pygame.Surface(header["size"], pygame.SRCALPHA, 32))
+    return window, frame
+
+def show_frame(window: pygame.Surface, frame: raster.RasterFrame, title: str):
+    '''
+    This function shows the frame drawn last in the window
+
+    Args:
+        window (pygame.Surface): the window
+        frame (raster.RasterFrame): the frame the boxes were drawn into
+        title (str): the window's title
+
+    Returns:
+        None
+    '''
+    window.fill(BACKGROUND)
+    window.blit(frame.surface, (0, 0))
+    pygame.display.set_caption(title)
+    pygame.display.flip()
+
+def play_stream(path: str, speed: float, start: int):
+    '''
+    This function plays a stream saved in a file. Space pauses, the left and right arrows seek to the keyframe
+    before or after the frame shown, and up and down change the speed
+
+    Args:
+        path (str): the path of the file
+        speed (float): how many times faster than the game the stream is played
+        start (int): the frame playback starts from
+
+    Returns:
+        None
+    '''
+    with open(path) as lines:
+        header, records = read_records(lines)
+    if not records:
+        print("[stream]", path, "has no frames")
+        return
+    playback = create_playback(header, records)
+    window, frame = create_viewer(header)
+    clock = pygame.time.Clock()
+    shown = max(start, records[0]["frame"])
+    last = records[-1]["frame"]
+    is_paused = False
+    while True:
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT:
+                return
+            if event.type == pygame.KEYDOWN:
+                keyframes = [playback.frames[index] for index in playback.keyframes]
+                if event.key == pygame.K_SPACE:
+                    is_paused = not is_paused
+                elif event.key == pygame.K_LEFT:
+                    # The keyframe the shown frame was built from is skipped unless it is being shown
+                    shown = keyframes[max(bisect.bisect_left(keyframes, int(shown)) - 1, 0)]
+                elif event.key == pygame.K_RIGHT:
+                    shown = keyframes[min(bisect.bisect_right(keyframes, int(shown)), len(keyframes) - 1)]
+                elif event.key == pygame.K_UP:
+                    speed *= 2
+                elif event.key == pygame.K_DOWN:
+                    speed /= 2
+
+        seek_playback(playback, int(shown))
+        draw_state(frame, header, playback.boxes, playback.angle)
+        show_frame(window, frame, " ".join(["frame", str(int(shown)), "of", str(last), "at", str(speed) + "x"] +
+                                          [PAUSED] * is_paused))
+        clock.tick(header["fps"])
+        if not is_paused:
+            shown = min(shown + speed, last)
+
+def watch_stream(path: str, archive: str):
+    '''
+    This function makes a Unix socket for a game run with --stream-state to connect to and shows its frames as they
+    arrive, saving them to an archive too if given one
+
+    Args:
+        path (str): the path the socket is made at
+        archive (str): the path of the file the stream is saved to, None to not save it
+
+    Returns:
+        None
+    '''
+    if os.path.exists(path):
+        os.unlink(path)
+    server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    server.bind(path)
+    server.listen(1)
+    print("[stream] waiting for a game run with --stream-state", path)
+    connection, _ = server.accept()
+    saved = open(archive, "w") if archive else None
+    boxes = []
+    angle = [0.0, 0.0, 0.0]
+    try:
+        lines = connection.makefile("r")
+        first = lines.readline()
+        header, _ = read_records([first])
+        if saved:
+            saved.write(first)
+        window, frame = create_viewer(header)
+        # Frames arrive about as fast as the game makes them, so each line is shown as soon as it is read
+        for line in lines:
+            if saved:
+                saved.write(line)
+            record = json.loads(line)
+            apply_record(boxes, angle, record)
+            draw_state(frame, header, boxes, angle)
+            show_frame(window, frame, "frame " + str(record["frame"]) + " live")
+            if any(event.type == pygame.QUIT for event in pygame.event.get()):
+                return
+        print("[stream] the game closed the stream")
+    finally:
+        if saved:
+            saved.close()
+        connection.close()
+        server.close()
+        os.unlink(path)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Watch the state stream of a game run with --stream-state")
+    parser.add_argument("path", help="the stream file to play, or the socket to make with --listen")
+    parser.add_argument("--listen", action="store_true", help="make a socket at the path and show a game live")
+    parser.add_argument("--archive", help="with --listen, also save the stream to this file")
+    parser.add_argument("--speed", type=float, default=1.0, help="how many times faster than the game to play")
+    parser.add_argument("--seek", type=int, default=0, help="the frame to start playing from")
+    arguments = parser.parse_args()
+    try:
+        if arguments.listen:
+            watch_stream(arguments.path, arguments.archive)
+        else:
+            play_stream(arguments.path, arguments.speed, arguments.seek)
+    except ValueError as error:
+        print("[stream]", arguments.path, "is", error)
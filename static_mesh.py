@@ -0,0 +1,174 @@
+from dataclasses import dataclass
+
+# Signs of each of a box's 8 corners from its center, in the same order as generate_points. Up is negative y
+CORNER_SIGNS = [[-1, -1, 1], [1, -1, 1], [1, 1, 1], [-1, 1, 1], [-1, -1, -1], [1, -1, -1], [1, 1, -1], [-1, 1, -1]]
+# Corners of each of a box's 6 faces and 12 lines, in the same order create_box_objects draws them
+BOX_FACES = [(0, 1, 2, 3), (4, 5, 6, 7)] + [(p, (p + 1) % 4, (p + 1) % 4 + 4, p + 4) for p in range(4)]
+BOX_LINES = [line for p in range(4) for line in [(p, (p + 1) % 4), (p + 4, (p + 1) % 4 + 4), (p, p + 4)]]
+
+@dataclass
+class StaticParts:
+    # The parts of one white box that can be seen once it is joined to the white boxes and base around it
+    faces: list[tuple[int, int, int, int]] # Corners of each face not covered by another white box or the base
+    lines: list[tuple[int, int]] # Corners of each line on an outer edge, lines inside a flat wall are left out
+    vertices: list[int] # Each corner where two or more of those lines meet
+
+@dataclass
+class StaticBlock:
+    # Adjacent white boxes merged into one box
+    low: list[int] # [x, y, z] smallest cell in the block
+    high: list[int] # [x, y, z] largest cell in the block
+    hidden: list[bool] # True for each face, in the order of BOX_FACES, covered by other white boxes or the base
+
+@dataclass
+class StaticMesh:
+    # The white boxes of a level compiled once when it is opened, as white boxes never move. Renderers with a depth
+    # buffer draw the merged blocks, renderers that sort boxes by their centers can't order boxes bigger than a cell,
+    # so they draw each white box with only its parts
+    blocks: list[StaticBlock]
+    parts: dict[tuple[int, int, int], StaticParts] # {cell: parts} of each white box
+
+def get_normal(face: tuple[int, int, int, int]) -> list[int]:
+    '''
+    This function finds the direction a face points in, the sign all its corners share on one axis
+
+    Args:
+        face (tuple[int, int, int, int]): the corners of the face
+
+    Returns:
+        list[int]: the x, y, and z direction of the face
+    '''
+    return [CORNER_SIGNS[face[0]][axis] if all(CORNER_SIGNS[corner][axis] == CORNER_SIGNS[face[0]][axis]
+                                               for corner in face) else 0 for axis in range(3)]
+
+NORMALS = [get_normal(face) for face in BOX_FACES] # Direction of each face
+
+def is_covered(cells: set[tuple[int, int, int]], cell: tuple[int, int, int], face: int, floor: int,
+               base: list[int]) -> bool:
+    '''
+    This function checks if a face of a white box is against another white box or, for the bottom face of a box on
+    the floor, the base. The base is centered under the level, so a box near its edge can hang partly off it
+
+    Args:
+        cells (set[tuple[int, int, int]]): the cells of every white box
+        cell (tuple[int, int, int]): the cell of the white box
+        face (int): the index of the face in BOX_FACES
+        floor (int): the lowest layer boxes can rest on, the base is the layer below it
+        base (list[int]): the x and z width of the base
+
+    Returns:
+        bool: True if the face can never be seen, else returns False
+    '''
+    neighbor = tuple(cell[axis] + NORMALS[face][axis] for axis in range(3))
+    if neighbor in cells:
+        return True
+    return neighbor[1] > floor and abs(cell[0]) * 2 + 1 <= base[0] and abs(cell[2]) * 2 + 1 <= base[1]
+
+def get_static_parts(cells: set[tuple[int, int, int]], cell: tuple[int, int, int], floor: int,
+                     base: list[int]) -> StaticParts:
+    '''
+    This function finds the parts of a white box that can be seen. A line is left out if both its faces are covered,
+    or if it is the seam between the box and the white box beside it on a flat side both of them show
+
+    Args:
+        cells (set[tuple[int, int, int]]): the cells of every white box
+        cell (tuple[int, int, int]): the cell of the white box
+        floor (int): the lowest layer boxes can rest on, the base is the layer below it
+        base (list[int]): the x and z width of the base
+
+    Returns:
+        StaticParts: the faces, lines, and corners of the box that are drawn
+    '''
+    covered = [is_covered(cells, cell, face, floor, base) for face in range(len(BOX_FACES))]
+    lines = []
+    for line in BOX_LINES:
+        sides = [face for face in range(len(BOX_FACES)) if line[0] in BOX_FACES[face] and line[1] in BOX_FACES[face]]
+        if all(covered[face] for face in sides):
+            continue
+        seam = False
+        for face, other in [sides, sides[::-1]]:
+            neighbor = tuple(cell[axis] + NORMALS[face][axis] for axis in range(3))
+            if covered[face] and not covered[other] and neighbor in cells:
+                seam = not is_covered(cells, neighbor, other, floor, base)
+        if not seam:
+            lines.append(line)
+    vertices = [corner for corner in range(len(CORNER_SIGNS)) if sum(corner in line for line in lines) >= 2]
+    return StaticParts([BOX_FACES[face] for face in range(len(BOX_FACES)) if not covered[face]], lines, vertices)
+
+def merge_cells(cells: set[tuple[int, int, int]]) -> list[list[list[int]]]:
+    '''
+    This function greedily merges cells into as few boxes as it can. Starting from the lowest uncovered cell, a block
+    is stretched along x as far as the cells go, then along z while every cell in the next row is there, then along y
+    while every cell in the next layer is there
+
+    Args:
+        cells (set[tuple[int, int, int]]): the cells being merged
+
+    Returns:
+        list[list[list[int]]]: the smallest and largest cell of each block
+    '''
+    remaining = set(cells)
+    blocks = []
+    for cell in sorted(cells, key=lambda cell: [-cell[1], cell[2], cell[0]]):
+        if cell not in remaining:
+            continue
+        low = list(cell)
+        high = list(cell)
+        for axis in [0, 2, 1]:
+            # Layers above are more negative y, so blocks grow upwards
+            step = -1 if axis == 1 else 1
+            while True:
+                edge = high[axis] + step if step > 0 else low[axis] + step
+                ranges = [range(low[other], high[other] + 1) if other != axis else [edge] for other in range(3)]
+                layer = [(x, y, z) for x in ranges[0] for y in ranges[1] for z in ranges[2]]
+                if not all(neighbor in remaining for neighbor in layer):
+                    break
+                if step > 0:
+                    high[axis] = edge
+                else:
+                    low[axis] = edge
+        for x in range(low[0], high[0] + 1):
+            for y in range(low[1], high[1] + 1):
+                for z in range(low[2], high[2] + 1):
+                    remaining.discard((x, y, z))
+        blocks.append([low, high])
+    return blocks
+
+def is_block_face_covered(cells: set[tuple[int, int, int]], low: list[int], high: list[int], face: int,
+                          floor: int, base: list[int]) -> bool:
+    '''
+    This function checks if a whole face of a block is against white boxes or the base
+
+    Args:
+        cells (set[tuple[int, int, int]]): the cells of every white box
+        low (list[int]): the smallest cell in the block
+        high (list[int]): the largest cell in the block
+        face (int): the index of the face in BOX_FACES
+        floor (int): the lowest layer boxes can rest on, the base is the layer below it
+        base (list[int]): the x and z width of the base
+
+    Returns:
+        bool: True if the face can never be seen, else returns False
+    '''
+    normal = NORMALS[face]
+    axis = [index for index in range(3) if normal[index]][0]
+    side = high if normal[axis] > 0 else low
+    ranges = [range(low[other], high[other] + 1) if other != axis else [side[axis]] for other in range(3)]
+    return all(is_covered(cells, (x, y, z), face, floor, base) for x in ranges[0] for y in ranges[1] for z in ranges[2])
+
+def compile_static_mesh(cells: list[list[int]], floor: int, base: list[int]) -> StaticMesh:
+    '''
+    This function compiles the white boxes of a level into merged blocks and the parts of each box
+
+    Args:
+        cells (list[list[int]]): the x, y, and z cell of each white box
+        floor (int): the lowest layer boxes can rest on, the base is the layer below it
+        base (list[int]): the x and z width of the base
+
+    Returns:
+        StaticMesh: the compiled mesh
+    '''
+    cells = {tuple(cell) for cell in cells}
+    blocks = [StaticBlock(low, high, [is_block_face_covered(cells, low, high, face, floor, base)
+                                      for face in range(len(BOX_FACES))]) for low, high in merge_cells(cells)]
+    return StaticMesh(blocks, {cell: get_static_parts(cells, cell, floor, base) for cell in cells})
@@ -0,0 +1,95 @@
+from fuzz import load_rules, create_reference_game, activate_reference_game, close_reference_game
+
+def play(level: list, clicks: list[int]) -> tuple[list[list[int]], bool, list[int]]:
+    '''
+    This function plays a level with the game's own functions and checks boxes are indexed in their cells, and only
+    there
+
+    Args:
+        level (list): the level in the levels.py format
+        clicks (list[int]): the index of each red box clicked, in create_level's order
+
+    Returns:
+        tuple[list[list[int]], bool, list[int]]: the sorted cell of each blue box, whether the level is won, and the
+        index of the blue box indexed in each of their cells
+    '''
+    game = create_reference_game(level)
+    try:
+        for index in clicks:
+            activate_reference_game(game, index)
+        world = game.world
+        if not world.is_scaling:
+            assert set(world.cell_index) == {tuple(box.cell) for type in world.boxes[:3] for box in type}
+        cells = sorted(box.cell for box in world.boxes[2])
+        indexes = {id(box): index for index, box in enumerate(world.boxes[2])}
+        owners = [indexes[id(world.cell_index[tuple(cell)])] for cell in cells]
+        return cells, game.won, owners
+    finally:
+        close_reference_game(game)
+
+def test_blue_boxes_push_like_baseline():
+    # Played in the original game, a blue box moving beside another starts it moving without moving it
+    level = [['r', 'w', ' ', 'r', ' ', ' '],
+             [' ', ' ', ' ', 'r', ' ', 'b'],
+             ['w', ' ', 'r', 'r', 'b', ' '],
+             ['b', 'b', 'g', 'g', 'g', 'g'],
+             ['b', 'r', 'b', 'b', 'b', ' '],
+             ['w', 'b', 'b', 'b', 'r', ' ']]
+    assert play(level, [1])[:2] == ([[-4, 0, -2], [-3, 0, -1], [-2, 0, -5], [-2, 0, -1], [-1, 0, -3], [-1, 0, -2],
+                                 [0, 0, -3], [0, 0, -2], [1, 0, -2], [1, 0, 0], [2, 0, 1]], False)
+
+def test_blue_boxes_only_push_their_own_layer():
+    level = [[['w', 'w', 'b', ' ', ' ', 'g']],
+             [['r', 'b', ' ', ' ', ' ', ' ']]]
+    assert play(level, [0])[:2] == ([[-1, -1, 0], [-1, 0, 0]], False)
+
+def test_pushed_blue_box_fills_green_box():
+    assert play([['b'], [' '], ['r'], ['b'], ['g']], [0])[:2] == ([[0, 0, -2], [0, 0, 2]], True)
+
+def test_replayed_outcome_matches_pushing():
+    # Two blue boxes end up in one cell, the box indexed there is the last one that stopped
+    level = [['b', 'b', ' ', 'g', 'r', 'r'],
+             ['b', 'b', ' ', ' ', ' ', ' '],
+             ['r', 'r', ' ', 'b', 'r', ' '],
+             [' ', 'w', 'g', ' ', ' ', ' '],
+             ['r', ' ', ' ', ' ', ' ', ' ']]
+    load_rules().outcome_cache.outcomes.clear()
+    pushed = play(level, [5, 1])
+    assert play(level, [5, 1]) == pushed
+
+def reload_level(monkeypatch, level_list: list) -> tuple[object, list[str], list]:
+    '''
+    This function opens the first level and reloads it after levels.py is changed to the levels given
+
+    Args:
+        monkeypatch: pytest's monkeypatch fixture
+        level_list (list): the levels levels.py is changed to
+
+    Returns:
+        tuple[object, list[str], list]: the world that was reloaded, the scenes changed to, and the cells of its boxes
+        before it was reloaded
+    '''
+    rules = load_rules()
+    scenes = []
+    monkeypatch.setattr(rules, "level_number", 0)
+    monkeypatch.setattr(rules, "check_level_file", lambda: [0])
+    monkeypatch.setattr(rules, "change_scene", scenes.append)
+    game = create_reference_game([['r', 'b', ' ', 'g']])
+    cells = [list(box.cell) for type in game.world.boxes for box in type]
+    monkeypatch.setattr(rules.levels, "levels", level_list)
+    try:
+        rules.reload_game_level(game.world)
+    finally:
+        close_reference_game(game)
+    return game.world, scenes, cells
+
+def test_removed_level_returns_to_menu(monkeypatch, capsys):
+    _, scenes, _ = reload_level(monkeypatch, [])
+    assert scenes == ['level_menu']
+    assert "could not rebuild level 1" in capsys.readouterr().out
+
+def test_malformed_level_keeps_old_level(monkeypatch, capsys):
+    world, scenes, cells = reload_level(monkeypatch, [[None]])
+    assert scenes == []
+    assert [list(box.cell) for type in world.boxes for box in type] == cells
+    assert "could not rebuild level 1" in capsys.readouterr().out
@@ -0,0 +1,15 @@
+import json
+from state_stream import create_state_stream, stream_frame, close_state_stream
+
+def test_box_count_change_writes_keyframe(tmp_path):
+    path = str(tmp_path / "stream.jsonl")
+    stream = create_state_stream(path, 10, 1.0, [800, 600], 60)
+    scene = object()
+    box = [0, 0, 0, 10, 10, 10, "blue"]
+    stream_frame(stream, scene, [box, box], [0, 0, 0])
+    stream_frame(stream, scene, [box], [0, 0, 0])
+    stream_frame(stream, scene, [box, box, box], [0, 0, 0])
+    close_state_stream(stream)
+    with open(path) as file:
+        records = [json.loads(line) for line in file][1:]
+    assert [(record["keyframe"], len(record["boxes"])) for record in records] == [(True, 2), (True, 1), (True, 3)]
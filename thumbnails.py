@@ -0,0 +1,170 @@
+import hashlib
+import json
+import os
+import pygame
+from concurrent.futures import Future, ProcessPoolExecutor
+from dataclasses import dataclass
+from designer import DesignerObject, image
+from designer.core.internal_image import InternalImage
+from startup import lazy_import
+from voxels import occupied_voxels, parse_level, get_level_size, CODES
+
+THUMBNAIL_VERSION = 1 # Changing how thumbnails look must change this so old cached thumbnails are rebuilt
+THUMBNAIL_SIZE = 44 # Width and height of a thumbnail in pixels
+SUPERSAMPLING = 4 # Thumbnails are drawn this many times larger and shrunk down so lines and dots stay thin
+THUMBNAIL_ANGLE = [0.3, 0.3, 0.0] # The x, y, and z angle levels are shown from, the same as a new level
+COLOR_NAMES = {"r": "red", "w": "white", "b": "blue", "g": "green"}
+
+# Thumbnails are only drawn in worker processes, so the level menu doesn't need these
+np = lazy_import("numpy")
+raster = lazy_import("raster")
+
+@dataclass
+class ThumbnailCache:
+    # Level previews saved on disk by the hash of the level, drawn in other processes so the menu never waits
+    folder: str
+    pool: ProcessPoolExecutor # Created the first time a thumbnail has to be drawn
+    pending: dict[str, Future] # {key: drawing job} for thumbnails being drawn
+    failed: set[str] # Keys of thumbnails that couldn't be drawn, which aren't tried again
+
+def create_thumbnail_cache(folder: str) -> ThumbnailCache:
+    '''
+    This function creates a thumbnail cache saving into the given folder
+
+    Args:
+        folder (str): the folder thumbnails are saved in, created if it doesn't exist
+
+    Returns:
+        ThumbnailCache: the created cache
+    '''
+    return ThumbnailCache(folder, None, {}, set())
+
+def get_thumbnail_key(level: list) -> str:
+    '''
+    This function hashes a level's contents along with everything that changes how its thumbnail looks, so a
+    thumbnail is only rebuilt when its level changes
+
+    Args:
+        level (list): the level from levels.py
+
+    Returns:
+        str: the hex digest identifying the level's thumbnail
+    '''
+    contents = json.dumps([THUMBNAIL_VERSION, THUMBNAIL_SIZE, level])
+    return hashlib.sha256(contents.encode()).hexdigest()
+
+def render_thumbnail(level: list, size: int) -> pygame.Surface:
+    '''
+    This function draws a level the way it looks when it is first opened, using the raster backend offscreen
+
+    Args:
+        level (list): the level from levels.py
+        size (int): the width and height of the thumbnail in pixels
+
+    Returns:
+        pygame.Surface: the drawn thumbnail
+    '''
+    voxels, cells = parse_level(level, [0, 0], 0)
+    colors = ["green"] * len(cells)
+    names = {code: COLOR_NAMES[character] for character, code in CODES.items()}
+    for cell, code in occupied_voxels(voxels):
+        cells.append(cell)
+        colors.append(names[code])
+
+    # The base sits under the level, with the level centered on the origin
+    width, depth = get_level_size(level)
+    offset = np.array([(width - 1) / 2, 0, (depth - 1) / 2])
+    centers = np.array([[0, 1, 0]] + [list(np.array(cell) - offset) for cell in cells], dtype=float)
+    sizes = np.array([[width, 1, depth]] + [[1, 1, 1]] * len(cells), dtype=float)
+
+    large = size * SUPERSAMPLING
+    surface = pygame.Surface((large, large), pygame.SRCALPHA, 32)
+    frame = raster.create_offscreen_frame(surface)
+    # A level seen from THUMBNAIL_ANGLE is about 1.3 times as wide as its base
+    scale = large / (1.3 * max(width, depth))
+    raster.draw_boxes(frame, [None] * len(centers), centers, sizes, ["white"] + colors, THUMBNAIL_ANGLE, scale,
+               [large / 2, large / 2])
+    return pygame.transform.smoothscale(surface, (size, size))
+
+def save_thumbnail(level: list, path: str) -> str:
+    '''
+    This function draws a level's thumbnail and saves it, run in a worker process. The thumbnail is written to a
+    temporary file first so a half written file is never loaded
+
+    Args:
+        level (list): the level from levels.py
+        path (str): where the thumbnail is saved
+
+    Returns:
+        str: the path the thumbnail was saved to
+    '''
+    temporary_path = path + "." + str(os.getpid()) + ".png"
+    pygame.image.save(render_thumbnail(level, THUMBNAIL_SIZE), temporary_path)
+    os.replace(temporary_path, path)
+    return path
+
+def request_thumbnail(cache: ThumbnailCache, level: list) -> str:
+    '''
+    This function finds a level's thumbnail on disk, starting to draw it in the background if it isn't there
+
+    Args:
+        cache (ThumbnailCache): the thumbnail cache
+        level (list): the level from levels.py
+
+    Returns:
+        str: the path of the thumbnail, None if it is still being drawn or couldn't be drawn
+    '''
+    key = get_thumbnail_key(level)
+    if key in cache.failed:
+        return None
+    if key in cache.pending:
+        if not cache.pending[key].done():
+            return None
+        try:
+            return cache.pending.pop(key).result()
+        except Exception as error:
+            # A level that can't be drawn, like one saved half edited while levels are being reloaded, is shown
+            # without a preview rather than stopping the menu
+            print("[thumbnails] could not draw a thumbnail:", repr(error))
+            cache.failed.add(key)
+            return None
+
+    path = os.path.join(cache.folder, key + ".png")
+    if os.path.exists(path):
+        return path
+    if cache.pool is None:
+        os.makedirs(cache.folder, exist_ok=True)
+        cache.pool = ProcessPoolExecutor()
+    cache.pending[key] = cache.pool.submit(save_thumbnail, level, path)
+    return None
+
+def check_thumbnail_failed(cache: ThumbnailCache, level: list) -> bool:
+    '''
+    This function checks if a level's thumbnail couldn't be drawn
+
+    Args:
+        cache (ThumbnailCache): the thumbnail cache
+        level (list): the level from levels.py
+
+    Returns:
+        bool: True if drawing the thumbnail failed, else returns False
+    '''
+    return get_thumbnail_key(level) in cache.failed
+
+def create_thumbnail_image(path: str, x: float, y: float) -> DesignerObject:
+    '''
+    This function shows a saved thumbnail. The image is loaded directly, as Designer's image function can't load
+    absolute paths
+
+    Args:
+        path (str): the path of the thumbnail
+        x (float): the x position of the thumbnail
+        y (float): the y position of the thumbnail
+
+    Returns:
+        DesignerObject: the image of the thumbnail
+    '''
+    thumbnail = image([[(0, 0, 0, 0)]], x, y)
+    thumbnail._internal_image = InternalImage(filename=path)
+    thumbnail._redraw_internal_image()
+    return thumbnail
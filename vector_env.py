@@ -0,0 +1,475 @@
+import math as m
+import numpy as np
+from dataclasses import dataclass
+from voxels import occupied_voxels, parse_level, get_layers, get_level_size, EMPTY, RED, WHITE, BLUE, GREEN
+from deadlock import create_deadlock_table
+
+MARGIN = 3 # Empty cells added to a side of the grid each time a blue box is pushed past it
+HEADROOM = 2 # Layers added above each level, a red box grows 2 cells upward
+SUBSTEPS = 10 # Substeps per cell blue box offsets are stored in, the same as main.py
+FRAMES = 10 # Frames a red box pushes blue boxes for, it grows from SUBSTEPS by SCALE_SPEED each frame in main.py
+PUSH_SPEED = 1 # Substeps a blue box pushed by a red box moves each frame, half of main.py's SCALE_SPEED
+
+@dataclass
+class VectorEnv:
+    # Many independent puzzle instances stored as stacked arrays so every instance is stepped at once. Cells are
+    # indexed [instance, layer, row, column] with layer 0 being the floor and layers counting upward. Blue boxes are
+    # kept by index like the game keeps them, as two can end up in one cell and pushing depends on their order
+    start_codes: np.ndarray # (instances, layers, rows, columns) voxel codes each instance resets to
+    codes: np.ndarray # (instances, layers, rows, columns) current voxel codes, the same as the game's voxel grid
+    statics: np.ndarray # (instances, layers, rows, columns) codes of the red and white boxes, which never move
+    start_owners: np.ndarray # (instances, layers, rows, columns) owners each instance resets to
+    owners: np.ndarray # (instances, layers, rows, columns) index of the blue box indexed in each cell, -1 if none
+    goals: np.ndarray # (instances, layers, rows, columns) True where there is a green box
+    reach: np.ndarray # (instances, most green boxes, layers, rows, columns) True where a blue box can reach each green
+    red_cells: np.ndarray # (instances, most red boxes, 3) layer, row, and column of each red box, padded with -1
+    red_counts: np.ndarray # (instances,) number of red boxes in each instance
+    start_blue_cells: np.ndarray # (instances, most blue boxes, 3) cells each instance's blue boxes reset to
+    blue_cells: np.ndarray # (instances, most blue boxes, 3) layer, row, and column of each blue box in create_level's
+                           # order, padded with 0
+    blue_offsets: np.ndarray # (instances, most blue boxes, 3) substeps each blue box has moved from its cell
+    blue_movement: np.ndarray # (instances, most blue boxes, 3) substeps each blue box moves each time it is advanced
+    blue_moving: np.ndarray # (instances, most blue boxes) True for blue boxes that are being pushed
+    blue_counts: np.ndarray # (instances,) number of blue boxes in each instance
+    scaled_up: np.ndarray # (instances,) index of the scaled up red box in red_cells, -1 if there is none
+    done: np.ndarray # (instances,) True once every green box in the instance is filled
+    steps: np.ndarray # (instances,) activations made since the last reset
+    origin: list[int] # [row, column] index of the first row and column of every level, which grows as empty cells are
+                      # added before them
+    centers: np.ndarray # (instances, 2) [row, column] of the cell create_level places at 0, 0, counted from the origin
+
+def create_vector_env(levels: list) -> VectorEnv:
+    '''
+    This function creates a vector environment with one instance for each level given. The same level can be given
+    more than once to run many copies of it. Every instance is padded to the same shape with empty cells. Cells are
+    placed with parse_level as [column, -layer, row], so the grid and deadlock functions can be used on them
+
+    Args:
+        levels (list): the levels from levels.py, one for each instance
+
+    Returns:
+        VectorEnv: the created environment, already reset
+    '''
+    parsed = [parse_level(level, [0, 0], 0) for level in levels]
+    layers = max(len(get_layers(level)) for level in levels) + HEADROOM
+    sizes = [get_level_size(level) for level in levels]
+    rows = max(level_rows for _, level_rows in sizes) + 2 * MARGIN
+    columns = max(level_columns for level_columns, _ in sizes) + 2 * MARGIN
+    most_reds = max([sum(1 for _, code in occupied_voxels(voxels) if code == RED) for voxels, _ in parsed] + [1])
+    most_blues = max([sum(1 for _, code in occupied_voxels(voxels) if code == BLUE) for voxels, _ in parsed] + [1])
+    most_greens = max([len(green_cells) for _, green_cells in parsed] + [1])
+
+    start_codes = np.zeros((len(levels), layers, rows, columns), dtype=np.int8)
+    start_owners = np.full((len(levels), layers, rows, columns), -1, dtype=np.int64)
+    goals = np.zeros((len(levels), layers, rows, columns), dtype=bool)
+    reach = np.zeros((len(levels), most_greens, layers, rows, columns), dtype=bool)
+    red_cells = np.full((len(levels), most_reds, 3), -1, dtype=np.int64)
+    red_counts = np.zeros(len(levels), dtype=np.int64)
+    start_blue_cells = np.zeros((len(levels), most_blues, 3), dtype=np.int64)
+    blue_counts = np.zeros(len(levels), dtype=np.int64)
+    centers = np.zeros((len(levels), 2), dtype=np.int64)
+    for instance, ((voxels, green_cells), level, (level_columns, level_rows)) in enumerate(zip(parsed, levels, sizes)):
+        # Sorted by layer, then row, then column so boxes are numbered in the order create_level makes them
+        for cell, code in sorted(occupied_voxels(voxels), key=lambda voxel: [-voxel[0][1], voxel[0][2], voxel[0][0]]):
+            start_codes[instance, -cell[1], cell[2] + MARGIN, cell[0] + MARGIN] = code
+            if code == RED:
+                red_cells[instance, red_counts[instance]] = [-cell[1], cell[2] + MARGIN, cell[0] + MARGIN]
+                red_counts[instance] += 1
+            elif code == BLUE:
+                start_blue_cells[instance, blue_counts[instance]] = [-cell[1], cell[2] + MARGIN, cell[0] + MARGIN]
+                start_owners[instance, -cell[1], cell[2] + MARGIN, cell[0] + MARGIN] = blue_counts[instance]
+                blue_counts[instance] += 1
+        for cell in green_cells:
+            goals[instance, -cell[1], cell[2] + MARGIN, cell[0] + MARGIN] = True
+
+        # Cells are counted from where create_level places them when it is given the level's size as its base
+        centers[instance] = [m.floor(level_rows / 2), m.floor(level_columns / 2)]
+        table = create_deadlock_table(voxels, green_cells, [0, 1 - len(get_layers(level)), 0],
+                                      [level_columns - 1, 0, level_rows - 1], 0, HEADROOM)
+        for green, found in enumerate(table.reach.values()):
+            for cell in found:
+                reach[instance, green, -cell[1], cell[2] + MARGIN, cell[0] + MARGIN] = True
+
+    statics = np.where(start_codes == BLUE, EMPTY, start_codes).astype(np.int8)
+    env = VectorEnv(start_codes, start_codes.copy(), statics, start_owners, start_owners.copy(), goals, reach,
+                    red_cells, red_counts, start_blue_cells, start_blue_cells.copy(),
+                    np.zeros(start_blue_cells.shape, dtype=np.int64), np.zeros(start_blue_cells.shape, dtype=np.int64),
+                    np.zeros(start_blue_cells.shape[:2], dtype=bool), blue_counts,
+                    np.full(len(levels), -1, dtype=np.int64), np.zeros(len(levels), dtype=bool),
+                    np.zeros(len(levels), dtype=np.int64), [MARGIN, MARGIN], centers)
+    reset(env)
+    return env
+
+def observe(env: VectorEnv) -> np.ndarray:
+    '''
+    This function builds the observation of every instance, the voxel codes with GREEN in every unfilled green cell
+
+    Args:
+        env (VectorEnv): the environment being observed
+
+    Returns:
+        np.ndarray: (instances, layers, rows, columns) voxel codes of every instance
+    '''
+    observations = env.codes.copy()
+    observations[env.goals & (env.codes == EMPTY)] = GREEN
+    return observations
+
+def check_solved(env: VectorEnv) -> np.ndarray:
+    '''
+    This function checks which instances have a blue box in every green cell, like detect_win
+
+    Args:
+        env (VectorEnv): the environment being checked
+
+    Returns:
+        np.ndarray: (instances,) True for every solved instance
+    '''
+    return ~(env.goals & (env.codes != BLUE)).any(axis=(1, 2, 3))
+
+def find_deadlocked(env: VectorEnv) -> np.ndarray:
+    '''
+    This function finds instances that can no longer be solved, so searches can stop exploring them. An instance is
+    stuck if some green box has no blue box that can still reach it, or if fewer blue boxes can reach any green box
+    than there are green boxes
+
+    Args:
+        env (VectorEnv): the environment being checked
+
+    Returns:
+        np.ndarray: (instances,) True for every instance that can't be solved
+    '''
+    blue = (env.codes == BLUE)[:, np.newaxis]
+    has_goal = env.reach.any(axis=(2, 3, 4))
+    unreached = has_goal & ~(env.reach & blue).any(axis=(2, 3, 4))
+    live_blues = (env.reach.any(axis=1) & blue[:, 0]).sum(axis=(1, 2, 3))
+    return unreached.any(axis=1) | (live_blues < env.goals.sum(axis=(1, 2, 3)))
+
+def reset(env: VectorEnv, mask: np.ndarray = None) -> np.ndarray:
+    '''
+    This function puts instances back to the start of their level
+
+    Args:
+        env (VectorEnv): the environment being reset
+        mask (np.ndarray): (instances,) True for every instance to reset, every instance is reset if None
+
+    Returns:
+        np.ndarray: the observations of every instance after the reset
+    '''
+    if mask is None:
+        mask = np.ones(len(env.codes), dtype=bool)
+    env.codes[mask] = env.start_codes[mask]
+    env.owners[mask] = env.start_owners[mask]
+    env.blue_cells[mask] = env.start_blue_cells[mask]
+    env.blue_offsets[mask] = 0
+    env.blue_movement[mask] = 0
+    env.blue_moving[mask] = False
+    env.scaled_up[mask] = -1
+    env.steps[mask] = 0
+    env.done[mask] = check_solved(env)[mask]
+    return observe(env)
+
+def measure_chains(grid: np.ndarray, instances: np.ndarray, cells: np.ndarray, axis: int,
+                   direction: int) -> tuple[np.ndarray, np.ndarray]:
+    '''
+    This function walks the line of blue boxes next to each red box in one direction, the same check
+    check_box_collision makes recursively. Past the edge of the grid is empty, as the grid grows when blue boxes are
+    pushed past it
+
+    Args:
+        grid (np.ndarray): (instances, layers, rows, columns) codes of every box, found by where they are rather than
+            where they are indexed like the game's broadphase
+        instances (np.ndarray): (boxes,) the instance of each red box
+        cells (np.ndarray): (boxes, 3) the layer, row, and column of each red box
+        axis (int): the array axis walked along, 1 for rows and 2 for columns
+        direction (int): 1 to walk towards higher indexes and -1 to walk towards lower ones
+
+    Returns:
+        tuple[np.ndarray, np.ndarray]: the number of blue boxes in each line and True where the line ends at a red or
+        white box instead of an empty cell
+    '''
+    lengths = np.zeros(len(instances), dtype=np.int64)
+    blocked = np.zeros(len(instances), dtype=bool)
+    walking = np.ones(len(instances), dtype=bool)
+    size = grid.shape[axis + 1]
+    for step in range(1, size + 1):
+        if not walking.any():
+            break
+        positions = cells.copy()
+        positions[:, axis] += direction * step
+        inside = (positions[:, axis] >= 0) & (positions[:, axis] < size)
+        positions[:, axis] = np.clip(positions[:, axis], 0, size - 1)
+        codes = np.where(inside, grid[instances, positions[:, 0], positions[:, 1], positions[:, 2]], EMPTY)
+        blue = walking & (codes == BLUE)
+        lengths += blue
+        blocked |= walking & ~blue & (codes != EMPTY)
+        walking = blue
+    return lengths, blocked
+
+def grow(env: VectorEnv, axis: int, before: int, after: int):
+    '''
+    This function adds empty cells to both ends of an axis of every instance, moving the boxes and the origin by the
+    cells added before them
+
+    Args:
+        env (VectorEnv): the environment being grown
+        axis (int): the array axis grown, 1 for rows and 2 for columns
+        before (int): the empty cells added before the first row or column
+        after (int): the empty cells added after the last row or column
+
+    Returns:
+        None
+    '''
+    padding = [(0, 0)] * 4
+    padding[axis + 1] = (before, after)
+    env.start_codes = np.pad(env.start_codes, padding)
+    env.codes = np.pad(env.codes, padding)
+    env.statics = np.pad(env.statics, padding)
+    env.start_owners = np.pad(env.start_owners, padding, constant_values=-1)
+    env.owners = np.pad(env.owners, padding, constant_values=-1)
+    env.goals = np.pad(env.goals, padding)
+    env.reach = np.pad(env.reach, [(0, 0)] + padding)
+    # Padded red boxes are left at -1
+    env.red_cells[..., axis][env.red_cells[..., axis] >= 0] += before
+    env.start_blue_cells[..., axis] += before
+    env.blue_cells[..., axis] += before
+    env.origin[axis - 1] += before
+
+def index_blue_boxes(env: VectorEnv, instances: np.ndarray, boxes: np.ndarray):
+    '''
+    This function indexes blue boxes in their cells, like index_box
+
+    Args:
+        env (VectorEnv): the environment being changed
+        instances (np.ndarray): (boxes,) the instance of each blue box
+        boxes (np.ndarray): (boxes,) the index of each blue box
+
+    Returns:
+        None
+    '''
+    cells = env.blue_cells[instances, boxes]
+    env.owners[instances, cells[:, 0], cells[:, 1], cells[:, 2]] = boxes
+    env.codes[instances, cells[:, 0], cells[:, 1], cells[:, 2]] = BLUE
+
+def unindex_blue_boxes(env: VectorEnv, instances: np.ndarray, boxes: np.ndarray):
+    '''
+    This function removes blue boxes from the cells they are indexed in, like unindex_box, leaving cells another box
+    is indexed in alone
+
+    Args:
+        env (VectorEnv): the environment being changed
+        instances (np.ndarray): (boxes,) the instance of each blue box
+        boxes (np.ndarray): (boxes,) the index of each blue box
+
+    Returns:
+        None
+    '''
+    cells = env.blue_cells[instances, boxes]
+    owned = env.owners[instances, cells[:, 0], cells[:, 1], cells[:, 2]] == boxes
+    instances = instances[owned]
+    cells = cells[owned]
+    env.owners[instances, cells[:, 0], cells[:, 1], cells[:, 2]] = -1
+    env.codes[instances, cells[:, 0], cells[:, 1], cells[:, 2]] = EMPTY
+
+def round_blue_boxes(env: VectorEnv, instances: np.ndarray, boxes: np.ndarray) -> np.ndarray:
+    '''
+    This function finds the cell each blue box is closest to, like get_rounded_cell. Halves are rounded to the
+    nearest even cell the way Python's round does, counting cells from where create_level places them so a box
+    halfway between cells rounds the same way in both
+
+    Args:
+        env (VectorEnv): the environment the blue boxes are in
+        instances (np.ndarray): (boxes,) the instance of each blue box
+        boxes (np.ndarray): (boxes,) the index of each blue box
+
+    Returns:
+        np.ndarray: (boxes, 3) the layer, row, and column of the cell each blue box is closest to
+    '''
+    centers = np.zeros((len(instances), 3), dtype=np.int64)
+    centers[:, 1:] = env.centers[instances] + env.origin
+    positions = (env.blue_cells[instances, boxes] - centers) * SUBSTEPS + env.blue_offsets[instances, boxes]
+    return np.rint(positions / SUBSTEPS).astype(np.int64) + centers
+
+def settle_blue_boxes(env: VectorEnv, instances: np.ndarray, boxes: np.ndarray):
+    '''
+    This function stops pushed blue boxes in the cell closest to them and drops them onto whatever is below, like
+    move_blue_box does once the red box is fully grown. The grid grows if a box stops past its edge
+
+    Args:
+        env (VectorEnv): the environment being changed
+        instances (np.ndarray): (boxes,) the instance of each blue box, each instance at most once
+        boxes (np.ndarray): (boxes,) the index of each blue box
+
+    Returns:
+        None
+    '''
+    env.blue_moving[instances, boxes] = False
+    env.blue_movement[instances, boxes] = 0
+    unindex_blue_boxes(env, instances, boxes)
+    cells = round_blue_boxes(env, instances, boxes)
+    for axis in [1, 2]:
+        before = max(0, -int(cells[:, axis].min(initial=0)))
+        after = max(0, int(cells[:, axis].max(initial=0)) - env.codes.shape[axis + 1] + 1)
+        if before or after:
+            before = max(before, MARGIN) if before else 0
+            after = max(after, MARGIN) if after else 0
+            grow(env, axis, before, after)
+            cells[:, axis] += before
+    falling = np.ones(len(instances), dtype=bool)
+    while falling.any():
+        falling &= cells[:, 0] > 0
+        below = env.codes[instances, np.maximum(cells[:, 0] - 1, 0), cells[:, 1], cells[:, 2]]
+        falling &= below == EMPTY
+        cells[falling, 0] -= 1
+    env.blue_cells[instances, boxes] = cells
+    env.blue_offsets[instances, boxes] = 0
+    index_blue_boxes(env, instances, boxes)
+
+def start_blue_boxes(env: VectorEnv, instances: np.ndarray, boxes: np.ndarray, pushers: np.ndarray,
+                     reds: np.ndarray, directions: np.ndarray) -> np.ndarray:
+    '''
+    This function starts resting blue boxes moving if the box pushing them would, like move_blue_box. A red box
+    starts the boxes next to it along the axes it grows on. A blue box starts any box on its layer next to the cell it
+    is closest to, giving it its own movement along the axis they are lined up on, even if it isn't moving along it
+
+    Args:
+        env (VectorEnv): the environment being changed
+        instances (np.ndarray): (boxes,) the instance of each blue box
+        boxes (np.ndarray): (boxes,) the index of each blue box
+        pushers (np.ndarray): (boxes,) the index of the blue box pushing each box, -1 for the red box
+        reds (np.ndarray): (boxes,) the index of the red box growing in each instance
+        directions (np.ndarray): (boxes, 3) True for the axes the red box in each instance grows on
+
+    Returns:
+        np.ndarray: (boxes,) True for every blue box started
+    '''
+    cells = env.blue_cells[instances, boxes]
+    movement = np.zeros(cells.shape, dtype=np.int64)
+    started = np.zeros(len(boxes), dtype=bool)
+
+    by_red = pushers < 0
+    distance = cells - env.red_cells[instances, reds]
+    for axis, other in [(1, 2), (2, 1)]:
+        next_to = (by_red & directions[:, axis] & (distance[:, 0] == 0) & (distance[:, other] == 0) &
+                   (np.abs(distance[:, axis]) == 1))
+        movement[next_to, axis] = distance[next_to, axis] * PUSH_SPEED
+        started |= next_to
+
+    by_blue = ~by_red
+    pusher_boxes = np.maximum(pushers, 0)
+    pusher_movement = env.blue_movement[instances, pusher_boxes]
+    pushing_cells = round_blue_boxes(env, instances, pusher_boxes)
+    distance = cells - pushing_cells
+    for axis, other in [(1, 2), (2, 1)]:
+        next_to = (by_blue & (distance[:, 0] == 0) & (distance[:, other] == 0) &
+                   (np.abs(distance[:, axis]) == 1))
+        movement[next_to, axis] = pusher_movement[next_to, axis]
+        started |= next_to
+
+    env.blue_moving[instances[started], boxes[started]] = True
+    env.blue_movement[instances[started], boxes[started]] = movement[started]
+    return started
+
+def push_frame(env: VectorEnv, instances: np.ndarray, reds: np.ndarray, directions: np.ndarray, settling: bool):
+    '''
+    This function runs one frame of red boxes pushing blue boxes, the way move_blue_box does. move_blue_box loops over
+    every blue box, advancing the moving ones and calling itself for each box it starts, so a box can be advanced
+    more than once a frame. The calls are run as a stack for each instance, every instance taking one step of its
+    loop at a time
+
+    Args:
+        env (VectorEnv): the environment being changed
+        instances (np.ndarray): (growing,) the instances with a red box growing
+        reds (np.ndarray): (growing,) the index of the red box growing in each instance
+        directions (np.ndarray): (growing, 3) True for the axes the red box in each instance grows on
+        settling (bool): True on the last frame, when the moving boxes stop where the red box pushes them
+
+    Returns:
+        None
+    '''
+    counts = env.blue_counts[instances]
+    depth = np.zeros(len(instances), dtype=np.int64)
+    pushers = np.full((len(instances), env.blue_cells.shape[1] + 1), -1, dtype=np.int64)
+    positions = np.zeros((len(instances), env.blue_cells.shape[1] + 1), dtype=np.int64)
+    while True:
+        active = np.nonzero(depth >= 0)[0]
+        if not len(active):
+            return
+        top = depth[active]
+        pusher = pushers[active, top]
+        box = positions[active, top]
+        finished = box >= counts[active]
+        depth[active[finished]] -= 1
+        active, top, pusher, box = active[~finished], top[~finished], pusher[~finished], box[~finished]
+        positions[active, top] += 1
+
+        moving = env.blue_moving[instances[active], box]
+        advanced = instances[active[moving]]
+        advanced_boxes = box[moving]
+        env.blue_offsets[advanced, advanced_boxes] += env.blue_movement[advanced, advanced_boxes]
+        between = env.blue_offsets[advanced, advanced_boxes].any(axis=1)
+        # A box between cells can't be found by cell
+        unindex_blue_boxes(env, advanced[between], advanced_boxes[between])
+        if settling:
+            # Only the red box's own call stops boxes
+            stopping = top[moving] == 0
+            settle_blue_boxes(env, advanced[stopping], advanced_boxes[stopping])
+
+        resting = active[~moving]
+        started = start_blue_boxes(env, instances[resting], box[~moving], pusher[~moving], reds[resting],
+                                   directions[resting])
+        calling = resting[started]
+        depth[calling] += 1
+        pushers[calling, depth[calling]] = box[~moving][started]
+        positions[calling, depth[calling]] = 0
+
+def step(env: VectorEnv, actions: np.ndarray) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    '''
+    This function activates one red box in every instance and plays out its growth frame by frame, like
+    update_scaling. An instance is solved as soon as every green box is filled, even partway through the growth, like
+    end_level, and nothing in it moves after that. Actions that can't scale a red box, like one without headroom or
+    the one already scaled up, leave their instance unchanged
+
+    Args:
+        env (VectorEnv): the environment being stepped
+        actions (np.ndarray): (instances,) index of the red box to activate in each instance, -1 to do nothing
+
+    Returns:
+        tuple[np.ndarray, np.ndarray, np.ndarray]: the observations, the rewards, which are 1 for instances solved by
+        this step and 0 otherwise, and the done flags of every instance
+    '''
+    actions = np.asarray(actions, dtype=np.int64)
+    valid = (actions >= 0) & (actions < env.red_counts) & (actions != env.scaled_up) & ~env.done
+    instances = np.nonzero(valid)[0]
+    cells = env.red_cells[instances, actions[instances]]
+
+    # A red box can only grow if the 2 cells above it are empty
+    for height in range(1, HEADROOM + 1):
+        above = env.codes[instances, cells[:, 0] + height, cells[:, 1], cells[:, 2]]
+        keep = above == EMPTY
+        instances = instances[keep]
+        cells = cells[keep]
+    env.scaled_up[instances] = actions[instances]
+    env.steps[instances] += 1
+
+    # Directions are decided before anything moves, a red box grows along an axis only if both sides are free. Every
+    # box is resting, and blue boxes are found where they are like the broadphase finds them
+    grid = env.statics.copy()
+    blues = np.arange(env.blue_cells.shape[1]) < env.blue_counts[:, np.newaxis]
+    blue_instances, blue_boxes = np.nonzero(blues)
+    blue_cells = env.blue_cells[blue_instances, blue_boxes]
+    grid[blue_instances, blue_cells[:, 0], blue_cells[:, 1], blue_cells[:, 2]] = BLUE
+    directions = np.zeros((len(instances), 3), dtype=bool)
+    for axis in [1, 2]:
+        chains = [measure_chains(grid, instances, cells, axis, direction) for direction in [1, -1]]
+        directions[:, axis] = ~chains[0][1] & ~chains[1][1]
+
+    # A red box doesn't push on the frame it starts growing, as it is still the size of its cell
+    growing = np.arange(len(instances))
+    for frame in range(1, FRAMES + 1):
+        push_frame(env, instances[growing], actions[instances[growing]], directions[growing], frame == FRAMES)
+        growing = growing[~check_solved(env)[instances[growing]]]
+
+    solved = check_solved(env)
+    rewards = (solved & ~env.done).astype(np.float32)
+    env.done |= solved
+    return observe(env), rewards, env.done.copy()
@@ -0,0 +1,194 @@
+from __future__ import annotations
+from dataclasses import dataclass
+from startup import lazy_import
+
+np = lazy_import("numpy") # Only needed once a level is loaded
+
+CHUNK_SIZE = 8 # Width of a chunk in cells along each axis
+
+# Voxel codes
+EMPTY = 0
+RED = 1
+WHITE = 2
+BLUE = 3
+GREEN = 4
+CODES = {"r": RED, "w": WHITE, "b": BLUE, "g": GREEN}
+
+@dataclass
+class VoxelGrid:
+    # A sparse 3d grid of voxel codes split into chunks, only chunks with something in them are stored
+    chunks: dict[tuple[int, int, int], np.ndarray] # {chunk: CHUNK_SIZE^3 array of codes}
+
+def create_voxel_grid() -> VoxelGrid:
+    '''
+    This function creates an empty voxel grid
+
+    Args:
+        None
+
+    Returns:
+        VoxelGrid: a voxel grid with no chunks
+    '''
+    return VoxelGrid({})
+
+def split_cell(cell: list[int]) -> tuple[tuple[int, int, int], tuple[int, int, int]]:
+    '''
+    This function splits a cell into the chunk it is in and its position inside that chunk
+
+    Args:
+        cell (list[int]): the x, y, and z cell
+
+    Returns:
+        tuple[tuple[int, int, int], tuple[int, int, int]]: the chunk and the position inside the chunk
+    '''
+    return ((cell[0] // CHUNK_SIZE, cell[1] // CHUNK_SIZE, cell[2] // CHUNK_SIZE),
+            (cell[0] % CHUNK_SIZE, cell[1] % CHUNK_SIZE, cell[2] % CHUNK_SIZE))
+
+def get_voxel(grid: VoxelGrid, cell: list[int]) -> int:
+    '''
+    This function finds the code of the voxel at a cell
+
+    Args:
+        grid (VoxelGrid): the voxel grid being read
+        cell (list[int]): the x, y, and z cell being read
+
+    Returns:
+        int: the code of the voxel, EMPTY if there is nothing there
+    '''
+    chunk, local = split_cell(cell)
+    if chunk not in grid.chunks:
+        return EMPTY
+    return int(grid.chunks[chunk][local])
+
+def set_voxel(grid: VoxelGrid, cell: list[int], code: int):
+    '''
+    This function sets the code of the voxel at a cell, creating its chunk if needed and dropping the chunk once it is
+    empty again
+
+    Args:
+        grid (VoxelGrid): the voxel grid being changed
+        cell (list[int]): the x, y, and z cell being changed
+        code (int): the new code of the voxel
+
+    Returns:
+        None
+    '''
+    chunk, local = split_cell(cell)
+    if chunk not in grid.chunks:
+        if code == EMPTY:
+            return
+        grid.chunks[chunk] = np.zeros((CHUNK_SIZE, CHUNK_SIZE, CHUNK_SIZE), dtype=np.int8)
+    grid.chunks[chunk][local] = code
+    if code == EMPTY and not grid.chunks[chunk].any():
+        del grid.chunks[chunk]
+
+def occupied_voxels(grid: VoxelGrid) -> list[tuple[list[int], int]]:
+    '''
+    This function lists every voxel that isn't empty, only visiting chunks that have something in them
+
+    Args:
+        grid (VoxelGrid): the voxel grid being read
+
+    Returns:
+        list[tuple[list[int], int]]: the x, y, and z cell and the code of each voxel
+    '''
+    voxels = []
+    for chunk, codes in grid.chunks.items():
+        for local in np.argwhere(codes):
+            cell = [int(chunk[axis] * CHUNK_SIZE + local[axis]) for axis in range(3)]
+            voxels.append((cell, int(codes[tuple(local)])))
+    return voxels
+
+def drop_cell(grid: VoxelGrid, cell: list[int], floor: int) -> list[int]:
+    '''
+    This function finds where a box at the given cell lands when it falls. Positive y is down, so a box falls until
+    the cell below it is taken or it reaches the floor
+
+    Args:
+        grid (VoxelGrid): the voxel grid holding every solid box
+        cell (list[int]): the x, y, and z cell the box falls from
+        floor (int): the lowest y a box can rest at
+
+    Returns:
+        list[int]: the x, y, and z cell the box lands on
+    '''
+    landing = list(cell)
+    while landing[1] < floor and get_voxel(grid, [landing[0], landing[1] + 1, landing[2]]) == EMPTY:
+        landing[1] += 1
+    return landing
+
+def settle_voxels(grid: VoxelGrid, falling: list[int], floor: int):
+    '''
+    This function drops every voxel with a falling code until it rests on the floor or another voxel. Voxels are
+    dropped lowest first so stacks settle in one pass
+
+    Args:
+        grid (VoxelGrid): the voxel grid being settled
+        falling (list[int]): the codes of voxels affected by gravity
+        floor (int): the lowest y a voxel can rest at
+
+    Returns:
+        None
+    '''
+    voxels = [voxel for voxel in occupied_voxels(grid) if voxel[1] in falling]
+    for cell, code in sorted(voxels, key=lambda voxel: -voxel[0][1]):
+        landing = drop_cell(grid, cell, floor)
+        if landing != cell:
+            set_voxel(grid, cell, EMPTY)
+            set_voxel(grid, landing, code)
+
+def get_layers(level: list) -> list[list[list[str]]]:
+    '''
+    This function converts a level into a list of layers from the bottom up. Levels are either a single 2d grid of
+    strings or a list of 2d grids, one for each layer
+
+    Args:
+        level (list): the level from levels.py
+
+    Returns:
+        list[list[list[str]]]: the 2d grid of each layer from the bottom up
+    '''
+    if level and level[0] and isinstance(level[0][0], list):
+        return level
+    return [level]
+
+def get_level_size(level: list) -> list[int]:
+    '''
+    This function finds the most columns and rows in any layer of a level, as rows and layers can differ in length
+
+    Args:
+        level (list): the level from levels.py
+
+    Returns:
+        list[int]: the columns and rows of the level
+    '''
+    layers = get_layers(level)
+    return [max(len(row) for layer in layers for row in layer), max(len(layer) for layer in layers)]
+
+def parse_level(level: list, offset: list[int], floor: int) -> tuple[VoxelGrid, list[list[int]]]:
+    '''
+    This function places a level's red, white, and blue boxes in a voxel grid and finds the cell of every green box.
+    Each layer is one cell above the last and up is negative y, so a character is placed at [column, -layer, row]
+    moved by the offset. Floating blue boxes are dropped onto whatever is below them
+
+    Args:
+        level (list): the level from levels.py
+        offset (list[int]): the x and z every cell is moved by
+        floor (int): the lowest y a blue box can rest at
+
+    Returns:
+        tuple[VoxelGrid, list[list[int]]]: the voxel grid of the red, white, and blue boxes and the cell of every green
+        box
+    '''
+    voxels = create_voxel_grid()
+    green_cells = []
+    for y, layer in enumerate(get_layers(level)):
+        for i, row in enumerate(reversed(layer)):
+            for j, character in enumerate(row):
+                cell = [j + offset[0], -y, i + offset[1]]
+                if character == "g":
+                    green_cells.append(cell)
+                elif character in CODES:
+                    set_voxel(voxels, cell, CODES[character])
+    settle_voxels(voxels, [BLUE], floor)
+    return voxels, green_cells